@@ -4,21 +4,96 @@
 # Tables: Cakes, CakeDesigns, Customers, Reviews
 # =====================================================
 
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session
+from flask import (Flask, render_template, request, redirect, url_for, jsonify, session,
+                   Response, make_response, stream_with_context)
+import base64
+import binascii
+import hashlib
+import json
 import os
+from werkzeug.datastructures import MultiDict
 from werkzeug.utils import secure_filename
-from datetime import datetime
-from functools import wraps
+from datetime import datetime, timedelta, timezone
+from functools import partial, wraps
 import sys
+import threading
+import time
 
 # Add database directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'database'))
-from db_connection import execute_query, execute_insert, get_db_connection
+from db_connection import (execute_query, execute_query_sets, execute_insert, get_db_connection, get_pool_stats,
+                           init_app, transaction, iter_query, is_db_available,
+                           get_breaker_stats, fan_out, get_query_stats, get_statement_cache_stats,
+                           get_replica_stats, query_timeout, check_schema_version,
+                           get_schema_version, latest_migration_version, cached_query, bump_tables,
+                           get_result_cache_stats, get_table_state, start_health_probe,
+                           DatabaseUnavailableError, QueryTimeoutError)
 
 app = Flask(__name__, 
             template_folder='frontend/templates',
             static_folder='frontend/static')
 
+# One pooled connection per request, released at teardown
+init_app(app)
+
+_background_threads = {'pid': None}
+_background_threads_lock = threading.Lock()
+
+@app.before_request
+def start_background_threads():
+    """
+    Start this process's background DB threads on its first request
+
+    Not at import, so scripts, tests and a pre-fork master importing app
+    don't touch the database; each worker process starts its own: the
+    health probe, a one-off schema version check and the snapshot refresher.
+    Registered first so it runs even when fail_fast_when_db_down answers.
+    """
+    pid = os.getpid()
+    if _background_threads['pid'] == pid:
+        return
+    with _background_threads_lock:
+        if _background_threads['pid'] == pid:
+            return
+        start_health_probe()
+        # Schema changes ship as migrations (scripts/migrate.py); check the
+        # applied version once per process, off the request path
+        threading.Thread(target=check_schema_version, name='schema-version-check', daemon=True).start()
+        start_dashboard_refresher()
+        _background_threads['pid'] = pid
+
+# API endpoints that never touch the database
+DB_FREE_ENDPOINTS = {'api_flavors', 'api_sizes'}
+
+# API endpoints that can answer from cached results while the DB is down
+STALE_OK_ENDPOINTS = {'api_designs', 'api_top_designs', 'api_dashboard_stats'}
+
+@app.before_request
+def fail_fast_when_db_down():
+    """Answer API calls with 503 at once while the DB circuit breaker is open"""
+    if (request.path.startswith('/api/') and request.endpoint not in DB_FREE_ENDPOINTS
+            and request.endpoint not in STALE_OK_ENDPOINTS and not is_db_available()):
+        return db_unavailable_response()
+
+def db_unavailable_response(message='Database temporarily unavailable'):
+    response = jsonify({'error': message})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+def api_error_response(e):
+    """JSON error for an API route: 503 when the DB is down or too slow, else 500"""
+    if isinstance(e, QueryTimeoutError):
+        return db_unavailable_response('Query timed out, try again shortly')
+    if isinstance(e, DatabaseUnavailableError):
+        return db_unavailable_response()
+    return jsonify({'error': str(e)}), 500
+
+# Statement timeouts (s) for public pages and the JSON API, so one slow
+# query can't hold a worker; admin pages keep the DB_QUERY_TIMEOUT default
+PAGE_QUERY_TIMEOUT = int(os.environ.get('PAGE_QUERY_TIMEOUT', 10))
+API_QUERY_TIMEOUT = int(os.environ.get('API_QUERY_TIMEOUT', 5))
+
 # Configuration
 app.config['UPLOAD_FOLDER'] = 'frontend/static/images/cakes'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
@@ -34,32 +109,458 @@ def allowed_file(filename):
 # HELPER FUNCTIONS - Using Stored Functions and Views
 # ==============================================================================
 
+# Catalog reads go through cached_query(), tagged with the base tables they
+# read; every route that writes one of them calls bump_tables() afterwards
+CAKE_TABLES = ('Cakes',)
+CAKE_DESIGN_TABLES = ('Cakes', 'CakeDesigns')
+DESIGN_TABLES = ('Cakes', 'CakeDesigns', 'Reviews')  # ratings come from reviews
+
+# The hottest reads (design pages, dashboard stats, top designs) are served
+# this long past their TTL while one background query refreshes them, so an
+# expiry never sends every concurrent request to SQL Server at once
+HOT_QUERY_STALE_SECONDS = int(os.environ.get('HOT_QUERY_STALE_SECONDS', 60))
+DASHBOARD_STATS_TTL = 10  # the snapshot is refreshed by another worker too
+
+def get_available_cakes():
+    """Cakes that can be ordered (homepage filters and price calculator)"""
+    return cached_query("SELECT * FROM Cakes WHERE availability = 1", tables=CAKE_TABLES)
+
+def get_cakes_with_design_count():
+    """All cakes with their number of designs using View"""
+    return cached_query("SELECT * FROM vw_CakeWithDesignCount ORDER BY cake_id",
+                        tables=CAKE_DESIGN_TABLES)
+
 def get_design_with_details(design_id):
-    """Get design with cake info and ratings using View"""
-    query = """
-        SELECT * FROM vw_DesignWithRatings 
-        WHERE design_id = ?
-    """
-    results = execute_query(query, (design_id,))
-    if results:
-        design = results[0]
-        # Calculate price using stored function
-        price_query = "SELECT dbo.fn_CalculateDesignPrice(?) AS calculated_price"
-        price_result = execute_query(price_query, (design_id,))
-        design['calculated_price'] = price_result[0]['calculated_price'] if price_result else 0
-        return design
-    return None
-
-def get_all_designs_with_details():
-    """Get all designs with details using View - Featured first"""
-    query = """
-        SELECT 
-            dr.*,
-            dbo.fn_CalculateDesignPrice(dr.design_id) AS calculated_price
+    """
+    Get design with cake info, price, ratings and visible reviews
+    
+    One call to sp_GetDesignDetail returns the design row (view columns plus
+    frosting and size) and its reviews as two result sets.
+    """
+    result_sets = execute_query_sets("EXEC sp_GetDesignDetail @design_id = ?", (design_id,))
+    if not result_sets or not result_sets[0]:
+        return None
+    design = result_sets[0][0]
+    design['reviews'] = result_sets[1] if len(result_sets) > 1 else []
+    return design
+
+def get_top_designs(count):
+    """Highest-rated designs using stored procedure"""
+    return cached_query("EXEC sp_GetTopDesigns @top_count = ?", (count,), tables=DESIGN_TABLES,
+                        stale_ttl=HOT_QUERY_STALE_SECONDS)
+
+def get_dashboard_stats():
+    """Dashboard snapshot figures, or None; age_seconds is as of this call"""
+    result = cached_query("EXEC sp_GetDashboardStats", tables=('DashboardSnapshot',),
+                          ttl=DASHBOARD_STATS_TTL, stale_ttl=HOT_QUERY_STALE_SECONDS)
+    if not result:
+        return None
+    stats = result[0]
+    refreshed_at = stats.get('refreshed_at')
+    if refreshed_at:
+        if isinstance(refreshed_at, str):
+            refreshed_at = datetime.fromisoformat(refreshed_at)
+        # refreshed_at is SYSUTCDATETIME(), stored without an offset
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        stats['age_seconds'] = max(int((now - refreshed_at).total_seconds()), 0)
+    return stats
+
+# Homepage catalog: one page is fetched from SQL Server, never the whole view
+DESIGNS_PER_PAGE = 30
+
+_DESIGN_LIST_SELECT = """
+    SELECT dr.*
+    FROM vw_DesignWithRatings dr
+"""
+
+def count_designs():
+    """Total designs for the pager"""
+    result = cached_query("SELECT COUNT(*) AS cnt FROM vw_DesignWithRatings", tables=CAKE_DESIGN_TABLES)
+    return result[0]['cnt'] if result else 0
+
+def get_designs_page(page, per_page=DESIGNS_PER_PAGE):
+    """One page of designs (featured first) using OFFSET/FETCH"""
+    query = _DESIGN_LIST_SELECT + """
+        ORDER BY dr.featured DESC, dr.design_id
+        OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+    """
+    return cached_query(query, ((page - 1) * per_page, per_page), tables=DESIGN_TABLES)
+
+def get_designs_seek(after=None, before=None, per_page=DESIGNS_PER_PAGE):
+    """
+    One page of designs next to a (featured, design_id) key (keyset paging)
+    
+    The page is found with an index seek on (featured DESC, design_id), so
+    page 500 costs the same as page 1. Pass after= for the following page
+    or before= for the previous one.
+    """
+    if after is not None:
+        featured, design_id = after
+        query = _DESIGN_LIST_SELECT + """
+            WHERE dr.featured <= ? AND (dr.featured < ? OR dr.design_id > ?)
+            ORDER BY dr.featured DESC, dr.design_id
+            OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY
+        """
+        return cached_query(query, (featured, featured, design_id, per_page), tables=DESIGN_TABLES)
+    
+    featured, design_id = before
+    query = _DESIGN_LIST_SELECT + """
+        WHERE dr.featured >= ? AND (dr.featured > ? OR dr.design_id < ?)
+        ORDER BY dr.featured ASC, dr.design_id DESC
+        OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY
+    """
+    designs = cached_query(query, (featured, featured, design_id, per_page), tables=DESIGN_TABLES)
+    designs.reverse()
+    return designs
+
+def design_cursor(design):
+    """Keyset position of a design, as used in ?after= / ?before="""
+    return f"{1 if design.get('featured') else 0}-{design['design_id']}"
+
+def parse_design_cursor(value):
+    """Parse 'featured-design_id' from a query string; None if absent or malformed"""
+    try:
+        featured, design_id = value.split('-')
+        featured, design_id = int(featured), int(design_id)
+    except (AttributeError, ValueError):
+        return None
+    if featured not in (0, 1):
+        return None
+    return featured, design_id
+
+# Admin review moderation: one keyset page at a time, filtered in SQL
+REVIEWS_PER_PAGE = 50
+REVIEW_COUNT_CAP = 10000  # matches are counted up to here, then shown as "10000+"
+
+# sort name -> (key column, direction); review_id breaks ties the same way
+REVIEW_SORTS = {
+    'date-desc': ('r.review_date', 'DESC'),
+    'date-asc': ('r.review_date', 'ASC'),
+    'rating-desc': ('r.rating', 'DESC'),
+    'rating-asc': ('r.rating', 'ASC'),
+}
+DEFAULT_REVIEW_SORT = 'date-desc'
+
+# review_date_key is review_date as text that converts back to the exact
+# DATETIME value (style 126), so it can be carried in a cursor
+_REVIEW_LIST_SELECT = """
+    SELECT TOP (?)
+        r.review_id, r.customer_id, r.design_id, r.rating, r.review_text,
+        r.review_date, r.is_hidden,
+        CONVERT(VARCHAR(23), r.review_date, 126) AS review_date_key,
+        c.full_name AS customer_name,
+        cd.theme,
+        ck.cake_name,
+        rs.avg_rating AS design_avg_rating
+    FROM Reviews r
+    JOIN Customers c ON r.customer_id = c.customer_id
+    JOIN CakeDesigns cd ON r.design_id = cd.design_id
+    JOIN Cakes ck ON cd.cake_id = ck.cake_id
+    LEFT JOIN DesignRatingStats rs ON rs.design_id = r.design_id
+"""
+
+def parse_review_filters(args):
+    """Moderation filters from a query string; invalid values are dropped"""
+    filters = {}
+    rating = args.get('rating', type=int)
+    if rating in (1, 2, 3, 4, 5):
+        filters['rating'] = rating
+    if args.get('hidden') in ('0', '1'):
+        filters['hidden'] = int(args['hidden'])
+    design_id = args.get('design_id', type=int)
+    if design_id:
+        filters['design_id'] = design_id
+    for name in ('date_from', 'date_to'):
+        try:
+            filters[name] = datetime.strptime(args.get(name, ''), '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return filters
+
+def _review_filter_sql(filters):
+    """WHERE clauses and parameters for parse_review_filters() output"""
+    clauses, params = [], []
+    if 'rating' in filters:
+        clauses.append("r.rating = ?")
+        params.append(filters['rating'])
+    if 'hidden' in filters:
+        # Inlined (0 or 1) so the filtered hidden-reviews index can match
+        clauses.append(f"r.is_hidden = {int(filters['hidden'])}")
+    if 'design_id' in filters:
+        clauses.append("r.design_id = ?")
+        params.append(filters['design_id'])
+    if 'date_from' in filters:
+        clauses.append("r.review_date >= ?")
+        params.append(filters['date_from'])
+    if 'date_to' in filters:
+        clauses.append("r.review_date < ?")
+        params.append(filters['date_to'] + timedelta(days=1))
+    return clauses, params
+
+def get_reviews_seek(filters, sort=DEFAULT_REVIEW_SORT, after=None, before=None, per_page=REVIEWS_PER_PAGE):
+    """
+    One page of reviews for moderation, located by keyset
+    
+    Filters and the (sort key, review_id) position are applied in SQL, so
+    every page is an index seek plus per_page rows, however many reviews
+    there are. Pass after= for the following page, before= for the
+    previous one, neither for the first.
+    
+    Returns:
+        (reviews, more): more is True if another page lies in the
+        direction travelled
+    """
+    column, direction = REVIEW_SORTS[sort]
+    clauses, params = _review_filter_sql(filters)
+    # Walking backwards reads in reverse sort order, then flips the page
+    backwards = after is None and before is not None
+    if backwards:
+        direction = 'ASC' if direction == 'DESC' else 'DESC'
+    key = after if after is not None else before
+    if key is not None:
+        op = '<' if direction == 'DESC' else '>'
+        value_sql = "CONVERT(DATETIME, ?, 126)" if column == 'r.review_date' else "?"
+        clauses.append(f"{column} {op}= {value_sql} AND ({column} {op} {value_sql} OR r.review_id {op} ?)")
+        params += [key[0], key[0], key[1]]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = _REVIEW_LIST_SELECT + f"""
+        {where}
+        ORDER BY {column} {direction}, r.review_id {direction}
+    """
+    reviews = execute_query(query, (per_page + 1, *params))
+    more = len(reviews) > per_page
+    reviews = reviews[:per_page]
+    if backwards:
+        reviews.reverse()
+    return reviews, more
+
+def count_reviews(filters, cap=REVIEW_COUNT_CAP):
+    """Reviews matching filters, counted no further than cap + 1"""
+    clauses, params = _review_filter_sql(filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    result = execute_query(f"""
+        SELECT COUNT(*) AS cnt
+        FROM (SELECT TOP (?) 1 AS hit FROM Reviews r {where}) matches
+    """, (cap + 1, *params))
+    return result[0]['cnt'] if result else 0
+
+def review_cursor(review, sort):
+    """Keyset position of a review under sort, as used in ?after= / ?before="""
+    column = REVIEW_SORTS[sort][0]
+    value = review['review_date_key'] if column == 'r.review_date' else review['rating']
+    return f"{value}_{review['review_id']}"
+
+def parse_review_cursor(value, sort):
+    """Parse 'key_review_id' for sort; None if absent or malformed"""
+    try:
+        key, review_id = value.rsplit('_', 1)
+        review_id = int(review_id)
+        if REVIEW_SORTS[sort][0] == 'r.review_date':
+            datetime.fromisoformat(key)
+        else:
+            key = int(key)
+    except (AttributeError, ValueError):
+        return None
+    return key, review_id
+
+def like_prefix(text):
+    """LIKE pattern matching values that start with text (wildcards escaped)"""
+    return text.replace('[', '[[]').replace('%', '[%]').replace('_', '[_]') + '%'
+
+LOOKUP_LIMIT = 20  # typeahead suggestions per request
+
+# Admin customer/design listings: fetched by the page a slice at a time
+ADMIN_PAGE_SIZE = 50
+ADMIN_COUNT_CAP = 10000
+
+def encode_cursor(sort_key, row_id):
+    """Opaque keyset cursor for (sort key, row id)"""
+    return base64.urlsafe_b64encode(json.dumps([sort_key, row_id]).encode()).decode().rstrip('=')
+
+def decode_cursor(value):
+    """(sort key, row id) from encode_cursor(); None if absent or malformed"""
+    try:
+        sort_key, row_id = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    except (TypeError, ValueError, binascii.Error):
+        return None
+    if not isinstance(row_id, int) or not isinstance(sort_key, (str, int, float)):
+        return None
+    return sort_key, row_id
+
+def seek_page(columns, from_sql, sort_expr, direction, id_column, clauses=(), params=(),
+              after=None, per_page=ADMIN_PAGE_SIZE):
+    """
+    One keyset page: the rows after a (sort key, id) cursor, in sort order
+
+    Args:
+        columns: SELECT list for the page
+        from_sql: FROM/JOIN clause
+        sort_expr: SQL expression to sort by (id_column breaks ties)
+        direction: 'ASC' or 'DESC'
+        id_column: Unique column, e.g. 'cu.customer_id'
+        clauses, params: Filter conditions (ANDed) and their parameters
+        after: Cursor from the previous page (decode_cursor output)
+
+    Returns:
+        (rows, next_cursor): next_cursor is None on the last page
+    """
+    clauses, params = list(clauses), list(params)
+    if after is not None:
+        op = '<' if direction == 'DESC' else '>'
+        if sort_expr == id_column:
+            clauses.append(f"{id_column} {op} ?")
+            params.append(after[1])
+        else:
+            clauses.append(f"{sort_expr} {op}= ? AND ({sort_expr} {op} ? OR {id_column} {op} ?)")
+            params += [after[0], after[0], after[1]]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    order_by = f"{id_column} {direction}"
+    if sort_expr != id_column:
+        order_by = f"{sort_expr} {direction}, {order_by}"
+    rows = execute_query(f"""
+        SELECT TOP (?) {columns}, {sort_expr} AS sort_key
+        {from_sql}
+        {where}
+        ORDER BY {order_by}
+    """, (per_page + 1, *params))
+    id_name = id_column.split('.')[-1]
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1]['sort_key'], rows[-1][id_name])
+    for row in rows:
+        del row['sort_key']
+    return rows, next_cursor
+
+def count_capped(from_sql, clauses=(), params=(), cap=ADMIN_COUNT_CAP):
+    """Rows matching clauses, counted no further than cap + 1"""
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    result = execute_query(f"""
+        SELECT COUNT(*) AS cnt
+        FROM (SELECT TOP (?) 1 AS hit {from_sql} {where}) matches
+    """, (cap + 1, *params))
+    return result[0]['cnt'] if result else 0
+
+def listing_response(rows, next_cursor, total, cap=ADMIN_COUNT_CAP):
+    """JSON body shared by the admin listing endpoints"""
+    return jsonify({'items': rows, 'next_cursor': next_cursor,
+                    'total': min(total, cap), 'total_capped': total > cap})
+
+# Public list API: cursor pages with a caller-chosen subset of columns
+API_DEFAULT_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+# Selectable fields -> SQL expression (the default is all of them)
+API_DESIGN_FIELDS = {name: f"dr.{name}" for name in (
+    'design_id', 'theme', 'color_palette', 'topper_type', 'complexity_level', 'image_url', 'featured',
+    'created_at', 'cake_name', 'flavor', 'base_price', 'calculated_price', 'avg_rating', 'review_count'
+)}
+API_REVIEW_FIELDS = {name: f"r.{name}" for name in (
+    'review_id', 'customer_id', 'design_id', 'rating', 'review_text', 'review_date', 'is_hidden'
+)}
+
+class ApiRequestError(ValueError):
+    """Bad query-string parameter on a public API route (answered with 400)"""
+
+def parse_api_fields(args, allowed):
+    """
+    Requested field names from ?fields=a,b (all of allowed when absent)
+
+    Raises:
+        ApiRequestError: A name is not in allowed
+    """
+    requested = [name.strip() for name in args.get('fields', '').split(',') if name.strip()]
+    if not requested:
+        return list(allowed)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ApiRequestError(f"Unknown field(s): {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return list(dict.fromkeys(requested))
+
+def parse_api_limit(args):
+    """Page size from ?limit=, defaulted and capped at API_MAX_PAGE_SIZE"""
+    limit = args.get('limit', API_DEFAULT_PAGE_SIZE, type=int)
+    return min(max(limit, 1), API_MAX_PAGE_SIZE)
+
+def estimate_row_count(table):
+    """Approximate rows in a table from partition metadata, without scanning it"""
+    result = cached_query("""
+        SELECT SUM(p.rows) AS cnt
+        FROM sys.partitions p
+        WHERE p.object_id = OBJECT_ID(?) AND p.index_id IN (0, 1)
+    """, (f"dbo.{table}",), tables=(table,))
+    return int(result[0]['cnt'] or 0) if result else 0
+
+def api_page_response(items, next_cursor, limit, estimate_table=None):
+    """JSON body shared by the paginated API routes; ?total=1 adds an estimated total"""
+    body = {'items': items, 'next_cursor': next_cursor, 'limit': limit}
+    if estimate_table and request.args.get('total') == '1':
+        body['total_estimate'] = estimate_row_count(estimate_table)
+    return jsonify(body)
+
+def get_api_designs_page(fields, after=None, limit=API_DEFAULT_PAGE_SIZE):
+    """
+    One page of designs for the API, featured first, with only fields selected
+
+    Keyset on (featured DESC, design_id), the homepage order and the
+    IX_CakeDesigns_Featured index; columns not asked for never leave SQL
+    Server, and the view's joins they need can be skipped.
+
+    Returns:
+        (designs, next_cursor): next_cursor is None on the last page
+    """
+    columns = ', '.join(f"{API_DESIGN_FIELDS[name]} AS {name}" for name in fields)
+    where, params = "", []
+    if after is not None:
+        featured, design_id = after
+        where = "WHERE dr.featured <= ? AND (dr.featured < ? OR dr.design_id > ?)"
+        params = [featured, featured, design_id]
+    designs = cached_query(f"""
+        SELECT TOP (?) {columns}, dr.featured AS page_featured, dr.design_id AS page_id
         FROM vw_DesignWithRatings dr
+        {where}
         ORDER BY dr.featured DESC, dr.design_id
+    """, (limit + 1, *params), tables=DESIGN_TABLES, stale_ttl=HOT_QUERY_STALE_SECONDS)
+    next_cursor = None
+    if len(designs) > limit:
+        designs = designs[:limit]
+        next_cursor = encode_cursor(int(bool(designs[-1]['page_featured'])), designs[-1]['page_id'])
+    for design in designs:
+        del design['page_featured'], design['page_id']
+    return designs, next_cursor
+
+def get_api_reviews_page(fields, after=None, limit=API_DEFAULT_PAGE_SIZE):
     """
-    return execute_query(query)
+    One page of reviews for the API, newest first, with only fields selected
+
+    Keyset on (review_date DESC, review_id DESC) so each page is a seek on
+    IX_Reviews_ReviewDate; the date travels in the cursor as style-126
+    text (see _REVIEW_LIST_SELECT).
+
+    Returns:
+        (reviews, next_cursor): next_cursor is None on the last page
+    """
+    columns = ', '.join(f"{API_REVIEW_FIELDS[name]} AS {name}" for name in fields)
+    where, params = "", []
+    if after is not None:
+        date_key, review_id = after
+        where = """WHERE r.review_date <= CONVERT(DATETIME, ?, 126)
+                     AND (r.review_date < CONVERT(DATETIME, ?, 126) OR r.review_id < ?)"""
+        params = [date_key, date_key, review_id]
+    reviews = cached_query(f"""
+        SELECT TOP (?) {columns},
+            CONVERT(VARCHAR(23), r.review_date, 126) AS page_date, r.review_id AS page_id
+        FROM Reviews r
+        {where}
+        ORDER BY r.review_date DESC, r.review_id DESC
+    """, (limit + 1, *params), tables=('Reviews',))
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = encode_cursor(reviews[-1]['page_date'], reviews[-1]['page_id'])
+    for review in reviews:
+        del review['page_date'], review['page_id']
+    return reviews, next_cursor
 
 def get_customer_with_stats(customer_id):
     """Get customer with review stats using View"""
@@ -70,28 +571,97 @@ def get_customer_with_stats(customer_id):
     results = execute_query(query, (customer_id,))
     return results[0] if results else None
 
+def conditional_api(tables, private=False):
+    """
+    Route decorator: ETag / Last-Modified validators for a JSON API route
+
+    The ETag is built from the versions of tables (advanced by bump_tables()
+    on every write) and the request's path and query string, before the
+    route runs. A client revalidating unchanged data with If-None-Match
+    gets a 304 without a query or any JSON serialization. That needs a
+    shared result cache backend (sqlite/redis) so every worker sees every
+    write; otherwise the ETag is a hash of the body, which saves bandwidth
+    only.
+    Last-Modified is informational: If-Modified-Since alone can't tell two
+    writes within a second apart, so only If-None-Match yields 304s.
+
+    Args:
+        tables: Base tables the route's response is read from
+        private: Response holds customer data (no shared caches)
+    """
+    cache_control = 'private, no-cache' if private else 'no-cache'
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            state = get_table_state(tables)
+            if state is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    response.headers['Cache-Control'] = cache_control
+                    response.add_etag()
+                    response.make_conditional(request)
+                return response
+
+            # Versions are read before the query, so a write racing it only
+            # makes the next revalidation miss
+            validator = (request.path, sorted(request.args.items(multi=True)), state.epoch, state.versions)
+            etag = hashlib.sha1(repr(validator).encode('utf-8')).hexdigest()[:32]
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = datetime.fromtimestamp(state.last_modified, timezone.utc)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+def stream_json_rows(rows):
+    """Stream an iterable of rows as a JSON array without buffering it"""
+    rows = iter(rows)
+    # Pull the first row now so query errors surface before the 200 is sent
+    first = next(rows, None)
+    
+    def generate():
+        yield '['
+        if first is not None:
+            yield app.json.dumps(first)
+            for row in rows:
+                yield ',' + app.json.dumps(row)
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 # ==============================================================================
 # PUBLIC ROUTES
 # ==============================================================================
 
 @app.route('/')
+@query_timeout(PAGE_QUERY_TIMEOUT)
 def index():
     """Home page - Browse cake designs with pagination"""
     try:
         # Pagination settings
-        page = request.args.get('page', 1, type=int)
-        per_page = 30  # 30 cakes per page
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = DESIGNS_PER_PAGE
         
-        # Get all designs first for total count
-        all_designs = get_all_designs_with_details()
-        total_designs = len(all_designs) if all_designs else 0
+        total_designs = count_designs()
         total_pages = (total_designs + per_page - 1) // per_page  # Ceiling division
         
-        # Calculate offset and get paginated designs
-        offset = (page - 1) * per_page
-        designs = all_designs[offset:offset + per_page] if all_designs else []
+        # Next/Prev links carry a keyset cursor; numbered links use OFFSET
+        after = parse_design_cursor(request.args.get('after'))
+        before = parse_design_cursor(request.args.get('before'))
+        if after or before:
+            designs = get_designs_seek(after=after, before=before, per_page=per_page)
+        else:
+            designs = get_designs_page(page, per_page)
+        next_cursor = design_cursor(designs[-1]) if designs and page < total_pages else None
+        prev_cursor = design_cursor(designs[0]) if designs and page > 1 else None
         
-        cakes = execute_query("SELECT * FROM Cakes WHERE availability = 1")
+        cakes = get_available_cakes()
         logged_in_customer = session.get('customer')
         
         return render_template('index.html', 
@@ -100,40 +670,24 @@ def index():
                                logged_in_customer=logged_in_customer,
                                page=page,
                                total_pages=total_pages,
-                               total_designs=total_designs)
+                               total_designs=total_designs,
+                               next_cursor=next_cursor,
+                               prev_cursor=prev_cursor)
     except Exception as e:
         print(f"Error loading index: {e}")
         return render_template('index.html', designs=[], cakes=[], logged_in_customer=None, 
                                page=1, total_pages=1, total_designs=0, error=str(e))
 
 @app.route('/design/<int:design_id>')
+@query_timeout(PAGE_QUERY_TIMEOUT)
 def design_detail(design_id):
     """Design detail page with reviews"""
     try:
+        # Design, price, cake details and reviews in one round trip
         design = get_design_with_details(design_id)
         if not design:
             return redirect(url_for('index'))
-        
-        # Get cake details
-        cake_query = """
-            SELECT c.* FROM Cakes c
-            JOIN CakeDesigns cd ON c.cake_id = cd.cake_id
-            WHERE cd.design_id = ?
-        """
-        cake_results = execute_query(cake_query, (design_id,))
-        if cake_results:
-            design['frosting'] = cake_results[0]['frosting']
-            design['size'] = cake_results[0]['size']
-        
-        # Get reviews with customer info
-        reviews_query = """
-            SELECT r.*, c.full_name AS customer_name, c.city
-            FROM Reviews r
-            JOIN Customers c ON r.customer_id = c.customer_id
-            WHERE r.design_id = ?
-            ORDER BY r.review_date DESC
-        """
-        reviews = execute_query(reviews_query, (design_id,))
+        reviews = design['reviews']
         
         logged_in_customer = session.get('customer')
         return render_template('design_detail.html', 
@@ -148,7 +702,7 @@ def design_detail(design_id):
 def calculator():
     """Price calculator page"""
     try:
-        cakes = execute_query("SELECT * FROM Cakes WHERE availability = 1")
+        cakes = get_available_cakes()
         logged_in_customer = session.get('customer')
         return render_template('calculator.html', cakes=cakes, logged_in_customer=logged_in_customer)
     except Exception as e:
@@ -205,6 +759,7 @@ def customer_signup():
             VALUES (?, ?, ?, ?)
         """
         execute_insert(insert_query, (full_name, email, city, password))
+        bump_tables('Customers')
         
         # Redirect to login page with success message
         login_url = url_for('customer_login')
@@ -240,6 +795,7 @@ def submit_review(design_id):
             VALUES (?, ?, ?, ?)
         """
         execute_insert(insert_query, (customer['customer_id'], design_id, rating, review_text))
+        bump_tables('Reviews')
         
         return redirect(url_for('design_detail', design_id=design_id))
     except Exception as e:
@@ -278,14 +834,94 @@ def admin_logout():
 # ADMIN DASHBOARD - Using Stored Procedure
 # ==============================================================================
 
+# Dashboard figures come from the DashboardSnapshot table, rebuilt by
+# sp_RefreshDashboardSnapshot every DASHBOARD_REFRESH_SECONDS and shortly
+# after admin/customer writes (bursts of writes share one refresh)
+DASHBOARD_REFRESH_SECONDS = float(os.environ.get('DASHBOARD_REFRESH_SECONDS', 60))
+DASHBOARD_NUDGE_DELAY = 2.0
+
+# Write endpoints that change dashboard figures, besides the admin_* ones
+DASHBOARD_WRITE_ENDPOINTS = {'customer_signup', 'submit_review'}
+
+_dashboard_nudge = threading.Event()
+_dashboard_refresher = {'thread': None, 'pid': None}
+
+def refresh_dashboard_snapshot(min_age_seconds=0):
+    """Rebuild the dashboard snapshot unless it is younger than min_age_seconds"""
+    execute_query("EXEC sp_RefreshDashboardSnapshot @min_age_seconds = ?",
+                  (int(min_age_seconds),), fetch=False)
+    bump_tables('DashboardSnapshot')
+
+def nudge_dashboard_snapshot():
+    """Ask the background refresher to rebuild the snapshot soon"""
+    _dashboard_nudge.set()
+
+def _dashboard_refresh_loop():
+    nudged = True  # refresh once at startup
+    while True:
+        if nudged:
+            # Let a burst of writes settle before recounting
+            time.sleep(DASHBOARD_NUDGE_DELAY)
+            _dashboard_nudge.clear()
+        try:
+            # Scheduled runs skip if another worker refreshed recently
+            refresh_dashboard_snapshot(0 if nudged else DASHBOARD_REFRESH_SECONDS / 2)
+        except Exception as e:
+            print(f"Dashboard snapshot refresh failed: {e}")
+        nudged = _dashboard_nudge.wait(DASHBOARD_REFRESH_SECONDS)
+
+def start_dashboard_refresher():
+    """Start the snapshot refresher thread for this process (idempotent)"""
+    if DASHBOARD_REFRESH_SECONDS <= 0:
+        return
+    pid = os.getpid()
+    thread = _dashboard_refresher['thread']
+    if thread is not None and _dashboard_refresher['pid'] == pid and thread.is_alive():
+        return
+    thread = threading.Thread(target=_dashboard_refresh_loop, name='dashboard-refresh', daemon=True)
+    _dashboard_refresher.update(thread=thread, pid=pid)
+    thread.start()
+
+@app.after_request
+def nudge_dashboard_after_write(response):
+    if (request.method == 'POST' and response.status_code < 400 and request.endpoint
+            and (request.endpoint.startswith('admin_') or request.endpoint in DASHBOARD_WRITE_ENDPOINTS)
+            and request.endpoint not in ('admin_login', 'admin_logout')):
+        nudge_dashboard_snapshot()
+    return response
+
+# Dashboard panels: independent queries, fetched concurrently with fan_out()
+# Dashboard panels read straight from the database; stats and top designs
+# come from the cached helpers (see dashboard_calls())
+DASHBOARD_QUERIES = {
+    # Complexity, rating and city distributions from the snapshot
+    'distributions': """
+        SELECT dimension, label, value
+        FROM DashboardSnapshotDistribution
+        ORDER BY dimension, sort_order
+    """
+}
+DASHBOARD_QUERY_TIMEOUT = int(os.environ.get('DASHBOARD_QUERY_TIMEOUT', 10))
+
+def dashboard_calls():
+    """Name -> callable for each admin dashboard panel, for fan_out()"""
+    calls = {name: partial(execute_query, query) for name, query in DASHBOARD_QUERIES.items()}
+    # Snapshot stats and top designs share the cached, coalesced API helpers
+    calls.update(stats=get_dashboard_stats, top_designs=partial(get_top_designs, 5))
+    return calls
+
 @app.route('/admin/dashboard')
 def admin_dashboard():
     """Admin dashboard with statistics"""
     try:
-        # Use stored procedure for dashboard stats
-        stats_query = "EXEC sp_GetDashboardStats"
-        stats_result = execute_query(stats_query)
-        stats = stats_result[0] if stats_result else {
+        # Independent queries run concurrently; a failed or slow panel stays empty
+        results = fan_out(dashboard_calls(), timeout=DASHBOARD_QUERY_TIMEOUT, return_exceptions=True)
+        for name, result in results.items():
+            if isinstance(result, Exception):
+                print(f"Dashboard query '{name}' failed: {result}")
+                results[name] = None if name == 'stats' else []
+        
+        stats = results['stats'] or {
             'total_cakes': 0, 'total_designs': 0, 'total_customers': 0,
             'total_reviews': 0, 'avg_rating': 0, 'available_cakes': 0
         }
@@ -294,63 +930,21 @@ def admin_dashboard():
         if stats.get('avg_rating') is None:
             stats['avg_rating'] = 0
         
-        # Get top designs using stored procedure
-        top_query = "EXEC sp_GetTopDesigns @top_count = 5"
-        top_designs = execute_query(top_query)
-        
-        # Chart data using advanced queries with subqueries
-        # Complexity distribution
-        complexity_query = """
-            SELECT complexity_level, COUNT(*) as count
-            FROM CakeDesigns
-            GROUP BY complexity_level
-            ORDER BY 
-                CASE complexity_level 
-                    WHEN 'Simple' THEN 1 
-                    WHEN 'Moderate' THEN 2 
-                    WHEN 'Complex' THEN 3 
-                    WHEN 'Expert' THEN 4 
-                END
-        """
-        complexity_data = execute_query(complexity_query)
-        
-        # Rating distribution
-        rating_query = """
-            SELECT rating, COUNT(*) as count
-            FROM Reviews
-            GROUP BY rating
-            ORDER BY rating
-        """
-        rating_data = execute_query(rating_query)
-        
-        # City distribution (using subquery)
-        city_query = """
-            SELECT city, COUNT(*) as count
-            FROM Customers
-            WHERE city IN (
-                SELECT TOP 6 city 
-                FROM Customers 
-                GROUP BY city 
-                ORDER BY COUNT(*) DESC
-            )
-            GROUP BY city
-            ORDER BY count DESC
-        """
-        city_data = execute_query(city_query)
+        top_designs = results['top_designs']
+        distributions = results['distributions']
         
         chart_data = {
-            'complexity_levels': [d['complexity_level'] for d in complexity_data] if complexity_data else [],
-            'complexity_counts': [d['count'] for d in complexity_data] if complexity_data else [],
+            'complexity_levels': [d['label'] for d in distributions if d['dimension'] == 'complexity'],
+            'complexity_counts': [d['value'] for d in distributions if d['dimension'] == 'complexity'],
             'rating_distribution': [0, 0, 0, 0, 0],  # Initialize for 1-5 stars
-            'cities': [d['city'] for d in city_data] if city_data else [],
-            'city_counts': [d['count'] for d in city_data] if city_data else []
+            'cities': [d['label'] for d in distributions if d['dimension'] == 'city'],
+            'city_counts': [d['value'] for d in distributions if d['dimension'] == 'city']
         }
         
         # Fill in rating distribution
-        if rating_data:
-            for d in rating_data:
-                if 1 <= d['rating'] <= 5:
-                    chart_data['rating_distribution'][d['rating'] - 1] = d['count']
+        for d in distributions:
+            if d['dimension'] == 'rating' and 1 <= int(d['label']) <= 5:
+                chart_data['rating_distribution'][int(d['label']) - 1] = d['value']
         
         return render_template('admin_dashboard.html', 
                                stats=stats, 
@@ -375,11 +969,29 @@ def admin_dashboard():
 def admin_cakes():
     """Admin cakes management using View"""
     try:
-        cakes = execute_query("SELECT * FROM vw_CakeWithDesignCount ORDER BY cake_id")
+        cakes = get_cakes_with_design_count()
         return render_template('admin_cakes.html', cakes=cakes)
     except Exception as e:
         return render_template('admin_cakes.html', cakes=[], error=str(e))
 
+@app.route('/admin/cakes/lookup')
+@query_timeout(API_QUERY_TIMEOUT)
+def admin_lookup_cakes():
+    """Typeahead: cakes whose name or flavor starts with ?q="""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify([])
+    try:
+        cakes = execute_query("""
+            SELECT TOP (?) cake_id AS id, CONCAT(cake_name, ' (', flavor, ')') AS label
+            FROM Cakes
+            WHERE cake_name LIKE ? OR flavor LIKE ?
+            ORDER BY cake_name, cake_id
+        """, (LOOKUP_LIMIT, like_prefix(q), like_prefix(q)))
+        return jsonify(cakes)
+    except Exception as e:
+        return api_error_response(e)
+
 @app.route('/admin/cakes/add', methods=['POST'])
 def admin_add_cake():
     """Add new cake"""
@@ -397,6 +1009,7 @@ def admin_add_cake():
             1 if request.form.get('availability') == '1' else 0
         )
         execute_insert(query, params)
+        bump_tables('Cakes')
         return redirect(url_for('admin_cakes') + '?success=Cake added successfully!')
     except Exception as e:
         return redirect(url_for('admin_cakes') + f'?error={str(e)}')
@@ -425,6 +1038,7 @@ def admin_edit_cake(cake_id):
             cake_id
         )
         execute_query(query, params, fetch=False)
+        bump_tables('Cakes')
         return redirect(url_for('admin_cakes') + '?success=Cake updated successfully!')
     except Exception as e:
         return redirect(url_for('admin_cakes') + f'?error={str(e)}')
@@ -435,6 +1049,8 @@ def admin_delete_cake(cake_id):
     try:
         # The trigger trg_PreventCakeDeletionWithReviews will prevent deletion if designs have reviews
         execute_query("DELETE FROM Cakes WHERE cake_id = ?", (cake_id,), fetch=False)
+        # Designs (and their reviews) go with the cake (ON DELETE CASCADE)
+        bump_tables('Cakes', 'CakeDesigns', 'Reviews')
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
@@ -445,13 +1061,81 @@ def admin_delete_cake(cake_id):
 
 @app.route('/admin/designs')
 def admin_designs():
-    """Admin designs management"""
+    """Admin designs management - rows are fetched from /admin/designs/page"""
+    return render_template('admin_designs.html')
+
+# sort name -> (SQL expression, direction)
+ADMIN_DESIGN_SORTS = {
+    'id': ('cd.design_id', 'ASC'),
+    'theme': ('cd.theme', 'ASC'),
+    'price-asc': ('p.calculated_price', 'ASC'),
+    'price-desc': ('p.calculated_price', 'DESC'),
+    'rating-desc': ('ISNULL(rs.avg_rating, 0)', 'DESC'),
+}
+
+_ADMIN_DESIGN_COLUMNS = """
+    cd.design_id, cd.cake_id, cd.theme, cd.color_palette, cd.topper_type, cd.complexity_level,
+    cd.image_url, cd.featured, c.cake_name, c.flavor, p.calculated_price,
+    rs.avg_rating, ISNULL(rs.rating_count, 0) AS review_count
+"""
+_ADMIN_DESIGN_FROM = """
+    FROM CakeDesigns cd
+    JOIN Cakes c ON cd.cake_id = c.cake_id
+    CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+    LEFT JOIN DesignRatingStats rs ON rs.design_id = cd.design_id
+"""
+
+@app.route('/admin/designs/page')
+@query_timeout(API_QUERY_TIMEOUT)
+def admin_designs_page():
+    """
+    JSON page of designs for the admin list
+
+    Query: q (theme or cake name prefix), complexity, sort, after (cursor).
+    ID and theme sorts seek on their index; price and rating sorts are
+    computed per design.
+    """
+    sort = request.args.get('sort')
+    if sort not in ADMIN_DESIGN_SORTS:
+        sort = 'id'
+    clauses, params = [], []
+    q = request.args.get('q', '').strip()
+    if q:
+        clauses.append("(cd.theme LIKE ? OR c.cake_name LIKE ?)")
+        params += [like_prefix(q), like_prefix(q)]
+    complexity = request.args.get('complexity')
+    if complexity in ('Simple', 'Moderate', 'Complex', 'Expert'):
+        clauses.append("cd.complexity_level = ?")
+        params.append(complexity)
     try:
-        designs = get_all_designs_with_details()
-        cakes = execute_query("SELECT * FROM Cakes ORDER BY cake_name")
-        return render_template('admin_designs.html', designs=designs or [], cakes=cakes or [])
+        sort_expr, direction = ADMIN_DESIGN_SORTS[sort]
+        designs, next_cursor = seek_page(_ADMIN_DESIGN_COLUMNS, _ADMIN_DESIGN_FROM, sort_expr, direction,
+                                         'cd.design_id', clauses, params,
+                                         after=decode_cursor(request.args.get('after', '')))
+        total = count_capped(_ADMIN_DESIGN_FROM, clauses, params)
+        return listing_response(designs, next_cursor, total)
     except Exception as e:
-        return render_template('admin_designs.html', designs=[], cakes=[], error=str(e))
+        return api_error_response(e)
+
+@app.route('/admin/designs/lookup')
+@query_timeout(API_QUERY_TIMEOUT)
+def admin_lookup_designs():
+    """Typeahead: designs whose theme starts with ?q= (or whose ID is q)"""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify([])
+    try:
+        designs = execute_query("""
+            SELECT TOP (?) cd.design_id AS id,
+                   CONCAT('#', cd.design_id, ' ', cd.theme, ' (', c.cake_name, ')') AS label
+            FROM CakeDesigns cd
+            JOIN Cakes c ON cd.cake_id = c.cake_id
+            WHERE cd.theme LIKE ? OR cd.design_id = ?
+            ORDER BY cd.theme, cd.design_id
+        """, (LOOKUP_LIMIT, like_prefix(q), int(q) if q.isdigit() else -1))
+        return jsonify(designs)
+    except Exception as e:
+        return api_error_response(e)
 
 @app.route('/admin/designs/add', methods=['POST'])
 def admin_add_design():
@@ -481,6 +1165,7 @@ def admin_add_design():
             1 if request.form.get('featured') else 0
         )
         execute_insert(query, params)
+        bump_tables('CakeDesigns')
         return redirect(url_for('admin_designs') + '?success=Design added successfully!')
     except Exception as e:
         return redirect(url_for('admin_designs') + f'?error={str(e)}')
@@ -524,6 +1209,7 @@ def admin_edit_design(design_id):
             WHERE design_id = ?
         """
         execute_query(query, tuple(params), fetch=False)
+        bump_tables('CakeDesigns')
         return redirect(url_for('admin_designs') + '?success=Design updated successfully!')
     except Exception as e:
         return redirect(url_for('admin_designs') + f'?error={str(e)}')
@@ -532,14 +1218,16 @@ def admin_edit_design(design_id):
 def admin_delete_design(design_id):
     """Delete design"""
     try:
-        # Check if design has reviews
-        check_query = "SELECT COUNT(*) as count FROM Reviews WHERE design_id = ?"
-        result = execute_query(check_query, (design_id,))
-        
-        if result and result[0]['count'] > 0:
-            return jsonify({'success': False, 'message': 'Cannot delete: design has reviews'}), 400
-        
-        execute_query("DELETE FROM CakeDesigns WHERE design_id = ?", (design_id,), fetch=False)
+        with transaction():
+            # Check if design has reviews
+            check_query = "SELECT COUNT(*) as count FROM Reviews WHERE design_id = ?"
+            result = execute_query(check_query, (design_id,))
+            
+            if result and result[0]['count'] > 0:
+                return jsonify({'success': False, 'message': 'Cannot delete: design has reviews'}), 400
+            
+            execute_query("DELETE FROM CakeDesigns WHERE design_id = ?", (design_id,), fetch=False)
+        bump_tables('CakeDesigns')
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -550,12 +1238,89 @@ def admin_delete_design(design_id):
 
 @app.route('/admin/customers')
 def admin_customers():
-    """Admin customers management using View"""
+    """Admin customers management - rows are fetched from /admin/customers/page"""
+    return render_template('admin_customers.html')
+
+# sort name -> (SQL expression, direction); customer IDs grow with signups
+ADMIN_CUSTOMER_SORTS = {
+    'id': ('cu.customer_id', 'ASC'),
+    'newest': ('cu.customer_id', 'DESC'),
+    'name': ('cu.full_name', 'ASC'),
+}
+
+# The columns of vw_CustomerActivity, but review stats are computed only for
+# the customers on the page (OUTER APPLY) instead of grouping every review
+_ADMIN_CUSTOMER_COLUMNS = """
+    cu.customer_id, cu.full_name, cu.email, cu.city, cu.created_at,
+    st.total_reviews, st.avg_rating_given, st.last_review_date
+"""
+_ADMIN_CUSTOMER_FROM = """
+    FROM Customers cu
+    OUTER APPLY (
+        SELECT COUNT(*) AS total_reviews,
+               AVG(CAST(r.rating AS DECIMAL(3,2))) AS avg_rating_given,
+               MAX(r.review_date) AS last_review_date
+        FROM Reviews r
+        WHERE r.customer_id = cu.customer_id
+    ) st
+"""
+
+# min_reviews filter value -> condition on the customer's reviews
+_CUSTOMER_REVIEW_FILTERS = {
+    '0': "NOT EXISTS (SELECT 1 FROM Reviews r WHERE r.customer_id = cu.customer_id)",
+    '1': "EXISTS (SELECT 1 FROM Reviews r WHERE r.customer_id = cu.customer_id)",
+    '5': "(SELECT COUNT(*) FROM (SELECT TOP 5 1 AS hit FROM Reviews r "
+         "WHERE r.customer_id = cu.customer_id) first_five) = 5",
+}
+
+@app.route('/admin/customers/page')
+@query_timeout(API_QUERY_TIMEOUT)
+def admin_customers_page():
+    """
+    JSON page of customers for the admin list
+
+    Query: q (name or email prefix), min_reviews (0 = none, 1, 5), sort,
+    after (cursor).
+    """
+    sort = request.args.get('sort')
+    if sort not in ADMIN_CUSTOMER_SORTS:
+        sort = 'id'
+    clauses, params = [], []
+    q = request.args.get('q', '').strip()
+    if q:
+        clauses.append("(cu.full_name LIKE ? OR cu.email LIKE ?)")
+        params += [like_prefix(q), like_prefix(q)]
+    review_filter = _CUSTOMER_REVIEW_FILTERS.get(request.args.get('min_reviews', ''))
+    if review_filter:
+        clauses.append(review_filter)
+    try:
+        sort_expr, direction = ADMIN_CUSTOMER_SORTS[sort]
+        customers, next_cursor = seek_page(_ADMIN_CUSTOMER_COLUMNS, _ADMIN_CUSTOMER_FROM, sort_expr, direction,
+                                           'cu.customer_id', clauses, params,
+                                           after=decode_cursor(request.args.get('after', '')))
+        # Review stats don't decide which customers match, so count without them
+        total = count_capped("FROM Customers cu", clauses, params)
+        return listing_response(customers, next_cursor, total)
+    except Exception as e:
+        return api_error_response(e)
+
+@app.route('/admin/customers/lookup')
+@query_timeout(API_QUERY_TIMEOUT)
+def admin_lookup_customers():
+    """Typeahead: customers whose name or email starts with ?q="""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify([])
     try:
-        customers = execute_query("SELECT * FROM vw_CustomerActivity ORDER BY customer_id")
-        return render_template('admin_customers.html', customers=customers or [])
+        customers = execute_query("""
+            SELECT TOP (?) customer_id AS id, CONCAT(full_name, ' (', email, ')') AS label
+            FROM Customers
+            WHERE full_name LIKE ? OR email LIKE ?
+            ORDER BY full_name, customer_id
+        """, (LOOKUP_LIMIT, like_prefix(q), like_prefix(q)))
+        return jsonify(customers)
     except Exception as e:
-        return render_template('admin_customers.html', customers=[], error=str(e))
+        return api_error_response(e)
 
 @app.route('/admin/customers/add', methods=['POST'])
 def admin_add_customer():
@@ -571,6 +1336,7 @@ def admin_add_customer():
             request.form.get('city')
         )
         execute_insert(query, params)
+        bump_tables('Customers')
         return redirect(url_for('admin_customers') + '?success=Customer added successfully!')
     except Exception as e:
         return redirect(url_for('admin_customers') + f'?error={str(e)}')
@@ -593,6 +1359,7 @@ def admin_edit_customer(customer_id):
             customer_id
         )
         execute_query(query, tuple(params), fetch=False)
+        bump_tables('Customers')
         return redirect(url_for('admin_customers') + '?success=Customer updated successfully!')
     except Exception as e:
         return redirect(url_for('admin_customers') + f'?error={str(e)}')
@@ -601,14 +1368,16 @@ def admin_edit_customer(customer_id):
 def admin_delete_customer(customer_id):
     """Delete customer"""
     try:
-        # Check if customer has reviews using function
-        check_query = "SELECT dbo.fn_GetCustomerReviewCount(?) as count"
-        result = execute_query(check_query, (customer_id,))
-        
-        if result and result[0]['count'] > 0:
-            return jsonify({'success': False, 'message': 'Cannot delete: customer has reviews'}), 400
-        
-        execute_query("DELETE FROM Customers WHERE customer_id = ?", (customer_id,), fetch=False)
+        with transaction():
+            # Check if customer has reviews using function
+            check_query = "SELECT dbo.fn_GetCustomerReviewCount(?) as count"
+            result = execute_query(check_query, (customer_id,))
+            
+            if result and result[0]['count'] > 0:
+                return jsonify({'success': False, 'message': 'Cannot delete: customer has reviews'}), 400
+            
+            execute_query("DELETE FROM Customers WHERE customer_id = ?", (customer_id,), fetch=False)
+        bump_tables('Customers')
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -618,46 +1387,45 @@ def admin_delete_customer(customer_id):
 # ==============================================================================
 
 @app.route('/admin/reviews')
+@query_timeout(PAGE_QUERY_TIMEOUT)
 def admin_reviews():
-    """Admin reviews management"""
+    """Admin reviews management - filtered, sorted and paged in SQL"""
+    filters = parse_review_filters(request.args)
+    sort = request.args.get('sort')
+    if sort not in REVIEW_SORTS:
+        sort = DEFAULT_REVIEW_SORT
+    # Query string that reproduces the current filters and sort in pager links
+    list_args = {key: str(value) for key, value in filters.items()}
+    list_args['sort'] = sort
     try:
-        # First ensure the is_hidden column exists
-        try:
-            execute_query("""
-                IF NOT EXISTS (SELECT * FROM sys.columns WHERE object_id = OBJECT_ID('Reviews') AND name = 'is_hidden')
-                BEGIN
-                    ALTER TABLE Reviews ADD is_hidden BIT DEFAULT 0
-                END
-            """, fetch=False)
-        except:
-            pass  # Column might already exist
+        after = parse_review_cursor(request.args.get('after'), sort)
+        before = None if after else parse_review_cursor(request.args.get('before'), sort)
+        reviews, more = get_reviews_seek(filters, sort, after=after, before=before)
+        if before:
+            has_prev, has_next = more, True
+        else:
+            has_prev, has_next = after is not None, more
+        
+        design_label = None
+        if 'design_id' in filters:
+            design = execute_query("SELECT theme FROM CakeDesigns WHERE design_id = ?", (filters['design_id'],))
+            design_label = f"#{filters['design_id']} {design[0]['theme']}" if design else None
         
-        # Complex query with subquery
-        query = """
-            SELECT 
-                r.*,
-                ISNULL(r.is_hidden, 0) AS is_hidden,
-                c.full_name AS customer_name,
-                cd.theme,
-                ck.cake_name,
-                (SELECT AVG(CAST(r2.rating AS DECIMAL(3,2))) 
-                 FROM Reviews r2 
-                 WHERE r2.design_id = r.design_id) AS design_avg_rating
-            FROM Reviews r
-            JOIN Customers c ON r.customer_id = c.customer_id
-            JOIN CakeDesigns cd ON r.design_id = cd.design_id
-            JOIN Cakes ck ON cd.cake_id = ck.cake_id
-            ORDER BY r.review_date DESC
-        """
-        reviews = execute_query(query)
-        designs = execute_query("SELECT design_id, theme FROM CakeDesigns")
-        customers = execute_query("SELECT customer_id, full_name FROM Customers")
         return render_template('admin_reviews.html', 
-                               reviews=reviews or [], 
-                               designs=designs or [], 
-                               customers=customers or [])
+                               reviews=reviews,
+                               review_count=count_reviews(filters),
+                               count_cap=REVIEW_COUNT_CAP,
+                               filters=filters,
+                               sort=sort,
+                               sorts=REVIEW_SORTS,
+                               list_args=list_args,
+                               design_label=design_label,
+                               next_cursor=review_cursor(reviews[-1], sort) if reviews and has_next else None,
+                               prev_cursor=review_cursor(reviews[0], sort) if reviews and has_prev else None)
     except Exception as e:
-        return render_template('admin_reviews.html', reviews=[], designs=[], customers=[], error=str(e))
+        return render_template('admin_reviews.html', reviews=[], review_count=0, count_cap=REVIEW_COUNT_CAP,
+                               filters=filters, sort=sort, sorts=REVIEW_SORTS, list_args=list_args,
+                               design_label=None, next_cursor=None, prev_cursor=None, error=str(e))
 
 @app.route('/admin/reviews/add', methods=['POST'])
 def admin_add_review():
@@ -674,6 +1442,7 @@ def admin_add_review():
             request.form.get('review_text')
         )
         execute_insert(query, params)
+        bump_tables('Reviews')
         return redirect(url_for('admin_reviews') + '?success=Review added successfully!')
     except Exception as e:
         return redirect(url_for('admin_reviews') + f'?error={str(e)}')
@@ -698,6 +1467,7 @@ def admin_edit_review(review_id):
             review_id
         )
         execute_query(query, tuple(params), fetch=False)
+        bump_tables('Reviews')
         return redirect(url_for('admin_reviews') + '?success=Review updated successfully!')
     except Exception as e:
         return redirect(url_for('admin_reviews') + f'?error={str(e)}')
@@ -707,6 +1477,7 @@ def admin_delete_review(review_id):
     """Delete review"""
     try:
         execute_query("DELETE FROM Reviews WHERE review_id = ?", (review_id,), fetch=False)
+        bump_tables('Reviews')
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -718,36 +1489,242 @@ def admin_toggle_hide_review(review_id):
         data = request.get_json()
         is_hidden = 1 if data.get('is_hidden', False) else 0
         
-        # First ensure the is_hidden column exists
-        try:
-            execute_query("""
-                IF NOT EXISTS (SELECT * FROM sys.columns WHERE object_id = OBJECT_ID('Reviews') AND name = 'is_hidden')
-                BEGIN
-                    ALTER TABLE Reviews ADD is_hidden BIT DEFAULT 0
-                END
-            """, fetch=False)
-        except:
-            pass  # Column might already exist
-        
         execute_query("UPDATE Reviews SET is_hidden = ? WHERE review_id = ?", (is_hidden, review_id), fetch=False)
+        bump_tables('Reviews')
         return jsonify({'success': True, 'is_hidden': bool(is_hidden)})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# Bulk moderation: set-based statements, BULK_CHUNK_SIZE reviews per transaction
+# (below SQL Server's 5000-lock escalation point, so the table stays usable)
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_MODERATION_CHUNK', 1000))
+BULK_MAX_IDS = 100000
+# A running job whose heartbeat (updated_at, advanced per chunk) is older
+# than this lost its worker; well above a chunk's DB_QUERY_TIMEOUT
+BULK_JOB_STALE_SECONDS = int(os.environ.get('BULK_MODERATION_STALE_SECONDS', 300))
+STALE_JOB_ERROR = 'Worker stopped before the job finished; submit it again to finish the rest'
+
+# action -> (statement acting on at most TOP (?) rows of "Reviews r",
+#            condition that skips reviews already in the target state)
+BULK_MODERATION_ACTIONS = {
+    'hide': ("UPDATE TOP (?) r SET r.is_hidden = 1 FROM Reviews r", "r.is_hidden = 0"),
+    'unhide': ("UPDATE TOP (?) r SET r.is_hidden = 0 FROM Reviews r", "r.is_hidden = 1"),
+    'delete': ("DELETE TOP (?) r FROM Reviews r", None),
+}
+
+_REVIEW_IDS_SQL = "r.review_id IN (SELECT CAST(value AS INT) FROM OPENJSON(?))"
+
+def _bulk_moderation_where(action, filters=None, review_ids=None):
+    """WHERE clause and parameters selecting the reviews an action still applies to"""
+    if review_ids is not None:
+        clauses, params = [_REVIEW_IDS_SQL], [json.dumps(review_ids)]
+    else:
+        clauses, params = _review_filter_sql(filters)
+    condition = BULK_MODERATION_ACTIONS[action][1]
+    if condition:
+        clauses.append(condition)
+    return f"WHERE {' AND '.join(clauses)}", params
+
+def run_review_moderation_job(job_id, action, filters=None, review_ids=None):
+    """
+    Apply a bulk moderation action chunk by chunk (runs in a background thread)
+    
+    Each chunk is one statement in its own transaction, together with the
+    job's progress update, so ReviewAuditLog (written by trigger), the
+    rating stats and "processed" always agree with what was committed. If
+    a chunk fails, earlier chunks stay applied and the job is marked failed;
+    submitting it again finishes the rest. Each run first records jobs
+    orphaned by a restarted worker as failed.
+    """
+    try:
+        fail_stale_moderation_jobs()
+    except Exception as e:
+        print(f"Could not sweep stale moderation jobs: {e}")
+    statement = BULK_MODERATION_ACTIONS[action][0]
+    if review_ids is not None:
+        batches = [review_ids[i:i + BULK_CHUNK_SIZE] for i in range(0, len(review_ids), BULK_CHUNK_SIZE)]
+    else:
+        batches = None
+    try:
+        while True:
+            if batches is not None:
+                if not batches:
+                    break
+                where, params = _bulk_moderation_where(action, review_ids=batches.pop(0))
+            else:
+                where, params = _bulk_moderation_where(action, filters=filters)
+            with transaction():
+                affected = execute_query(f"{statement} {where}", (BULK_CHUNK_SIZE, *params), fetch=False)
+                execute_query("""
+                    UPDATE ReviewModerationJobs
+                    SET processed = processed + ?, chunks = chunks + 1, updated_at = SYSUTCDATETIME()
+                    WHERE job_id = ?
+                """, (max(affected, 0), job_id), fetch=False)
+            if affected:
+                bump_tables('Reviews')
+            # A filter is done once a chunk comes back short
+            if batches is None and affected < BULK_CHUNK_SIZE:
+                break
+        execute_query("""
+            UPDATE ReviewModerationJobs
+            SET status = 'done', finished_at = SYSUTCDATETIME(), updated_at = SYSUTCDATETIME()
+            WHERE job_id = ?
+        """, (job_id,), fetch=False)
+    except Exception as e:
+        print(f"Review moderation job {job_id} failed: {e}")
+        try:
+            execute_query("""
+                UPDATE ReviewModerationJobs
+                SET status = 'failed', error = ?, finished_at = SYSUTCDATETIME(), updated_at = SYSUTCDATETIME()
+                WHERE job_id = ?
+            """, (str(e)[:4000], job_id), fetch=False)
+        except Exception as log_error:
+            print(f"Could not record failure of job {job_id}: {log_error}")
+    finally:
+        nudge_dashboard_snapshot()
+
+def fail_stale_moderation_jobs():
+    """
+    Mark running jobs whose heartbeat stopped as failed
+    
+    Jobs run on daemon threads inside a web worker, so a restarted worker
+    leaves its job 'running' forever. Chunks already committed stay
+    applied; submitting the job again finishes the rest. Run by each new
+    job; get_review_moderation_job() reports such jobs as failed meanwhile.
+    
+    Returns:
+        Number of jobs marked failed
+    """
+    return execute_query("""
+        UPDATE ReviewModerationJobs
+        SET status = 'failed', error = ?, finished_at = SYSUTCDATETIME()
+        WHERE status = 'running' AND updated_at < DATEADD(SECOND, -?, SYSUTCDATETIME())
+    """, (STALE_JOB_ERROR, BULK_JOB_STALE_SECONDS), fetch=False)
+
+def get_review_moderation_job(job_id):
+    """A job's row, with a running job whose heartbeat stopped shown as failed (read-only)"""
+    result = execute_query("""
+        SELECT j.*,
+            CASE WHEN j.status = 'running' AND j.updated_at < DATEADD(SECOND, -?, SYSUTCDATETIME())
+                 THEN 1 ELSE 0 END AS stale
+        FROM ReviewModerationJobs j
+        WHERE j.job_id = ?
+    """, (BULK_JOB_STALE_SECONDS, job_id))
+    if not result:
+        return None
+    job = result[0]
+    job['stale'] = bool(job['stale'])
+    if job['stale']:
+        job.update(status='failed', error=STALE_JOB_ERROR)
+    return job
+
+@app.route('/admin/reviews/bulk', methods=['POST'])
+def admin_bulk_moderate_reviews():
+    """
+    Hide, unhide or delete many reviews at once
+    
+    JSON body: {"action": "hide" | "unhide" | "delete"} plus either
+    "review_ids": [1, 2, ...] or "filter": {rating, hidden, design_id,
+    date_from, date_to} (the review list's filters). Answers 202 with a
+    job ID at once; poll /admin/reviews/bulk/<job_id> for progress.
+    """
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in BULK_MODERATION_ACTIONS:
+        return jsonify({'success': False, 'message': 'action must be hide, unhide or delete'}), 400
+    
+    review_ids, filters = None, None
+    if 'review_ids' in data:
+        try:
+            review_ids = sorted({int(review_id) for review_id in data['review_ids']})
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'review_ids must be a list of integers'}), 400
+        if not review_ids or len(review_ids) > BULK_MAX_IDS:
+            return jsonify({'success': False, 'message': f'Send between 1 and {BULK_MAX_IDS} review IDs'}), 400
+        criteria = {'review_ids': review_ids}
+    else:
+        raw = data.get('filter') or {}
+        filters = parse_review_filters(MultiDict({key: str(value) for key, value in raw.items()}))
+        # An empty filter would match every review
+        if not filters:
+            return jsonify({'success': False, 'message': 'Send review_ids or at least one filter'}), 400
+        criteria = {'filter': {key: str(value) for key, value in filters.items()}}
+    
+    try:
+        where, params = _bulk_moderation_where(action, filters=filters, review_ids=review_ids)
+        total = execute_query(f"SELECT COUNT(*) AS cnt FROM Reviews r {where}", tuple(params))[0]['cnt']
+        job_id = execute_insert("""
+            INSERT INTO ReviewModerationJobs (action, criteria, total)
+            VALUES (?, ?, ?)
+        """, (action, json.dumps(criteria), total))
+        if job_id is None:
+            raise RuntimeError("ReviewModerationJobs insert returned no job_id")
+    except Exception as e:
+        return api_error_response(e)
+    
+    threading.Thread(target=run_review_moderation_job, args=(job_id, action, filters, review_ids),
+                     name=f'review-moderation-{job_id}', daemon=True).start()
+    return jsonify({'success': True, 'job_id': job_id, 'total': total,
+                    'status_url': url_for('admin_review_moderation_job', job_id=job_id)}), 202
+
+@app.route('/admin/reviews/bulk/<int:job_id>')
+def admin_review_moderation_job(job_id):
+    """Progress of a bulk moderation job"""
+    try:
+        job = get_review_moderation_job(job_id)
+    except Exception as e:
+        return api_error_response(e)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    job['criteria'] = json.loads(job['criteria'])
+    return jsonify(job)
+
+# ==============================================================================
+# ADMIN DIAGNOSTICS
+# ==============================================================================
+
+def get_schema_stats():
+    """Applied schema version (cached) against the latest shipped migration"""
+    expected = latest_migration_version()
+    try:
+        version = get_schema_version()
+    except Exception as e:
+        return {'version': None, 'expected': expected, 'error': str(e)}
+    return {'version': version, 'expected': expected, 'current': version >= expected}
+
+@app.route('/admin/db/stats')
+def admin_db_stats():
+    """Database pool, circuit breaker and per-query statistics for this worker"""
+    top = request.args.get('top', 25, type=int)
+    sort_by = request.args.get('sort', 'total_ms')
+    return jsonify({
+        'pid': os.getpid(),
+        'pool': get_pool_stats(),
+        'breaker': get_breaker_stats(),
+        'replicas': get_replica_stats(),
+        'statement_cache': get_statement_cache_stats(),
+        'result_cache': get_result_cache_stats(),
+        'schema': get_schema_stats(),
+        'queries': get_query_stats(top=top, sort_by=sort_by)
+    })
+
 # ==============================================================================
 # API ENDPOINTS - For external access
 # ==============================================================================
 
 @app.route('/api/cakes')
+@conditional_api(CAKE_DESIGN_TABLES)
+@query_timeout(API_QUERY_TIMEOUT)
 def api_cakes():
     """API: Get all cakes"""
     try:
-        cakes = execute_query("SELECT * FROM vw_CakeWithDesignCount")
+        cakes = get_cakes_with_design_count()
         return jsonify(cakes or [])
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/cakes/<int:cake_id>')
+@query_timeout(API_QUERY_TIMEOUT)
 def api_cake(cake_id):
     """API: Get cake with designs using stored procedure"""
     try:
@@ -762,56 +1739,93 @@ def api_cake(cake_id):
         result['designs'] = designs or []
         return jsonify(result)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/designs')
+@conditional_api(DESIGN_TABLES)
+@query_timeout(API_QUERY_TIMEOUT)
 def api_designs():
-    """API: Get all designs with details"""
+    """
+    API: Designs with details, a page at a time (featured first)
+
+    Query: limit (max API_MAX_PAGE_SIZE), after (next_cursor of the previous
+    page), fields (comma-separated, from API_DESIGN_FIELDS), total=1 for an
+    estimated total.
+    """
     try:
-        designs = get_all_designs_with_details()
-        return jsonify(designs or [])
+        fields = parse_api_fields(request.args, API_DESIGN_FIELDS)
+        limit = parse_api_limit(request.args)
+        after = decode_cursor(request.args.get('after', ''))
+        if after is not None and after[0] not in (0, 1):
+            after = None
+        designs, next_cursor = get_api_designs_page(fields, after, limit)
+        return api_page_response(designs, next_cursor, limit, estimate_table='CakeDesigns')
+    except ApiRequestError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/designs/<int:design_id>')
+@query_timeout(API_QUERY_TIMEOUT)
 def api_design(design_id):
-    """API: Get design details"""
+    """API: Get design details, including its visible reviews"""
     try:
         design = get_design_with_details(design_id)
         if not design:
             return jsonify({'error': 'Design not found'}), 404
         return jsonify(design)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/customers')
+@conditional_api(('Customers', 'Reviews'), private=True)
+@query_timeout(API_QUERY_TIMEOUT)
 def api_customers():
     """API: Get all customers with stats"""
     try:
-        customers = execute_query("SELECT * FROM vw_CustomerActivity")
-        return jsonify(customers or [])
+        return stream_json_rows(iter_query("SELECT * FROM vw_CustomerActivity"))
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/reviews')
+@conditional_api(('Reviews',))
+@query_timeout(API_QUERY_TIMEOUT)
 def api_reviews():
-    """API: Get all reviews"""
+    """
+    API: Reviews, a page at a time (newest first)
+
+    Query: limit (max API_MAX_PAGE_SIZE), after (next_cursor of the previous
+    page), fields (comma-separated, from API_REVIEW_FIELDS), total=1 for an
+    estimated total.
+    """
     try:
-        reviews = execute_query("SELECT * FROM Reviews ORDER BY review_date DESC")
-        return jsonify(reviews or [])
+        fields = parse_api_fields(request.args, API_REVIEW_FIELDS)
+        limit = parse_api_limit(request.args)
+        after = decode_cursor(request.args.get('after', ''))
+        if after is not None:
+            try:
+                datetime.fromisoformat(str(after[0]))
+            except ValueError:
+                after = None
+        reviews, next_cursor = get_api_reviews_page(fields, after, limit)
+        return api_page_response(reviews, next_cursor, limit, estimate_table='Reviews')
+    except ApiRequestError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/customer/<int:customer_id>/reviews')
+@query_timeout(API_QUERY_TIMEOUT)
 def api_customer_reviews(customer_id):
     """API: Get customer reviews using stored procedure"""
     try:
         reviews = execute_query("EXEC sp_GetCustomerReviews @customer_id = ?", (customer_id,))
         return jsonify(reviews or [])
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/search/cakes')
+@query_timeout(API_QUERY_TIMEOUT)
 def api_search_cakes():
     """API: Search cakes using stored procedure"""
     try:
@@ -839,26 +1853,29 @@ def api_search_cakes():
         results = execute_query(query, params)
         return jsonify(results or [])
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/top-designs')
+@conditional_api(DESIGN_TABLES)
+@query_timeout(API_QUERY_TIMEOUT)
 def api_top_designs():
     """API: Get top rated designs using stored procedure"""
     try:
         count = request.args.get('count', 10, type=int)
-        designs = execute_query("EXEC sp_GetTopDesigns @top_count = ?", (count,))
+        designs = get_top_designs(count)
         return jsonify(designs or [])
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 @app.route('/api/dashboard/stats')
+@query_timeout(API_QUERY_TIMEOUT)
 def api_dashboard_stats():
-    """API: Get dashboard statistics using stored procedure"""
+    """API: Get dashboard statistics snapshot (refreshed_at / age_seconds give its staleness)"""
     try:
-        stats = execute_query("EXEC sp_GetDashboardStats")
-        return jsonify(stats[0] if stats else {})
+        stats = get_dashboard_stats()
+        return jsonify(stats or {})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_error_response(e)
 
 # Legacy endpoints for compatibility
 @app.route('/api/flavors')
@@ -893,6 +1910,20 @@ def api_sizes():
 def not_found_error(error):
     return render_template('index.html', designs=[], cakes=[], logged_in_customer=None), 404
 
+@app.errorhandler(DatabaseUnavailableError)
+def db_unavailable_error(error):
+    if request.path.startswith('/api/'):
+        return db_unavailable_response()
+    return render_template('index.html', designs=[], cakes=[], logged_in_customer=None,
+                           error='Database temporarily unavailable'), 503
+
+@app.errorhandler(QueryTimeoutError)
+def query_timeout_error(error):
+    if request.path.startswith('/api/'):
+        return db_unavailable_response('Query timed out, try again shortly')
+    return render_template('index.html', designs=[], cakes=[], logged_in_customer=None,
+                           error='The page took too long to load, please try again'), 503
+
 @app.errorhandler(500)
 def internal_error(error):
     return render_template('index.html', designs=[], cakes=[], logged_in_customer=None, error='Internal server error'), 500
@@ -4,10 +4,40 @@
 # =====================================================
 
 import pyodbc
+import hashlib
+import json
+import logging
+import math
 import os
+import pickle
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import date, datetime, time as dt_time
 from decimal import Decimal
+from functools import lru_cache, partial
+from uuid import UUID, uuid4
+
+try:
+    from flask import g, has_app_context, has_request_context, request, session
+except ImportError:  # scripts may run without Flask installed
+    g = None
+    has_app_context = None
+    has_request_context = None
+    request = None
+    session = None
+
+try:
+    import redis
+except ImportError:  # only needed for DB_RESULT_CACHE_BACKEND=redis
+    redis = None
 
 # Database configuration
 DB_CONFIG = {
@@ -18,72 +48,1374 @@ DB_CONFIG = {
     'driver': os.environ.get('DB_DRIVER', '{ODBC Driver 18 for SQL Server}')
 }
 
-# Track database availability
-_db_available = None
+# Connection pool configuration (sized per worker process)
+POOL_CONFIG = {
+    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    'idle_timeout': float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+    'ping_after': float(os.environ.get('DB_POOL_PING_AFTER', 10))
+}
+
+# Circuit breaker thresholds and background health probe
+BREAKER_CONFIG = {
+    'failure_threshold': int(os.environ.get('DB_BREAKER_FAILURES', 3)),
+    'reset_timeout': float(os.environ.get('DB_BREAKER_RESET_TIMEOUT', 15))
+}
+HEALTH_PROBE_INTERVAL = float(os.environ.get('DB_HEALTH_PROBE_INTERVAL', 10))
+
+# Read replicas, separated by ';' since a server may carry ",port"
+# e.g. DB_READ_REPLICAS="replica1,1433;replica2,1433"
+READ_REPLICAS = [server.strip() for server in os.environ.get('DB_READ_REPLICAS', '').split(';')
+                 if server.strip()]
+
+# After a write, the same session reads from the primary for this long (s)
+READ_YOUR_WRITES_SECONDS = float(os.environ.get('DB_READ_YOUR_WRITES_SECONDS', 5))
+
+# Stored procedures that only read and may run on a replica
+READ_ONLY_PROCEDURES = {
+    'sp_GetDashboardStats',
+    'sp_SearchCakes',
+    'sp_GetTopDesigns',
+    'sp_GetCustomerReviews',
+    'sp_GetCakeDesigns',
+    'sp_GetDesignDetail'
+}
+
+# Statement timeout (s) for every query unless a call or route overrides it;
+# 0 disables. The driver cancels the statement on the server when it expires.
+QUERY_TIMEOUT = int(os.environ.get('DB_QUERY_TIMEOUT', 30))
+
+# Login timeout (s) when opening a new connection
+CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+
+# Worker threads per process for fan_out(); each holds a pooled connection
+# while it runs, so keep this below DB_POOL_MAX_SIZE
+FANOUT_WORKERS = int(os.environ.get('DB_FANOUT_WORKERS', 6))
+
+# Numbered schema migrations (NNN_name.sql), applied by scripts/migrate.py
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Prepared statements (one cursor each) kept per pooled connection
+STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 64))
+
+# Result cache for cached_query(): memory budget (MB) per process and the
+# default lifetime (s) of an entry; DB_RESULT_CACHE_MB=0 turns it off
+RESULT_CACHE_MB = float(os.environ.get('DB_RESULT_CACHE_MB', 32))
+RESULT_CACHE_TTL = float(os.environ.get('DB_RESULT_CACHE_TTL', 300))
+
+# Cap (s) on how long an entry stays fresh in the per-process 'memory'
+# backend. A write bumps versions only in the worker that made it, so this
+# bounds how long the other workers serve the old rows; raise it only when
+# the app runs as a single process
+RESULT_CACHE_LOCAL_TTL = float(os.environ.get('DB_RESULT_CACHE_LOCAL_TTL', 5))
 
-def get_connection_string():
-    """Build connection string for SQL Server"""
+# Seconds past its TTL an entry is still served while the database is
+# unavailable, and the early-refresh bias of cached_query(stale_ttl=...)
+# (higher refreshes hot entries sooner; 0 turns early refresh off)
+RESULT_CACHE_STALE_IF_ERROR = float(os.environ.get('DB_RESULT_CACHE_STALE_IF_ERROR', 600))
+RESULT_CACHE_EARLY_BETA = float(os.environ.get('DB_RESULT_CACHE_EARLY_BETA', 1.0))
+
+# Where cached results live: 'memory' (per process), 'sqlite' (a file shared
+# by the workers on one host) or 'redis' (shared by every host)
+RESULT_CACHE_BACKEND = os.environ.get('DB_RESULT_CACHE_BACKEND', 'memory')
+RESULT_CACHE_PATH = os.environ.get('DB_RESULT_CACHE_PATH',
+                                   os.path.join(tempfile.gettempdir(), 'crumbear_result_cache.sqlite3'))
+RESULT_CACHE_REDIS_URL = os.environ.get('DB_RESULT_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# Queries slower than this (ms) go to the structured slow-query log
+SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', 500))
+
+# Slow queries are logged as one JSON object per line; set DB_SLOW_QUERY_LOG
+# to a file path to write them there instead of stderr
+_slow_query_log = logging.getLogger('crumbear.slow_query')
+if os.environ.get('DB_SLOW_QUERY_LOG'):
+    _slow_query_handler = logging.FileHandler(os.environ['DB_SLOW_QUERY_LOG'])
+    _slow_query_handler.setFormatter(logging.Formatter('%(message)s'))
+    _slow_query_log.addHandler(_slow_query_handler)
+    _slow_query_log.setLevel(logging.INFO)
+    _slow_query_log.propagate = False
+
+# Process-wide connection pool (created lazily, recreated after fork)
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# Connection/transaction scope used outside a Flask app context
+_local = threading.local()
+
+def get_connection_string(server=None, read_only=False):
+    """Build connection string for SQL Server (the primary unless server is given)"""
     return (
         f"DRIVER={DB_CONFIG['driver']};"
-        f"SERVER={DB_CONFIG['server']};"
+        f"SERVER={server or DB_CONFIG['server']};"
         f"DATABASE={DB_CONFIG['database']};"
         f"UID={DB_CONFIG['username']};"
         f"PWD={DB_CONFIG['password']};"
         f"TrustServerCertificate=yes;"
         f"Encrypt=yes;"
-        f"Connection Timeout=5;"
+        f"Connection Timeout={CONNECT_TIMEOUT};"
+        + ("ApplicationIntent=ReadOnly;" if read_only else "")
     )
 
-def check_db_connection():
-    """Check if database connection is available"""
-    global _db_available
+def _connect(connection_string):
+    """Open a connection whose cursors default to QUERY_TIMEOUT"""
+    conn = pyodbc.connect(connection_string)
+    conn.timeout = QUERY_TIMEOUT
+    return conn
+
+def _probe_database(connection_string=None):
+    """Open a throwaway connection and run SELECT 1; raises on failure"""
+    conn = pyodbc.connect(connection_string or get_connection_string())
     try:
-        conn = pyodbc.connect(get_connection_string())
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
         conn.close()
-        _db_available = True
-        print("✅ Database connection successful!")
+
+def check_db_connection(verbose=True):
+    """Probe the database now and feed the result into the circuit breaker"""
+    try:
+        _probe_database()
+        _breaker.record_success()
+        if verbose:
+            print("✅ Database connection successful!")
         return True
     except Exception as e:
-        _db_available = False
-        print(f"⚠️ Database not available: {e}")
+        _breaker.record_failure()
+        if verbose:
+            print(f"⚠️ Database not available: {e}")
         return False
 
 def is_db_available():
-    """Return cached database availability status"""
-    global _db_available
-    if _db_available is None:
-        check_db_connection()
-    return _db_available
+    """Return False while the circuit breaker is open (no blocking probe)"""
+    return _breaker.state != CircuitBreaker.OPEN
+
+def _serialize_value(value):
+    """Convert a single value to a JSON-serializable type"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
 
 def serialize_row(row_dict):
     """Convert row values to JSON-serializable types"""
-    result = {}
-    for key, value in row_dict.items():
-        if isinstance(value, datetime):
-            result[key] = value.isoformat()
-        elif isinstance(value, Decimal):
-            result[key] = float(value)
+    return {key: _serialize_value(value) for key, value in row_dict.items()}
+
+# Row shapes accepted by the row_mode argument of the query helpers
+ROW_MODES = ('dict', 'tuple', 'namedtuple')
+
+# cursor.description type codes whose values are already JSON-friendly
+_PASSTHROUGH_TYPES = frozenset([str, int, float, bool, bytes, bytearray, date, dt_time, UUID])
+
+# cursor.description type codes that always need the same conversion
+_TYPE_CONVERTERS = {
+    datetime: datetime.isoformat,
+    Decimal: float
+}
+
+def _column_converter(type_code):
+    """Pick the converter for a column, or None if its values pass through"""
+    if type_code in _PASSTHROUGH_TYPES:
+        return None
+    # Unknown driver types fall back to the per-value isinstance check
+    return _TYPE_CONVERTERS.get(type_code, _serialize_value)
+
+def make_row_materializer(description, row_mode='dict'):
+    """
+    Build a function that turns a raw pyodbc row into a serialized row
+    
+    Converters are chosen once per result set from the cursor.description
+    type codes and only run on the columns that need them (datetime ->
+    isoformat, Decimal -> float), instead of type-checking every value.
+    
+    Args:
+        description: cursor.description of the executed statement
+        row_mode: 'dict' (default), 'tuple', or 'namedtuple'; the tuple
+            modes skip building a dict per row
+    
+    Returns:
+        A callable taking one pyodbc row
+    """
+    if row_mode not in ROW_MODES:
+        raise ValueError(f"row_mode must be one of {ROW_MODES}, got {row_mode!r}")
+    
+    columns = [column[0] for column in description]
+    converters = []
+    for index, column in enumerate(description):
+        converter = _column_converter(column[1])
+        if converter is not None:
+            converters.append((index, converter))
+    
+    if row_mode == 'dict':
+        build = lambda values: dict(zip(columns, values))
+    elif row_mode == 'tuple':
+        build = tuple
+    else:
+        build = namedtuple('Row', columns, rename=True)._make
+    
+    if not converters:
+        return build
+    
+    def materialize(row):
+        values = list(row)
+        for index, converter in converters:
+            value = values[index]
+            if value is not None:
+                values[index] = converter(value)
+        return build(values)
+    return materialize
+
+def materialize_rows(cursor, rows, row_mode='dict'):
+    """Serialize a batch of rows fetched from cursor"""
+    materialize = make_row_materializer(cursor.description, row_mode)
+    return [materialize(row) for row in rows]
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class _PooledConnection:
+    """A pyodbc connection plus the bookkeeping the pool needs"""
+
+    __slots__ = ('conn', 'created_at', 'last_used', 'statements')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # statement text -> cursor that last prepared it (LRU order)
+        self.statements = OrderedDict()
+        _entries_by_conn[id(conn)] = self
+
+
+# Pooled connection bookkeeping looked up from the raw pyodbc connection
+_entries_by_conn = {}
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of pyodbc connections
+
+    Idle connections are reused most-recently-used first, so the oldest ones
+    sit at the bottom of the stack and are the first to be evicted once they
+    have been idle longer than idle_timeout. warm() opens min_size connections
+    up front (get_pool() runs it in the background) and idle eviction never
+    shrinks the pool below min_size. The pool never opens more than max_size
+    connections; callers wait up to timeout seconds for a free connection
+    before PoolTimeoutError is raised.
+    A connection that has been idle longer than ping_after seconds is checked
+    with a cheap query before being handed out.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=10.0,
+                 idle_timeout=300.0, ping_after=10.0):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+
+        # Counters reported by stats()
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._evicted = 0
+        self._discarded = 0
+
+    def _open(self):
+        entry = _PooledConnection(self._connect())
+        with self._cond:
+            self._created += 1
+        return entry
+
+    def _is_alive(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _close_quietly(self, conn):
+        _entries_by_conn.pop(id(conn), None)
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    def _evict_idle_locked(self, now):
+        """Pop connections idle past idle_timeout; caller closes them outside the lock"""
+        expired = []
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0].last_used > self.idle_timeout):
+            expired.append(self._idle.popleft())
+            self._size -= 1
+            self._evicted += 1
+        return expired
+
+    def warm(self, on_failure=None):
+        """
+        Open connections until min_size are pooled, so early requests skip the login
+
+        A failed connect stops warming without raising; the pool then opens
+        connections on demand as usual.
+
+        Args:
+            on_failure: Called when a connect fails (e.g. a breaker's record_failure)
+
+        Returns:
+            Number of connections opened
+        """
+        opened = 0
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return opened
+                self._size += 1
+            try:
+                entry = self._open()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                print(f"Connection pool warm-up stopped after {opened} connection(s): {e}")
+                if on_failure is not None:
+                    on_failure()
+                return opened
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+            opened += 1
+
+    def acquire(self):
+        """Check out a connection, opening a new one if the pool has room"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        with self._cond:
+            expired = self._evict_idle_locked(start)
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available within {self.timeout}s "
+                        f"(pool max_size={self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            wait = time.monotonic() - start
+            if waited:
+                self._waits += 1
+            self._wait_time += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        for stale in expired:
+            self._close_quietly(stale.conn)
+
+        try:
+            if entry is None:
+                return self._open()
+            if time.monotonic() - entry.last_used > self.ping_after and not self._is_alive(entry.conn):
+                self._close_quietly(entry.conn)
+                with self._cond:
+                    self._discarded += 1
+                return self._open()
+            return entry
+        except Exception:
+            # Opening failed: give the slot back so waiters are not starved
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, entry, discard=False):
+        """Return a connection to the pool, rolling back any uncommitted work"""
+        if not discard:
+            try:
+                entry.conn.rollback()
+            except pyodbc.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._size -= 1
+                self._discarded += 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+
+        if discard:
+            self._close_quietly(entry.conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it"""
+        entry = self.acquire()
+        discard = False
+        try:
+            yield entry.conn
+        except pyodbc.Error as e:
+            # Communication-link errors (SQLSTATE 08xxx) leave the connection unusable
+            discard = bool(e.args) and str(e.args[0]).startswith('08')
+            raise
+        finally:
+            self.release(entry, discard=discard)
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    def stats(self):
+        """Snapshot of pool usage for sizing and monitoring"""
+        with self._cond:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': round(self._wait_time / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+                'created': self._created,
+                'evicted': self._evicted,
+                'discarded': self._discarded
+            }
+
+
+class DatabaseUnavailableError(Exception):
+    """Raised immediately while the circuit breaker is open"""
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a statement outlives its timeout and is cancelled on the server"""
+
+    def __init__(self, query, timeout):
+        super().__init__(f"Query cancelled after {timeout}s timeout")
+        self.query = query
+        self.timeout = timeout
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for the database
+
+    After failure_threshold consecutive connection-level failures the circuit
+    opens and callers fail fast with DatabaseUnavailableError instead of
+    waiting out the connect timeout. Once reset_timeout seconds have passed
+    it goes half-open and lets a single trial call through: success closes
+    the circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._rejected = 0
+        self._trips = 0
+
+    def _current_state_locked(self):
+        now = time.monotonic()
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        elif (self._state == self.HALF_OPEN and self._trial_in_flight
+              and now - self._trial_started >= self.reset_timeout):
+            # The trial call never reported back; let another one through
+            self._trial_in_flight = False
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state_locked()
+
+    def allow(self):
+        """Return True if a call may go to the database right now"""
+        with self._lock:
+            state = self._current_state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started = time.monotonic()
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        # Lock-free fast path for the common healthy case
+        if self._state == self.CLOSED and not self._failures:
+            return
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._trips += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            state = self._current_state_locked()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'open_for_s': round(time.monotonic() - self._opened_at, 1) if state != self.CLOSED else 0.0,
+                'rejected': self._rejected,
+                'trips': self._trips
+            }
+
+
+_breaker = CircuitBreaker(**BREAKER_CONFIG)
+_probe_thread = None
+_probe_pid = None
+
+def _is_connection_error(exc):
+    """True for errors that mean the server is unreachable, not a bad query"""
+    if not isinstance(exc, pyodbc.Error) or not exc.args:
+        return False
+    sqlstate = str(exc.args[0])
+    # HYT00 on a statement is a query timeout; login timeouts surface from
+    # _checkout(), which counts every connect failure
+    return sqlstate.startswith('08') or sqlstate == 'HYT01'
+
+def _health_probe_loop(interval):
+    while True:
+        time.sleep(interval)
+        # The half-open trial is left to real traffic unless nothing comes in
+        check_db_connection(verbose=False)
+        for replica in _replicas:
+            replica.probe()
+
+def start_health_probe(interval=None):
+    """Start the background health probe thread for this process (idempotent)"""
+    global _probe_thread, _probe_pid
+    interval = HEALTH_PROBE_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return
+    pid = os.getpid()
+    if _probe_thread is not None and _probe_pid == pid and _probe_thread.is_alive():
+        return
+    _probe_thread = threading.Thread(target=_health_probe_loop, args=(interval,),
+                                     name='db-health-probe', daemon=True)
+    _probe_pid = pid
+    _probe_thread.start()
+
+def get_breaker_stats():
+    """Return circuit breaker state and counters"""
+    return _breaker.stats()
+
+def _warm_in_background(pool, breaker):
+    """Pre-open pool's min_size connections off the caller's thread"""
+    if pool.min_size and breaker.state != CircuitBreaker.OPEN:
+        threading.Thread(target=pool.warm, kwargs={'on_failure': breaker.record_failure},
+                         name='pool-warmup', daemon=True).start()
+
+def get_pool():
+    """
+    Return this process's connection pool, creating it on first use
+
+    The pool is published before it is warmed, so callers never wait on
+    (or behind) the warm-up connects.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                # Connections inherited across fork() must not be shared
+                _entries_by_conn.clear()
+                _pool = ConnectionPool(
+                    lambda: _connect(get_connection_string()),
+                    **POOL_CONFIG
+                )
+                _pool_pid = pid
+                _warm_in_background(_pool, _breaker)
+    return _pool
+
+def get_pool_stats():
+    """Return connection pool statistics (in-use, idle, wait time, ...)"""
+    return get_pool().stats()
+
+def _get_scope():
+    """Return where the current connection is bound: flask.g or a thread-local"""
+    if has_app_context is not None and has_app_context():
+        return g
+    return _local
+
+def _in_transaction():
+    return getattr(_get_scope(), '_db_tx_depth', 0) > 0
+
+def _commit(conn):
+    """Commit unless an enclosing transaction() block will commit for us"""
+    if not _in_transaction():
+        conn.commit()
+
+def _unbind(scope, discard=False):
+    entry = getattr(scope, '_db_entry', None)
+    if entry is not None:
+        scope._db_entry = None
+        get_pool().release(entry, discard=discard)
+
+def _checkout():
+    """Acquire a pooled connection, failing fast while the circuit is open"""
+    if not _breaker.allow():
+        raise DatabaseUnavailableError("Database unavailable (circuit open); try again shortly")
+    try:
+        return get_pool().acquire()
+    except PoolTimeoutError:
+        # Saturation, not an outage: don't trip the breaker
+        raise
+    except Exception:
+        _breaker.record_failure()
+        raise
+
+class ReadReplica:
+    """
+    One read replica: its own pool, circuit breaker and latency estimate
+
+    latency_ms is an exponentially weighted moving average of the health
+    probe round trip, used to prefer the faster replica.
+    """
+
+    def __init__(self, server, latency_alpha=0.3):
+        self.server = server
+        self.latency_alpha = latency_alpha
+        self.latency_ms = None
+        self.breaker = CircuitBreaker(**BREAKER_CONFIG)
+        self.reads = 0
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def get_pool(self):
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._lock:
+                if self._pool is None or self._pool_pid != pid:
+                    conn_str = get_connection_string(self.server, read_only=True)
+                    self._pool = ConnectionPool(lambda: _connect(conn_str), **POOL_CONFIG)
+                    self._pool_pid = pid
+                    _warm_in_background(self._pool, self.breaker)
+        return self._pool
+
+    def record_latency(self, ms):
+        if self.latency_ms is None:
+            self.latency_ms = ms
+        else:
+            self.latency_ms += self.latency_alpha * (ms - self.latency_ms)
+
+    def probe(self):
+        started = time.perf_counter()
+        try:
+            _probe_database(get_connection_string(self.server, read_only=True))
+        except Exception:
+            self.breaker.record_failure()
+            return False
+        self.record_latency((time.perf_counter() - started) * 1000)
+        self.breaker.record_success()
+        return True
+
+    def checkout(self):
+        """Acquire a connection, or return None so the caller uses the primary"""
+        if not self.breaker.allow():
+            return None
+        try:
+            entry = self.get_pool().acquire()
+        except PoolTimeoutError:
+            return None
+        except Exception as e:
+            self.breaker.record_failure()
+            print(f"Read replica {self.server} unavailable, using primary: {e}")
+            return None
+        self.reads += 1
+        return entry
+
+    def stats(self):
+        return {
+            'server': self.server,
+            'latency_ms': round(self.latency_ms, 3) if self.latency_ms is not None else None,
+            'reads': self.reads,
+            'breaker': self.breaker.stats(),
+            'pool': self.get_pool().stats() if self._pool is not None else None
+        }
+
+
+_replicas = [ReadReplica(server) for server in READ_REPLICAS]
+
+def configure_read_replicas(servers):
+    """Replace the read replica list (e.g. from app config)"""
+    global _replicas
+    _replicas = [ReadReplica(server) for server in servers]
+
+def get_replica_stats():
+    return [replica.stats() for replica in _replicas]
+
+def _choose_replica():
+    """
+    Pick a healthy replica, preferring lower probe latency
+    
+    Two random healthy replicas are compared and the faster one wins
+    ("power of two choices"), which favours fast replicas without sending
+    every read to the same one.
+    """
+    healthy = [r for r in _replicas if r.breaker.state != CircuitBreaker.OPEN]
+    if len(healthy) <= 1:
+        return healthy[0] if healthy else None
+    first, second = random.sample(healthy, 2)
+    return first if (first.latency_ms or 0.0) <= (second.latency_ms or 0.0) else second
+
+_READ_STATEMENT_RE = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+# String literals, comments and [quoted] names, blanked before keyword checks
+_SQL_NOISE_RE = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/|\[[^\]]*\]", re.DOTALL)
+# Keywords that make a SELECT/WITH batch write: SELECT ... INTO, or a CTE
+# feeding INSERT/UPDATE/DELETE/MERGE
+_WRITE_KEYWORD_RE = re.compile(
+    r"\b(?:INTO|INSERT|UPDATE|DELETE|MERGE|EXEC|EXECUTE|TRUNCATE|CREATE|ALTER|DROP)\b", re.IGNORECASE)
+# A second statement after ';' (a trailing ';' is fine)
+_MULTI_STATEMENT_RE = re.compile(r";\s*\S")
+_EXEC_RE = re.compile(r"^\s*EXEC(?:UTE)?\s+(?:\[?dbo\]?\.)?\[?(\w+)\]?", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def is_read_only_statement(statement):
+    """
+    True for plain SELECT/WITH queries and EXEC of a READ_ONLY_PROCEDURES entry
+
+    Errs towards False: a batch with more than one statement, or a
+    SELECT/WITH mentioning a write keyword outside literals and comments,
+    is a write (primary connection, read-your-writes window noted).
+    """
+    code = _SQL_NOISE_RE.sub(' ', statement)
+    if _MULTI_STATEMENT_RE.search(code):
+        return False
+    if _READ_STATEMENT_RE.match(statement):
+        return not _WRITE_KEYWORD_RE.search(code)
+    match = _EXEC_RE.match(statement)
+    return bool(match) and match.group(1) in READ_ONLY_PROCEDURES
+
+def _note_write():
+    """Remember a write so this session's next reads go to the primary"""
+    if not _replicas:
+        return
+    scope = _get_scope()
+    scope._db_wrote = True
+    if has_request_context is not None and has_request_context():
+        session['_db_last_write'] = time.time()
+
+def _can_read_from_replica(scope):
+    if not _replicas or getattr(scope, '_db_tx_depth', 0) or getattr(scope, '_db_wrote', False):
+        return False
+    if has_request_context is not None and has_request_context():
+        last_write = session.get('_db_last_write')
+        if last_write and time.time() - last_write < READ_YOUR_WRITES_SECONDS:
+            return False
+    return True
+
+def _replica_connection(scope):
+    """
+    Return a context manager over a replica connection, or None for the primary
+    
+    Inside an app context the chosen replica connection is bound to flask.g
+    so a request reads from one consistent replica.
+    """
+    bound = getattr(scope, '_db_read', None)
+    if bound is not None:
+        replica, entry = bound
+        owned = False
+    else:
+        replica = _choose_replica()
+        entry = replica.checkout() if replica is not None else None
+        if entry is None:
+            return None
+        owned = scope is _local
+        if not owned:
+            scope._db_read = (replica, entry)
+
+    @contextmanager
+    def connection():
+        broken = False
+        try:
+            yield entry.conn
+        except pyodbc.Error as e:
+            print(f"Read replica {replica.server} error: {e}")
+            broken = _is_connection_error(e)
+            if broken:
+                replica.breaker.record_failure()
+            raise
         else:
-            result[key] = value
-    return result
+            replica.breaker.record_success()
+        finally:
+            if owned:
+                replica.get_pool().release(entry, discard=broken)
+            elif broken:
+                scope._db_read = None
+                replica.get_pool().release(entry, discard=True)
+    return connection()
+
+def _release_replica(scope):
+    bound = getattr(scope, '_db_read', None)
+    if bound is not None:
+        scope._db_read = None
+        replica, entry = bound
+        replica.get_pool().release(entry)
 
 @contextmanager
-def get_db_connection():
-    """Context manager for database connections"""
-    conn = None
+def get_db_connection(readonly=False):
+    """
+    Context manager for database connections
+
+    Inside a Flask app context one pooled connection is bound to flask.g on
+    first use and shared by every helper until release_request_connection()
+    runs at teardown. Elsewhere a connection is checked out per call, unless
+    a transaction() block has bound one to the current thread.
+    Raises DatabaseUnavailableError at once while the circuit breaker is open.
+
+    With readonly=True the connection may come from a read replica, unless
+    none is configured or healthy, a transaction is open, or this session
+    wrote within READ_YOUR_WRITES_SECONDS; then the primary is used.
+    """
+    scope = _get_scope()
+    if readonly and _can_read_from_replica(scope):
+        replica_cm = _replica_connection(scope)
+        if replica_cm is not None:
+            with replica_cm as conn:
+                yield conn
+            return
+
+    entry = getattr(scope, '_db_entry', None)
+    owned = False
+    if entry is None:
+        entry = _checkout()
+        if scope is _local:
+            owned = True
+        else:
+            scope._db_entry = entry
+
     try:
-        conn = pyodbc.connect(get_connection_string())
-        yield conn
+        yield entry.conn
     except pyodbc.Error as e:
-        if conn:
-            conn.rollback()
         print(f"Database connection error: {e}")
+        broken = _is_connection_error(e)
+        if broken:
+            _breaker.record_failure()
+        else:
+            # The server answered, even if only with an error
+            _breaker.record_success()
+        if owned:
+            owned = False
+            get_pool().release(entry, discard=broken)
+        elif not getattr(scope, '_db_tx_depth', 0):
+            # Keep the shared connection clean for the rest of the request
+            if not broken:
+                try:
+                    entry.conn.rollback()
+                except pyodbc.Error:
+                    broken = True
+            if broken:
+                _unbind(scope, discard=True)
         raise
+    else:
+        _breaker.record_success()
     finally:
-        if conn:
-            conn.close()
+        if owned:
+            get_pool().release(entry)
+
+def release_request_connection(exc=None):
+    """Teardown hook: return the request's connections to their pools"""
+    scope = _get_scope()
+    scope._db_tx_depth = 0
+    scope._db_wrote = False
+    _unbind(scope)
+    _release_replica(scope)
+
+def init_app(app):
+    """
+    Register the request-scoped connection teardown
+
+    The health probe is not started here, so importing the app has no
+    background threads; call start_health_probe() once the process serves
+    requests.
+    """
+    app.teardown_appcontext(release_request_connection)
+
+@contextmanager
+def transaction():
+    """
+    Run several helper calls as one unit of work
+
+    Every execute_* call inside the block shares one connection and skips its
+    own commit; the block commits once on success and rolls back on error.
+    Nested blocks join the outermost transaction.
+
+    Example:
+        with transaction():
+            execute_query("UPDATE ...", params, fetch=False)
+            execute_insert("INSERT ...", params)
+    """
+    scope = _get_scope()
+    depth = getattr(scope, '_db_tx_depth', 0)
+    owns_binding = False
+    if getattr(scope, '_db_entry', None) is None:
+        scope._db_entry = _checkout()
+        owns_binding = scope is _local
+
+    conn = scope._db_entry.conn
+    scope._db_tx_depth = depth + 1
+    try:
+        yield conn
+        if depth == 0:
+            conn.commit()
+    except Exception:
+        if depth == 0:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                pass
+        raise
+    finally:
+        scope._db_tx_depth = depth
+        if owns_binding and depth == 0:
+            _unbind(scope)
+
+_STRING_LITERAL_RE = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"(?<![\w@#])\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def normalize_query(query):
+    """Collapse whitespace and replace literals with ? so equivalent queries match"""
+    text = _STRING_LITERAL_RE.sub('?', query)
+    text = _NUMBER_LITERAL_RE.sub('?', text)
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    return _IN_LIST_RE.sub('(?)', text)
+
+@lru_cache(maxsize=2048)
+def fingerprint_query(query):
+    """Short stable ID for a query shape (see normalize_query)"""
+    return hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()[:12]
+
+def _fingerprint_params(params):
+    """Hash parameter values so they can be correlated without being logged"""
+    if not params:
+        return None
+    return hashlib.sha1(repr(tuple(params)).encode('utf-8')).hexdigest()[:12]
+
+def _estimate_bytes(rows, sample_size=16):
+    """Approximate JSON size of a result by serializing a small sample"""
+    if not rows:
+        return 0
+    sample = rows[:sample_size]
+    try:
+        size = len(json.dumps(sample, default=str))
+    except (TypeError, ValueError):
+        return 0
+    return size * len(rows) // len(sample)
+
+def _current_route():
+    if has_request_context is not None and has_request_context():
+        return request.endpoint or request.path
+    return None
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class QueryStats:
+    """
+    In-process latency histograms and totals per query fingerprint
+
+    At most max_fingerprints distinct shapes are tracked; anything beyond
+    that is folded into a single 'other' entry so dynamic SQL can't grow
+    memory without bound.
+    """
+
+    OTHER = 'other'
+
+    def __init__(self, max_fingerprints=500):
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _new_entry(self, kind, query):
+        return {
+            'kind': kind,
+            'query': normalize_query(query)[:300] if query else '',
+            'count': 0,
+            'errors': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'connect_ms': 0.0,
+            'execute_ms': 0.0,
+            'fetch_ms': 0.0,
+            'rows': 0,
+            'bytes': 0,
+            'buckets': [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+            'routes': {}
+        }
+
+    def record(self, fingerprint, kind, query, total_ms, connect_ms, execute_ms, fetch_ms,
+               rows, nbytes, route, error):
+        bucket = len(HISTOGRAM_BUCKETS_MS)
+        for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if total_ms <= bound:
+                bucket = i
+                break
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    fingerprint, kind, query = self.OTHER, 'mixed', None
+                    entry = self._entries.get(fingerprint)
+                if entry is None:
+                    entry = self._entries[fingerprint] = self._new_entry(kind, query)
+            entry['count'] += 1
+            entry['errors'] += 1 if error else 0
+            entry['total_ms'] += total_ms
+            entry['max_ms'] = max(entry['max_ms'], total_ms)
+            entry['connect_ms'] += connect_ms
+            entry['execute_ms'] += execute_ms
+            entry['fetch_ms'] += fetch_ms
+            entry['rows'] += rows
+            entry['bytes'] += nbytes
+            entry['buckets'][bucket] += 1
+            if route:
+                entry['routes'][route] = entry['routes'].get(route, 0) + 1
+
+    @staticmethod
+    def _percentile(buckets, count, fraction):
+        """Upper bucket bound containing the given fraction of samples"""
+        target = count * fraction
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= target:
+                return HISTOGRAM_BUCKETS_MS[i] if i < len(HISTOGRAM_BUCKETS_MS) else None
+        return None
+
+    def snapshot(self, top=None, sort_by='total_ms'):
+        """List of per-fingerprint summaries, most expensive first"""
+        with self._lock:
+            items = [(fp, dict(entry, buckets=list(entry['buckets']), routes=dict(entry['routes'])))
+                     for fp, entry in self._entries.items()]
+        result = []
+        for fp, entry in items:
+            count = entry['count']
+            entry['fingerprint'] = fp
+            for key in ('total_ms', 'max_ms', 'connect_ms', 'execute_ms', 'fetch_ms'):
+                entry[key] = round(entry[key], 3)
+            entry['avg_ms'] = round(entry['total_ms'] / count, 3) if count else 0.0
+            entry['p50_ms'] = self._percentile(entry['buckets'], count, 0.50)
+            entry['p95_ms'] = self._percentile(entry['buckets'], count, 0.95)
+            entry['p99_ms'] = self._percentile(entry['buckets'], count, 0.99)
+            # Non-empty buckets only; le_ms None is the open-ended last bucket
+            bounds = list(HISTOGRAM_BUCKETS_MS) + [None]
+            entry['histogram'] = [{'le_ms': bound, 'count': n}
+                                  for bound, n in zip(bounds, entry.pop('buckets')) if n]
+            result.append(entry)
+        result.sort(key=lambda e: e.get(sort_by) or 0, reverse=True)
+        return result[:top] if top else result
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_query_stats = QueryStats()
+
+def get_query_stats(top=None, sort_by='total_ms'):
+    """Return per-query timing summaries (see QueryStats.snapshot)"""
+    return _query_stats.snapshot(top=top, sort_by=sort_by)
+
+def reset_query_stats():
+    _query_stats.reset()
+
+
+class _QueryTimer:
+    """
+    Times one helper call and records it into the query stats
+
+    Used as the outermost context manager in each execute_* helper; the
+    helper calls connected() once it holds a connection and executed() once
+    the statement has run, so the total splits into connect/execute/fetch.
+    """
+
+    __slots__ = ('kind', 'query', 'params', 'rows', 'nbytes', 'start', 't_connected', 't_executed')
+
+    def __init__(self, kind, query, params=None):
+        self.kind = kind
+        self.query = query
+        self.params = params
+        self.rows = 0
+        self.nbytes = 0
+        self.t_connected = None
+        self.t_executed = None
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def connected(self):
+        self.t_connected = time.perf_counter()
+
+    def executed(self):
+        self.t_executed = time.perf_counter()
+
+    def result(self, rows):
+        """Count a fetched batch of rows and estimate its serialized size"""
+        self.rows += len(rows)
+        self.nbytes += _estimate_bytes(rows)
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        # A generator closed early by its consumer is not a failed query
+        failed = exc_type is not None and not issubclass(exc_type, GeneratorExit)
+        connected = self.t_connected or end
+        executed = self.t_executed or end
+        total_ms = (end - self.start) * 1000
+        connect_ms = (connected - self.start) * 1000
+        execute_ms = (max(executed, connected) - connected) * 1000
+        fetch_ms = (end - max(executed, connected)) * 1000
+        route = _current_route()
+        fingerprint = fingerprint_query(self.query)
+
+        _query_stats.record(fingerprint, self.kind, self.query, total_ms, connect_ms,
+                            execute_ms, fetch_ms, self.rows, self.nbytes, route,
+                            error=failed)
+
+        if total_ms >= SLOW_QUERY_MS:
+            _slow_query_log.warning(json.dumps({
+                'event': 'slow_query',
+                'ts': datetime.now().isoformat(timespec='milliseconds'),
+                'kind': self.kind,
+                'fingerprint': fingerprint,
+                'query': normalize_query(self.query)[:1000],
+                'params_fingerprint': _fingerprint_params(self.params),
+                'param_count': len(self.params) if self.params else 0,
+                'total_ms': round(total_ms, 3),
+                'connect_ms': round(connect_ms, 3),
+                'execute_ms': round(execute_ms, 3),
+                'fetch_ms': round(fetch_ms, 3),
+                'rows': self.rows,
+                'bytes': self.nbytes,
+                'route': route,
+                'pid': os.getpid(),
+                'error': exc_type.__name__ if failed else None
+            }))
+        return False
+
+# Quoted strings/identifiers are kept verbatim; other whitespace runs collapse
+_SQL_WHITESPACE_RE = re.compile(r"('(?:[^']|'')*'|\[[^\]]*\]|\"[^\"]*\")|\s+")
+
+_statement_stats_lock = threading.Lock()
+_statement_stats = {'prepared_hits': 0, 'prepared_misses': 0, 'prepared_evictions': 0}
+
+@lru_cache(maxsize=1024)
+def canonical_statement(query):
+    """
+    Return the canonical, interned text sent to the server for query
+    
+    Whitespace outside literals is collapsed so the same statement written
+    at different call sites maps to one SQL Server plan-cache entry, and the
+    result is interned so identical statements are the same string object,
+    which is what lets pyodbc skip re-preparing on a reused cursor.
+    Text containing comments is only stripped, since joining lines could
+    comment out the rest of the statement.
+    """
+    if '--' in query or '/*' in query:
+        text = query.strip()
+    else:
+        text = _SQL_WHITESPACE_RE.sub(lambda m: m.group(1) or ' ', query).strip()
+    return sys.intern(text)
+
+@lru_cache(maxsize=256)
+def _procedure_call_text(proc_name, param_names):
+    """Cached EXEC text for a stored procedure and its parameter names"""
+    if param_names:
+        param_str = ', '.join([f"@{k} = ?" for k in param_names])
+        return sys.intern(f"EXEC {proc_name} {param_str}")
+    return sys.intern(f"EXEC {proc_name}")
+
+@contextmanager
+def query_timeout(seconds):
+    """
+    Set the statement timeout for queries run inside a block or route
+    
+    Works as a context manager or as a route decorator:
+    
+        @app.route('/api/designs')
+        @query_timeout(5)
+        def api_designs(): ...
+    
+    A timeout passed to a helper call still wins; 0 disables the timeout.
+    """
+    scope = _get_scope()
+    previous = getattr(scope, '_db_query_timeout', None)
+    scope._db_query_timeout = seconds
+    try:
+        yield
+    finally:
+        scope._db_query_timeout = previous
+
+def _resolve_timeout(timeout):
+    """Whole seconds for this call: explicit, then query_timeout(), then QUERY_TIMEOUT"""
+    if timeout is None:
+        timeout = getattr(_get_scope(), '_db_query_timeout', None)
+    if timeout is None:
+        timeout = QUERY_TIMEOUT
+    # ODBC timeouts are whole seconds; round up so 0.5 doesn't mean "none"
+    return max(int(math.ceil(timeout)), 0)
+
+def _new_cursor(conn, timeout):
+    """Create a cursor with its own query timeout"""
+    # pyodbc copies Connection.timeout onto each cursor as it is created
+    previous = conn.timeout
+    conn.timeout = timeout
+    try:
+        return conn.cursor()
+    finally:
+        conn.timeout = previous
+
+def _raise_if_timeout(exc, query, timeout, timer):
+    """
+    Re-raise a driver timeout (SQLSTATE HYT00) as QueryTimeoutError
+
+    Only once timer shows a connection was held: a login timeout from
+    connecting carries the same SQLSTATE but is a connectivity failure,
+    and is left to propagate as the driver error.
+    """
+    if (timer.t_connected is not None and isinstance(exc, pyodbc.Error)
+            and exc.args and str(exc.args[0]) == 'HYT00'):
+        raise QueryTimeoutError(query, timeout) from exc
 
-def execute_query(query, params=None, fetch=True):
+def _statement_cursor(conn, statement, timeout=None):
+    """
+    Return a cursor for statement on conn, reusing the one that prepared it
+    
+    pyodbc keeps the last prepared statement on each cursor and skips the
+    prepare step when the same string object is executed again, so keeping
+    one cursor per canonical statement per connection turns repeat calls
+    into a plain execute of the existing handle. A cursor's timeout is
+    fixed when it is created, so the timeout is part of the cache key.
+    Callers must leave the cursor with no pending results (see
+    _drain_results()), since it outlives the call.
+    """
+    if timeout is None:
+        timeout = _resolve_timeout(None)
+    entry = _entries_by_conn.get(id(conn))
+    if entry is None or STATEMENT_CACHE_SIZE <= 0:
+        return _new_cursor(conn, timeout)
+    
+    statements = entry.statements
+    key = (statement, timeout)
+    cursor = statements.get(key)
+    if cursor is not None:
+        statements.move_to_end(key)
+        with _statement_stats_lock:
+            _statement_stats['prepared_hits'] += 1
+        return cursor
+    
+    cursor = _new_cursor(conn, timeout)
+    statements[key] = cursor
+    evicted = None
+    if len(statements) > STATEMENT_CACHE_SIZE:
+        _, evicted = statements.popitem(last=False)
+    with _statement_stats_lock:
+        _statement_stats['prepared_misses'] += 1
+        if evicted is not None:
+            _statement_stats['prepared_evictions'] += 1
+    if evicted is not None:
+        try:
+            evicted.close()
+        except pyodbc.Error:
+            pass
+    return cursor
+
+def _drain_results(cursor):
+    """
+    Read past any result sets the caller didn't fetch
+    
+    A cached cursor stays open on its pooled connection; without MARS an
+    unread result set leaves the connection "busy with results for another
+    hstmt" for the next statement. Reading to the end also makes SQL Server
+    run the rest of the batch, so an error in a later statement is raised.
+    """
+    while cursor.nextset():
+        pass
+
+def get_statement_cache_stats():
+    """Hit/miss counters for the query-text and prepared-statement caches"""
+    text_info = canonical_statement.cache_info()
+    with _statement_stats_lock:
+        stats = dict(_statement_stats)
+    stats.update({
+        'text_hits': text_info.hits,
+        'text_misses': text_info.misses,
+        'text_size': text_info.currsize,
+        'per_connection_limit': STATEMENT_CACHE_SIZE
+    })
+    lookups = stats['prepared_hits'] + stats['prepared_misses']
+    stats['prepared_hit_ratio'] = round(stats['prepared_hits'] / lookups, 4) if lookups else 0.0
+    return stats
+
+def execute_query(query, params=None, fetch=True, row_mode='dict', timeout=None):
     """
     Execute a SQL query and return results
     
@@ -91,35 +1423,101 @@ def execute_query(query, params=None, fetch=True):
         query: SQL query string
         params: Tuple of parameters for parameterized query
         fetch: If True, fetch and return results; if False, commit changes
+        row_mode: Shape of returned rows - 'dict', 'tuple' or 'namedtuple'
+        timeout: Seconds before the statement is cancelled (default: the
+            route's query_timeout() or QUERY_TIMEOUT; 0 disables)
     
     Returns:
-        List of dictionaries representing rows (if fetch=True)
+        List of rows (if fetch=True)
         Row count (if fetch=False)
+    
+    Raises:
+        QueryTimeoutError: The statement ran past its timeout
     """
+    statement = canonical_statement(query)
+    read_only = is_read_only_statement(statement)
+    timeout = _resolve_timeout(timeout)
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        with _QueryTimer('query', query, params) as timer, \
+                get_db_connection(readonly=fetch and read_only) as conn:
+            timer.connected()
+            cursor = _statement_cursor(conn, statement, timeout)
             
             if params:
-                cursor.execute(query, params)
+                cursor.execute(statement, params)
             else:
-                cursor.execute(query)
+                cursor.execute(statement)
+            timer.executed()
+            if not read_only:
+                _note_write()
             
             if fetch:
+                results = []
                 if cursor.description:
-                    columns = [column[0] for column in cursor.description]
-                    results = []
-                    for row in cursor.fetchall():
-                        row_dict = dict(zip(columns, row))
-                        results.append(serialize_row(row_dict))
-                    return results
-                return []
+                    results = materialize_rows(cursor, cursor.fetchall(), row_mode)
+                    timer.result(results)
+                _drain_results(cursor)
+                return results
             else:
-                conn.commit()
-                return cursor.rowcount
+                rowcount = cursor.rowcount
+                _drain_results(cursor)
+                _commit(conn)
+                timer.rows = max(rowcount, 0)
+                return rowcount
+    except pyodbc.Error as e:
+        print(f"Query execution error: {e}")
+        print(f"Query: {query[:200]}...")
+        _raise_if_timeout(e, query, timeout, timer)
+        raise
+
+def iter_query(query, params=None, chunk_size=500, row_mode='dict', timeout=None):
+    """
+    Execute a SQL query and yield rows lazily
+    
+    Rows are pulled from the server chunk_size at a time with fetchmany(),
+    so memory use stays flat regardless of the result size. The connection
+    is busy until the generator is exhausted or closed, so don't run other
+    queries while iterating.
+    
+    Args:
+        query: SQL query string
+        params: Tuple of parameters for parameterized query
+        chunk_size: Number of rows fetched per round trip
+        row_mode: Shape of yielded rows - 'dict', 'tuple' or 'namedtuple'
+        timeout: Seconds allowed for the execute and for each fetch
+    
+    Yields:
+        One row at a time
+    """
+    timeout = _resolve_timeout(timeout)
+    try:
+        with _QueryTimer('iter', query, params) as timer, \
+                get_db_connection(readonly=is_read_only_statement(canonical_statement(query))) as conn:
+            timer.connected()
+            cursor = _new_cursor(conn, timeout)
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                timer.executed()
+                
+                if not cursor.description:
+                    return
+                materialize = make_row_materializer(cursor.description, row_mode)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    batch = [materialize(row) for row in rows]
+                    timer.result(batch)
+                    yield from batch
+            finally:
+                cursor.close()
     except pyodbc.Error as e:
         print(f"Query execution error: {e}")
         print(f"Query: {query[:200]}...")
+        _raise_if_timeout(e, query, timeout, timer)
         raise
 
 def execute_insert(query, params=None):
@@ -133,25 +1531,38 @@ def execute_insert(query, params=None):
     Returns:
         The ID of the newly inserted row
     """
+    timeout = _resolve_timeout(None)
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        with _QueryTimer('insert', query, params) as timer, get_db_connection() as conn:
+            timer.connected()
+            # SCOPE_IDENTITY() must run in the INSERT's own batch: pyodbc sends a
+            # parameterized statement through sp_prepexec, a scope of its own,
+            # so a separate SELECT SCOPE_IDENTITY() afterwards returns NULL
+            statement = canonical_statement(
+                f"SET NOCOUNT ON;\n{query.strip().rstrip(';')};\nSELECT SCOPE_IDENTITY() AS id")
+            cursor = _statement_cursor(conn, statement, timeout)
             
             if params:
-                cursor.execute(query, params)
+                cursor.execute(statement, params)
             else:
-                cursor.execute(query)
+                cursor.execute(statement)
+            timer.executed()
+            timer.rows = 1
+            _note_write()
             
-            # Get the last inserted ID (SQL Server SCOPE_IDENTITY)
-            cursor.execute("SELECT SCOPE_IDENTITY() AS id")
-            result = cursor.fetchone()
-            new_id = int(result[0]) if result and result[0] else None
+            # Step past anything ahead of the ID (e.g. rows from a trigger)
+            while cursor.description is None and cursor.nextset():
+                pass
+            result = cursor.fetchone() if cursor.description else None
+            new_id = int(result[0]) if result and result[0] is not None else None
+            _drain_results(cursor)
             
-            conn.commit()
+            _commit(conn)
             return new_id
     except pyodbc.Error as e:
         print(f"Insert execution error: {e}")
         print(f"Query: {query[:200]}...")
+        _raise_if_timeout(e, query, timeout, timer)
         raise
 
 def execute_many(query, params_list):
@@ -165,51 +1576,1026 @@ def execute_many(query, params_list):
     Returns:
         Total number of affected rows
     """
+    timeout = _resolve_timeout(None)
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        with _QueryTimer('many', query) as timer, get_db_connection() as conn:
+            timer.connected()
+            cursor = _new_cursor(conn, timeout)
+            # Send parameters as one array instead of one round trip per row
+            cursor.fast_executemany = True
             cursor.executemany(query, params_list)
-            conn.commit()
+            timer.executed()
+            timer.rows = len(params_list)
+            _note_write()
+            _commit(conn)
             return cursor.rowcount
     except pyodbc.Error as e:
         print(f"Execute many error: {e}")
+        _raise_if_timeout(e, query, timeout, timer)
+        raise
+
+_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _quote_identifier(name):
+    """Bracket-quote a table/column name after checking it is a plain identifier"""
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return f"[{name}]"
+
+def _batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(tuple(row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def bulk_insert(table, columns, rows, batch_size=1000, use_staging=False):
+    """
+    Insert many rows quickly using fast_executemany
+    
+    Rows are sent in batches of batch_size as ODBC parameter arrays and
+    committed per batch, so a failure only loses the batch in flight.
+    
+    With use_staging=True the rows are first loaded into a session temp
+    table and then copied into the target with one INSERT ... SELECT. Use
+    it for tables with triggers (Reviews, Customers): the triggers and
+    constraints then run once over the whole set instead of once per row,
+    and the target is written atomically.
+    
+    Args:
+        table: Target table name
+        columns: Column names, in the order values appear in each row
+        rows: Iterable of row tuples (may be a generator)
+        batch_size: Rows per round trip / commit
+        use_staging: Load through a temp staging table
+    
+    Returns:
+        Number of rows inserted
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    target = _quote_identifier(table)
+    column_list = ', '.join(_quote_identifier(c) for c in columns)
+    placeholders = ', '.join('?' * len(columns))
+    staging = f"#bulk_{table}" if use_staging else None
+    
+    insert_sql = f"INSERT INTO {staging or target} ({column_list}) VALUES ({placeholders})"
+    total = 0
+    try:
+        with _QueryTimer('bulk', insert_sql) as timer, get_db_connection() as conn:
+            timer.connected()
+            _note_write()
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            
+            if staging:
+                cursor.execute(f"IF OBJECT_ID('tempdb..{staging}') IS NOT NULL DROP TABLE {staging}")
+                # Copy the column types without rows, constraints or triggers
+                cursor.execute(f"SELECT TOP 0 {column_list} INTO {staging} FROM {target}")
+            
+            try:
+                for batch in _batched(rows, batch_size):
+                    cursor.executemany(insert_sql, batch)
+                    total += len(batch)
+                    if not staging:
+                        _commit(conn)
+                
+                if staging:
+                    cursor.execute(
+                        f"INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {staging}"
+                    )
+                    _commit(conn)
+                timer.executed()
+                timer.rows = total
+            finally:
+                if staging:
+                    # Pooled connections outlive this call; don't leave the temp table behind
+                    try:
+                        cursor.execute(f"IF OBJECT_ID('tempdb..{staging}') IS NOT NULL DROP TABLE {staging}")
+                        _commit(conn)
+                    except pyodbc.Error:
+                        pass
+            return total
+    except pyodbc.Error as e:
+        print(f"Bulk insert error ({table}, {total} rows done): {e}")
+        _raise_if_timeout(e, insert_sql, QUERY_TIMEOUT, timer)
         raise
 
-def execute_stored_procedure(proc_name, params=None):
+def execute_stored_procedure(proc_name, params=None, row_mode='dict', timeout=None):
     """
     Execute a stored procedure
     
     Args:
         proc_name: Name of the stored procedure
         params: Dictionary of parameter names and values
+        row_mode: Shape of returned rows - 'dict', 'tuple' or 'namedtuple'
+        timeout: Seconds before the call is cancelled (see execute_query)
     
     Returns:
-        List of dictionaries representing result rows
+        List of result rows
+    
+    Raises:
+        QueryTimeoutError: The procedure ran past its timeout
     """
+    # EXEC text is cached per (procedure, parameter names)
+    query = _procedure_call_text(proc_name, tuple(params.keys()) if params else ())
+    values = list(params.values()) if params else None
+    read_only = proc_name in READ_ONLY_PROCEDURES
+    timeout = _resolve_timeout(timeout)
+    
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        with _QueryTimer('procedure', query, values) as timer, \
+                get_db_connection(readonly=read_only) as conn:
+            timer.connected()
+            cursor = _statement_cursor(conn, query, timeout)
             
-            if params:
-                # Build parameter string
-                param_str = ', '.join([f"@{k} = ?" for k in params.keys()])
-                query = f"EXEC {proc_name} {param_str}"
-                cursor.execute(query, list(params.values()))
+            if values:
+                cursor.execute(query, values)
             else:
-                cursor.execute(f"EXEC {proc_name}")
+                cursor.execute(query)
+            timer.executed()
+            if not read_only:
+                _note_write()
             
+            results = []
             if cursor.description:
-                columns = [column[0] for column in cursor.description]
-                results = []
-                for row in cursor.fetchall():
-                    row_dict = dict(zip(columns, row))
-                    results.append(serialize_row(row_dict))
-                return results
-            return []
+                results = materialize_rows(cursor, cursor.fetchall(), row_mode)
+                timer.result(results)
+            _drain_results(cursor)
+            return results
     except pyodbc.Error as e:
         print(f"Stored procedure error: {e}")
+        _raise_if_timeout(e, query, timeout, timer)
         raise
 
+def execute_query_sets(query, params=None, row_mode='dict', timeout=None):
+    """
+    Execute a batch or procedure that returns several result sets
+    
+    All result sets come back from one round trip and are read in order
+    with cursor.nextset(). Sets without rows (row counts of statements run
+    without SET NOCOUNT ON) are skipped.
+    
+    Args:
+        query: SQL batch or EXEC statement
+        params: Tuple of parameters for parameterized query
+        row_mode: Shape of returned rows - 'dict', 'tuple' or 'namedtuple'
+        timeout: Seconds before the call is cancelled (see execute_query)
+    
+    Returns:
+        List of result sets, each a list of rows
+    
+    Raises:
+        QueryTimeoutError: The batch ran past its timeout
+    """
+    statement = canonical_statement(query)
+    read_only = is_read_only_statement(statement)
+    timeout = _resolve_timeout(timeout)
+    try:
+        with _QueryTimer('sets', query, params) as timer, \
+                get_db_connection(readonly=read_only) as conn:
+            timer.connected()
+            cursor = _statement_cursor(conn, statement, timeout)
+            
+            if params:
+                cursor.execute(statement, params)
+            else:
+                cursor.execute(statement)
+            timer.executed()
+            if not read_only:
+                _note_write()
+            
+            result_sets = []
+            while True:
+                if cursor.description:
+                    rows = materialize_rows(cursor, cursor.fetchall(), row_mode)
+                    timer.result(rows)
+                    result_sets.append(rows)
+                if not cursor.nextset():
+                    break
+            return result_sets
+    except pyodbc.Error as e:
+        print(f"Query execution error: {e}")
+        print(f"Query: {query[:200]}...")
+        _raise_if_timeout(e, query, timeout, timer)
+        raise
+
+def _cache_key_digest(key):
+    """Stable text key for shared backends (the same in every process)"""
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+def _new_epoch():
+    """(token, created) naming one lifetime of a backend's table versions"""
+    return uuid4().hex[:12], time.time()
+
+
+class MemoryCacheBackend:
+    """
+    Result cache storage inside this process: an LRU bounded by estimated size
+
+    Fastest, but each worker process has its own copy and its own table
+    versions, so a write handled by one worker is invisible to the others.
+    ResultCache therefore keeps its entries fresh for at most
+    RESULT_CACHE_LOCAL_TTL seconds, the longest another worker serves rows
+    from before a write. Use a shared backend for longer TTLs.
+    """
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires, size)
+        self._versions = {}
+        self._bumped_at = {}
+        # Versions restart at 0 with every process, so its epoch is its own
+        self._epoch = _new_epoch()
+        self._bytes = 0
+        self._counters = {'expired': 0, 'evictions': 0, 'too_large': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[1]:
+                self._delete_locked(key)
+                self._counters['expired'] += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        size = _estimate_bytes(value[2]) + len(key[0])
+        with self._lock:
+            if size > self.max_bytes:
+                self._counters['too_large'] += 1
+                return
+            self._delete_locked(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, entry = self._entries.popitem(last=False)
+                self._bytes -= entry[2]
+                self._counters['evictions'] += 1
+
+    def _delete_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def delete(self, key):
+        with self._lock:
+            self._delete_locked(key)
+
+    def versions(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def bump(self, tables):
+        now = time.time()
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self._bumped_at[table] = now
+
+    def last_bumped(self, tables):
+        with self._lock:
+            return max((self._bumped_at[table] for table in tables if table in self._bumped_at), default=None)
+
+    def epoch(self):
+        return self._epoch
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), bytes=self._bytes,
+                        max_bytes=self.max_bytes, table_versions=dict(self._versions))
+
+
+class SQLiteCacheBackend:
+    """
+    Result cache storage in a SQLite file shared by the workers on one host
+
+    Entries and table versions live in the file, so a bump_tables() in one
+    worker invalidates the entries of every worker on its next lookup.
+    Needs nothing beyond the standard library, which also makes it the
+    local stand-in for the Redis backend. Entries are pickled; the least
+    recently used go once the file holds more than max_bytes of results.
+    """
+
+    name = 'sqlite'
+    shared = True
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._counters_lock = threading.Lock()
+        self._counters = {'expired': 0, 'evictions': 0, 'too_large': 0}
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,
+                expires REAL NOT NULL, accessed REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_result_cache_accessed ON result_cache (accessed)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS table_versions (
+                name TEXT PRIMARY KEY, version INTEGER NOT NULL, bumped_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_epoch (
+                id INTEGER PRIMARY KEY CHECK (id = 1), token TEXT NOT NULL, created REAL NOT NULL
+            )
+        """)
+        conn.execute("INSERT OR IGNORE INTO cache_epoch (id, token, created) VALUES (1, ?, ?)", _new_epoch())
+        self._epoch = tuple(conn.execute("SELECT token, created FROM cache_epoch").fetchone())
+
+    def _connection(self):
+        # One connection per thread, reopened after fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _count(self, name, n=1):
+        with self._counters_lock:
+            self._counters[name] += n
+
+    def get(self, key):
+        digest = _cache_key_digest(key)
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires FROM result_cache WHERE key = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now >= row[1]:
+            conn.execute("DELETE FROM result_cache WHERE key = ?", (digest,))
+            self._count('expired')
+            return None
+        conn.execute("UPDATE result_cache SET accessed = ? WHERE key = ?", (now, digest))
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            self._count('too_large')
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO result_cache VALUES (?, ?, ?, ?, ?)",
+                         (_cache_key_digest(key), blob, len(blob), now + ttl, now))
+            conn.execute("DELETE FROM result_cache WHERE expires <= ?", (now,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM result_cache").fetchone()[0]
+            evicted = 0
+            while total > self.max_bytes:
+                oldest = conn.execute("SELECT key, size FROM result_cache ORDER BY accessed LIMIT 1").fetchone()
+                conn.execute("DELETE FROM result_cache WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                evicted += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted:
+            self._count('evictions', evicted)
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM result_cache WHERE key = ?", (_cache_key_digest(key),))
+
+    def versions(self, tables):
+        if not tables:
+            return ()
+        rows = self._connection().execute(
+            f"SELECT name, version FROM table_versions WHERE name IN ({', '.join('?' * len(tables))})",
+            tables).fetchall()
+        found = dict(rows)
+        return tuple(found.get(table, 0) for table in tables)
+
+    def bump(self, tables):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in tables:
+                conn.execute("""
+                    INSERT INTO table_versions (name, version, bumped_at) VALUES (?, 1, ?)
+                    ON CONFLICT (name) DO UPDATE SET version = version + 1, bumped_at = excluded.bumped_at
+                """, (table, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def last_bumped(self, tables):
+        if not tables:
+            return None
+        return self._connection().execute(
+            f"SELECT MAX(bumped_at) FROM table_versions WHERE name IN ({', '.join('?' * len(tables))})",
+            tables).fetchone()[0]
+
+    def epoch(self):
+        return self._epoch
+
+    def clear(self):
+        self._connection().execute("DELETE FROM result_cache")
+
+    def stats(self):
+        conn = self._connection()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result_cache").fetchone()
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return dict(counters, entries=entries, bytes=size, max_bytes=self.max_bytes, path=self.path,
+                    table_versions=dict(conn.execute("SELECT name, version FROM table_versions").fetchall()))
+
+
+class RedisCacheBackend:
+    """
+    Result cache storage on a Redis-protocol server (Redis, Valkey, KeyDB...)
+
+    Shared by every worker on every host. Entries are pickled and expire
+    through the server's own TTLs; size is bounded by the server's
+    maxmemory (set maxmemory-policy to allkeys-lru or volatile-lru).
+    Table versions are one hash, so a bump is a single round trip.
+
+    Args:
+        client: A redis.Redis-compatible client (e.g. fakeredis in tests);
+            built from url when omitted
+        url: Server URL, e.g. redis://cache-host:6379/0
+        prefix: Namespace for this app's keys
+        max_bytes: Largest single result worth storing
+    """
+
+    name = 'redis'
+    shared = True
+
+    def __init__(self, client=None, url=None, prefix='crumbear:', max_bytes=8 * 1024 * 1024):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("The redis result cache backend needs the redis package (pip install redis)")
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self.client = client
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self._versions_key = f"{prefix}table_versions"
+        self._bumped_at_key = f"{prefix}table_bumped_at"
+        self._epoch = None
+        self._counters_lock = threading.Lock()
+        self._counters = {'too_large': 0}
+
+    def _entry_key(self, key):
+        return f"{self.prefix}result:{_cache_key_digest(key)}"
+
+    def get(self, key):
+        blob = self.client.get(self._entry_key(key))
+        return pickle.loads(blob) if blob is not None else None
+
+    def set(self, key, value, ttl):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            with self._counters_lock:
+                self._counters['too_large'] += 1
+            return
+        self.client.set(self._entry_key(key), blob, px=max(int(ttl * 1000), 1))
+
+    def delete(self, key):
+        self.client.delete(self._entry_key(key))
+
+    def versions(self, tables):
+        if not tables:
+            return ()
+        return tuple(int(v or 0) for v in self.client.hmget(self._versions_key, list(tables)))
+
+    def bump(self, tables):
+        now = time.time()
+        pipe = self.client.pipeline()
+        for table in tables:
+            pipe.hincrby(self._versions_key, table, 1)
+            pipe.hset(self._bumped_at_key, table, now)
+        pipe.execute()
+
+    def last_bumped(self, tables):
+        if not tables:
+            return None
+        return max((float(v) for v in self.client.hmget(self._bumped_at_key, list(tables)) if v), default=None)
+
+    def epoch(self):
+        # Fetched on first use so an unreachable server doesn't fail the import
+        if self._epoch is None:
+            epoch_key = f"{self.prefix}epoch"
+            self.client.set(epoch_key, '%s:%r' % _new_epoch(), nx=True)
+            value = self.client.get(epoch_key)
+            token, created = (value.decode() if isinstance(value, bytes) else value).split(':')
+            self._epoch = token, float(created)
+        return self._epoch
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}result:*", count=500))
+        for start in range(0, len(keys), 500):
+            self.client.delete(*keys[start:start + 500])
+
+    def stats(self):
+        versions = self.client.hgetall(self._versions_key)
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return dict(counters, max_bytes=self.max_bytes, table_versions={
+            (name.decode() if isinstance(name, bytes) else name): int(version)
+            for name, version in versions.items()})
+
+
+# Change markers for a set of tables: the backend's epoch token, their
+# versions and when any of them last changed (epoch start if never)
+TableState = namedtuple('TableState', ['epoch', 'versions', 'last_modified'])
+
+
+class _Flight:
+    """One in-progress load that concurrent callers for the same key wait on"""
+    __slots__ = ('done', 'rows', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.rows = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    Read-through result cache over a storage backend
+
+    Every entry is tagged with the tables it was read from and their
+    versions when the query started. bump() advances a table's version in
+    the backend, so each entry that read the table stops matching and is
+    dropped on its next lookup: invalidation is exact without scanning the
+    cache, and a result read while a write committed is never stored as
+    current. With a shared backend the versions are shared too, so a bump
+    in one worker invalidates the entries every worker sees. Without one,
+    entries are fresh for at most local_ttl, since other workers never see
+    this worker's bumps.
+
+    An entry is fresh for its ttl. After that it is kept for stale_ttl
+    (served while one background query refreshes it) and for
+    RESULT_CACHE_STALE_IF_ERROR (served only while the database is
+    unavailable). Concurrent misses for the same key in this process share
+    one query (single flight).
+
+    The cache never breaks a read: backend errors are logged and treated
+    as misses.
+    """
+
+    def __init__(self, backend, default_ttl=RESULT_CACHE_TTL, local_ttl=RESULT_CACHE_LOCAL_TTL):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        # Longest ttl an entry gets: unlimited only when versions are shared
+        self.max_ttl = None if backend.shared else local_ttl
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._last_bump = 0.0
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'invalidated': 0, 'coalesced': 0,
+                          'refreshes': 0, 'early_refreshes': 0, 'stale_if_error': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _backend_error(self, action, e):
+        self._count('errors')
+        print(f"Result cache ({self.backend.name}) {action} failed: {e}")
+
+    def lookup(self, key):
+        """(rows, fresh_until, cost) for key, or None if absent or invalidated"""
+        try:
+            value = self.backend.get(key)
+            if value is None:
+                return None
+            tables, versions, rows, fresh_until, cost = value
+            if versions == self.backend.versions(tables):
+                return rows, fresh_until, cost
+            self.backend.delete(key)
+            self._count('invalidated')
+        except Exception as e:
+            self._backend_error('read', e)
+        return None
+
+    def _store(self, key, rows, tables, versions, ttl, stale_ttl, cost):
+        """Store rows read at versions, unless one of the tables has moved on since"""
+        # A replica may not have replayed a fresh write yet; don't keep its answer
+        if versions is None or (_replicas and self.seconds_since_bump() < READ_YOUR_WRITES_SECONDS):
+            return
+        try:
+            if versions != self.backend.versions(tables):
+                return
+            value = (tables, versions, rows, time.time() + ttl, cost)
+            self.backend.set(key, value, ttl + max(stale_ttl, RESULT_CACHE_STALE_IF_ERROR))
+        except Exception as e:
+            self._backend_error('write', e)
+
+    def load(self, key, loader, tables, ttl, stale_ttl=0, wait_timeout=None):
+        """
+        Run loader() and cache its rows; concurrent calls for key share one run
+
+        Raises:
+            QueryTimeoutError: Waited wait_timeout seconds for another caller's run
+            Whatever loader() raised (in the caller that ran it and every waiter)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._counters['coalesced'] += 1
+        if not leader:
+            if not flight.done.wait(wait_timeout):
+                raise QueryTimeoutError(key[0], wait_timeout)
+            if flight.error is not None:
+                raise flight.error
+            return flight.rows
+
+        try:
+            try:
+                versions = self.backend.versions(tables)
+            except Exception as e:
+                self._backend_error('version read', e)
+                versions = None
+            start = time.perf_counter()
+            rows = loader()
+            self._store(key, rows, tables, versions, ttl, stale_ttl, time.perf_counter() - start)
+            flight.rows = rows
+            return rows
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def refresh(self, key, loader, tables, ttl, stale_ttl, counter='refreshes'):
+        """Reload key on a background thread unless a load is already running"""
+        with self._lock:
+            if key in self._flights:
+                return
+            self._counters[counter] += 1
+
+        def run():
+            try:
+                self.load(key, loader, tables, ttl, stale_ttl)
+            except Exception as e:
+                print(f"Background refresh of cached query failed: {e}")
+        threading.Thread(target=run, name='result-cache-refresh', daemon=True).start()
+
+    def bump(self, tables):
+        """Invalidate every entry read from any of tables"""
+        with self._lock:
+            self._last_bump = time.time()
+        try:
+            self.backend.bump(tables)
+        except Exception as e:
+            # Entries still expire after their TTL
+            self._backend_error(f"bump of {', '.join(tables)}", e)
+
+    def seconds_since_bump(self):
+        with self._lock:
+            return time.time() - self._last_bump
+
+    def table_state(self, tables):
+        """TableState for tables, or None if the backend can't be read"""
+        try:
+            token, created = self.backend.epoch()
+            versions = self.backend.versions(tables)
+            last_bumped = self.backend.last_bumped(tables)
+        except Exception as e:
+            self._backend_error('version read', e)
+            return None
+        return TableState(token, versions, last_bumped or created)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters, in_flight=len(self._flights))
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+        try:
+            stats.update(self.backend.stats())
+        except Exception as e:
+            stats['backend_error'] = str(e)
+        stats['backend'] = self.backend.name
+        stats['max_ttl'] = self.max_ttl
+        return stats
+
+
+def make_result_cache_backend(name=RESULT_CACHE_BACKEND):
+    """Backend for a DB_RESULT_CACHE_BACKEND value: 'memory', 'sqlite' or 'redis'"""
+    max_bytes = int(RESULT_CACHE_MB * 1024 * 1024)
+    if name == 'sqlite':
+        return SQLiteCacheBackend(RESULT_CACHE_PATH, max_bytes)
+    if name == 'redis':
+        return RedisCacheBackend(url=RESULT_CACHE_REDIS_URL)
+    if name != 'memory':
+        raise ValueError(f"Unknown result cache backend {name!r}")
+    return MemoryCacheBackend(max_bytes)
+
+def configure_result_cache(backend, ttl=RESULT_CACHE_TTL):
+    """Swap the result cache backend (a backend object or name); None turns caching off"""
+    global _result_cache
+    if isinstance(backend, str):
+        backend = make_result_cache_backend(backend)
+    _result_cache = ResultCache(backend, ttl) if backend is not None else None
+
+_result_cache = None
+if RESULT_CACHE_MB > 0:
+    try:
+        configure_result_cache(RESULT_CACHE_BACKEND)
+    except Exception as e:
+        print(f"Result cache backend {RESULT_CACHE_BACKEND!r} unavailable ({e}); using memory")
+        configure_result_cache('memory')
+
+def _copy_rows(rows):
+    # Callers may annotate dict rows; keep the cached ones untouched
+    return [dict(row) if isinstance(row, dict) else row for row in rows]
+
+def _refresh_early(fresh_until, cost, now):
+    """
+    Probabilistic early expiration ("XFetch"): refresh before fresh_until
+    with a chance that grows as it nears and with the query's cost, so
+    one caller refreshes a hot entry before the rest see it expire.
+    """
+    return now - cost * RESULT_CACHE_EARLY_BETA * math.log(1.0 - random.random()) >= fresh_until
+
+def cached_query(query, params=None, tables=(), ttl=None, stale_ttl=0, row_mode='dict', timeout=None):
+    """
+    Read-through execute_query() for reads that change only on known writes
+
+    Results are keyed on the canonical statement text and params, and
+    tagged with the tables they depend on. Code that writes one of those
+    tables must call bump_tables() after committing; cached results that
+    read it are then never served again by workers sharing the backend.
+    With the per-process 'memory' backend other workers don't see the
+    bump: ttl is capped at RESULT_CACHE_LOCAL_TTL, which bounds how long
+    they serve the old rows (plus one stale read with stale_ttl). Inside a
+    transaction() block the cache is bypassed, since the block may see its
+    own uncommitted writes.
+
+    Concurrent misses for one key share a single query. With stale_ttl,
+    an entry past its ttl (its tables unchanged) is served for stale_ttl
+    more seconds while one background query refreshes it, and hot entries
+    are refreshed a little early at random so they rarely expire at all.
+    Any entry is served past its ttl while the database is unavailable.
+
+        cakes = cached_query("SELECT * FROM Cakes WHERE availability = 1",
+                             tables=('Cakes',))
+
+    Args:
+        query: SELECT or read-only EXEC statement
+        params: Tuple of parameters for parameterized query
+        tables: Names of the tables the result is read from, views resolved
+            to their base tables
+        ttl: Seconds an entry is fresh (default RESULT_CACHE_TTL)
+        stale_ttl: Seconds past ttl an entry may be served while it is
+            refreshed in the background (0: callers wait for the query)
+        row_mode, timeout: As for execute_query(); shared backends can't
+            store 'namedtuple' rows, which are then simply not cached
+
+    Returns:
+        List of rows; dict rows are copies the caller may change
+    """
+    if _result_cache is None or _in_transaction():
+        return execute_query(query, params, row_mode=row_mode, timeout=timeout)
+    cache = _result_cache
+    tables = tuple(tables)
+    ttl = cache.default_ttl if ttl is None else ttl
+    if cache.max_ttl is not None:
+        ttl = min(ttl, cache.max_ttl)
+    # Resolved now: background refreshes run outside this route's query_timeout()
+    timeout = _resolve_timeout(timeout)
+    key = (canonical_statement(query), tuple(params) if params else (), row_mode)
+    loader = partial(execute_query, query, params, row_mode=row_mode, timeout=timeout)
+
+    entry = cache.lookup(key)
+    if entry is not None:
+        rows, fresh_until, cost = entry
+        now = time.time()
+        if now < fresh_until:
+            if stale_ttl and _refresh_early(fresh_until, cost, now):
+                cache.refresh(key, loader, tables, ttl, stale_ttl, counter='early_refreshes')
+            cache._count('hits')
+            return _copy_rows(rows)
+        if not is_db_available():
+            cache._count('stale_if_error')
+            return _copy_rows(rows)
+        if now < fresh_until + stale_ttl:
+            cache.refresh(key, loader, tables, ttl, stale_ttl)
+            cache._count('stale_hits')
+            return _copy_rows(rows)
+
+    cache._count('misses')
+    try:
+        rows = cache.load(key, loader, tables, ttl, stale_ttl, wait_timeout=timeout + 1 if timeout else None)
+    except (DatabaseUnavailableError, QueryTimeoutError):
+        if entry is None:
+            raise
+        cache._count('stale_if_error')
+        rows = entry[0]
+    return _copy_rows(rows)
+
+def bump_tables(*tables):
+    """Invalidate cached_query() results that read any of tables (call after commit)"""
+    if _result_cache is not None:
+        _result_cache.bump(tables)
+
+def get_table_state(tables):
+    """
+    Change markers for tables, for HTTP validators (ETag / Last-Modified)
+
+    The state changes whenever bump_tables() is called for one of tables,
+    in any worker. Only shared backends can promise that: with the memory
+    backend a worker never sees another's bumps, and would keep vouching
+    for data that changed, so there is no state to report.
+
+    Returns:
+        TableState, or None when the result cache is off, per-process or
+        unreadable
+    """
+    if _result_cache is None or not _result_cache.backend.shared:
+        return None
+    return _result_cache.table_state(tuple(tables))
+
+def clear_result_cache():
+    if _result_cache is not None:
+        _result_cache.clear()
+
+def get_result_cache_stats():
+    """Hit/miss/eviction counters, size and table versions of the result cache"""
+    if _result_cache is None:
+        return {'enabled': False}
+    return dict(_result_cache.stats(), enabled=True)
+
+_fanout_executor = None
+_fanout_pid = None
+_fanout_lock = threading.Lock()
+
+def _get_fanout_executor():
+    """Return this process's fan-out thread pool, creating it on first use"""
+    global _fanout_executor, _fanout_pid
+    pid = os.getpid()
+    if _fanout_executor is None or _fanout_pid != pid:
+        with _fanout_lock:
+            if _fanout_executor is None or _fanout_pid != pid:
+                # Threads don't survive fork(); start a fresh pool in the child
+                _fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS,
+                                                      thread_name_prefix='db-fanout')
+                _fanout_pid = pid
+    return _fanout_executor
+
+def _run_fanout_call(fn, timeout):
+    # Worker threads have no app context, so every call checks out its own
+    # pooled connection and returns it when done
+    with query_timeout(timeout):
+        return fn()
+
+def fan_out(calls, timeout=None, return_exceptions=False):
+    """
+    Run independent queries concurrently and wait for all of them
+    
+    Each call runs on a worker thread with its own pooled connection, so the
+    total wait is roughly the slowest call rather than the sum. Calls must
+    not depend on each other, and fan_out() must not be used inside a
+    transaction() block (the workers don't share its connection).
+    
+        results = fan_out({
+            'stats': lambda: execute_query("EXEC sp_GetDashboardStats"),
+            'top': lambda: execute_query("EXEC sp_GetTopDesigns @top_count = 5"),
+        }, timeout=5)
+    
+    Args:
+        calls: Dict of name -> zero-argument callable running one query helper
+        timeout: Statement timeout (s) for each call, cancelled server-side;
+            also bounds the overall wait (default: the route's
+            query_timeout() or QUERY_TIMEOUT; 0 waits indefinitely)
+        return_exceptions: Put a failed call's exception in its result slot
+            instead of raising it
+    
+    Returns:
+        Dict of name -> result, in the order of calls
+    
+    Raises:
+        QueryTimeoutError: A call did not finish in time
+        Any exception raised by a call (unless return_exceptions=True)
+    """
+    timeout = _resolve_timeout(timeout)
+    executor = _get_fanout_executor()
+    futures = {name: executor.submit(_run_fanout_call, fn, timeout) for name, fn in calls.items()}
+    # One second of grace for connect and fetch on top of the statement timeout
+    deadline = time.monotonic() + timeout + 1 if timeout else None
+    
+    results = {}
+    first_error = None
+    for name, future in futures.items():
+        try:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                # Not started yet: drop it; running: its statement timeout ends it
+                future.cancel()
+                raise QueryTimeoutError(name, timeout) from None
+        except Exception as e:
+            if not return_exceptions and first_error is None:
+                first_error = e
+            results[name] = e
+    if first_error is not None:
+        raise first_error
+    return results
+
+_MIGRATION_FILE_RE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# Applied schema version, read once per process by get_schema_version()
+_schema_version = None
+_schema_version_lock = threading.Lock()
+
+def list_migrations():
+    """
+    Migration scripts in MIGRATIONS_DIR, oldest first
+
+    Returns:
+        List of (version, name, path) tuples
+    """
+    migrations = []
+    if os.path.isdir(MIGRATIONS_DIR):
+        for filename in os.listdir(MIGRATIONS_DIR):
+            match = _MIGRATION_FILE_RE.match(filename)
+            if match:
+                migrations.append((int(match.group(1)), match.group(2),
+                                   os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+def latest_migration_version():
+    """Highest migration version shipped with this code (0 if none)"""
+    migrations = list_migrations()
+    return migrations[-1][0] if migrations else 0
+
+def get_schema_version(refresh=False):
+    """
+    Highest migration version recorded in SchemaMigrations
+    
+    Read from the database once and cached for the life of the process;
+    failures are not cached, so the next call tries again.
+    
+    Args:
+        refresh: Re-read the version (e.g. after running migrations)
+    
+    Returns:
+        Version number, 0 if SchemaMigrations doesn't exist yet
+    """
+    global _schema_version
+    if _schema_version is not None and not refresh:
+        return _schema_version
+    with _schema_version_lock:
+        if _schema_version is None or refresh:
+            if execute_query("SELECT OBJECT_ID('dbo.SchemaMigrations', 'U') AS table_id")[0]['table_id'] is None:
+                _schema_version = 0
+            else:
+                rows = execute_query("SELECT ISNULL(MAX(version), 0) AS version FROM SchemaMigrations")
+                _schema_version = rows[0]['version']
+    return _schema_version
+
+def check_schema_version():
+    """
+    Compare the database schema version with the migrations shipped
+    
+    Returns:
+        True if the schema is current, False if it is behind or unknown
+    """
+    expected = latest_migration_version()
+    try:
+        current = get_schema_version()
+    except (pyodbc.Error, DatabaseUnavailableError, PoolTimeoutError) as e:
+        print(f"⚠️ Could not read schema version: {e}")
+        return False
+    if current < expected:
+        print(f"⚠️ Database schema is at version {current}, code expects {expected}; "
+              f"run scripts/migrate.py")
+        return False
+    print(f"✅ Database schema version {current}")
+    return True
+
 def test_connection():
     """Test database connection and print status"""
     print("\n" + "=" * 50)
@@ -239,6 +2625,10 @@ def test_connection():
                 print("\n⚠️ No tables found - run schema.sql to initialize")
         except Exception as e:
             print(f"Test query failed: {e}")
+        
+        check_schema_version()
+        print(f"\nPool stats: {get_pool_stats()}")
+        print(f"Circuit breaker: {get_breaker_stats()}")
     
     print("=" * 50 + "\n")
 
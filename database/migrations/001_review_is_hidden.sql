@@ -0,0 +1,28 @@
+-- =====================================================
+-- MIGRATION 001: Reviews.is_hidden
+-- Older databases either lack the column or have the nullable one the
+-- admin review routes used to add at request time.
+-- =====================================================
+
+IF COL_LENGTH('dbo.Reviews', 'is_hidden') IS NULL
+    ALTER TABLE Reviews ADD is_hidden BIT NOT NULL
+        CONSTRAINT DF_Reviews_is_hidden DEFAULT 0;
+GO
+
+-- Make a runtime-added column NOT NULL with a named default
+IF COLUMNPROPERTY(OBJECT_ID('dbo.Reviews'), 'is_hidden', 'AllowsNull') = 1
+BEGIN
+    DECLARE @default_name SYSNAME = (
+        SELECT dc.name
+        FROM sys.default_constraints dc
+        JOIN sys.columns c ON c.object_id = dc.parent_object_id AND c.column_id = dc.parent_column_id
+        WHERE dc.parent_object_id = OBJECT_ID('dbo.Reviews') AND c.name = 'is_hidden'
+    );
+    IF @default_name IS NOT NULL
+        EXEC('ALTER TABLE Reviews DROP CONSTRAINT ' + QUOTENAME(@default_name));
+    
+    UPDATE Reviews SET is_hidden = 0 WHERE is_hidden IS NULL;
+    ALTER TABLE Reviews ALTER COLUMN is_hidden BIT NOT NULL;
+    ALTER TABLE Reviews ADD CONSTRAINT DF_Reviews_is_hidden DEFAULT 0 FOR is_hidden;
+END
+GO
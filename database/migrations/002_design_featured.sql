@@ -0,0 +1,32 @@
+-- =====================================================
+-- MIGRATION 002: CakeDesigns.featured
+-- Featured designs sort first on the homepage; the index serves that
+-- order and the keyset (featured, design_id) paging.
+-- =====================================================
+
+IF COL_LENGTH('dbo.CakeDesigns', 'featured') IS NULL
+    ALTER TABLE CakeDesigns ADD featured BIT NOT NULL
+        CONSTRAINT DF_CakeDesigns_featured DEFAULT 0;
+GO
+
+IF COLUMNPROPERTY(OBJECT_ID('dbo.CakeDesigns'), 'featured', 'AllowsNull') = 1
+BEGIN
+    DECLARE @default_name SYSNAME = (
+        SELECT dc.name
+        FROM sys.default_constraints dc
+        JOIN sys.columns c ON c.object_id = dc.parent_object_id AND c.column_id = dc.parent_column_id
+        WHERE dc.parent_object_id = OBJECT_ID('dbo.CakeDesigns') AND c.name = 'featured'
+    );
+    IF @default_name IS NOT NULL
+        EXEC('ALTER TABLE CakeDesigns DROP CONSTRAINT ' + QUOTENAME(@default_name));
+    
+    UPDATE CakeDesigns SET featured = 0 WHERE featured IS NULL;
+    ALTER TABLE CakeDesigns ALTER COLUMN featured BIT NOT NULL;
+    ALTER TABLE CakeDesigns ADD CONSTRAINT DF_CakeDesigns_featured DEFAULT 0 FOR featured;
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+               WHERE name = 'IX_CakeDesigns_Featured' AND object_id = OBJECT_ID('dbo.CakeDesigns'))
+    CREATE INDEX IX_CakeDesigns_Featured ON CakeDesigns(featured DESC, design_id);
+GO
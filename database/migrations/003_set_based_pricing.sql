@@ -0,0 +1,96 @@
+-- =====================================================
+-- MIGRATION 003: Set-based design pricing
+-- fn_PriceForComplexity (inline TVF) replaces per-row calls to the scalar
+-- fn_CalculateDesignPrice; vw_DesignWithRatings gains calculated_price
+-- along with the featured and created_at columns the app reads.
+-- =====================================================
+
+CREATE OR ALTER FUNCTION fn_PriceForComplexity(@base_price DECIMAL(10,2), @complexity_level NVARCHAR(20))
+RETURNS TABLE
+AS
+RETURN
+    SELECT CAST(@base_price *
+        CASE @complexity_level
+            WHEN 'Simple' THEN 1.0
+            WHEN 'Moderate' THEN 1.25
+            WHEN 'Complex' THEN 1.5
+            WHEN 'Expert' THEN 2.0
+            ELSE 1.0
+        END AS DECIMAL(10,2)) AS calculated_price;
+GO
+
+CREATE OR ALTER VIEW vw_DesignWithRatings AS
+SELECT 
+    cd.design_id,
+    cd.theme,
+    cd.color_palette,
+    cd.topper_type,
+    cd.complexity_level,
+    cd.image_url,
+    cd.featured,
+    cd.created_at,
+    c.cake_name,
+    c.flavor,
+    c.base_price,
+    p.calculated_price,
+    (SELECT AVG(CAST(r.rating AS DECIMAL(3,2))) 
+     FROM Reviews r 
+     WHERE r.design_id = cd.design_id) AS avg_rating,
+    (SELECT COUNT(*) 
+     FROM Reviews r 
+     WHERE r.design_id = cd.design_id) AS review_count
+FROM CakeDesigns cd
+JOIN Cakes c ON cd.cake_id = c.cake_id
+CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p;
+GO
+
+CREATE OR ALTER PROCEDURE sp_GetTopDesigns
+    @top_count INT = 10
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    SELECT TOP (@top_count)
+        cd.design_id,
+        cd.theme,
+        cd.color_palette,
+        cd.complexity_level,
+        c.cake_name,
+        c.flavor,
+        p.calculated_price AS total_price,
+        (SELECT AVG(CAST(r.rating AS DECIMAL(3,2))) 
+         FROM Reviews r WHERE r.design_id = cd.design_id) AS avg_rating,
+        (SELECT COUNT(*) 
+         FROM Reviews r WHERE r.design_id = cd.design_id) AS review_count
+    FROM CakeDesigns cd
+    JOIN Cakes c ON cd.cake_id = c.cake_id
+    CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+    WHERE EXISTS (SELECT 1 FROM Reviews r WHERE r.design_id = cd.design_id)
+    ORDER BY avg_rating DESC, review_count DESC;
+END;
+GO
+
+CREATE OR ALTER PROCEDURE sp_GetCakeDesigns
+    @cake_id INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    SELECT 
+        cd.design_id,
+        cd.theme,
+        cd.color_palette,
+        cd.topper_type,
+        cd.complexity_level,
+        cd.image_url,
+        cd.created_at,
+        p.calculated_price,
+        dbo.fn_GetDesignAvgRating(cd.design_id) AS avg_rating,
+        (SELECT COUNT(*) FROM Reviews WHERE design_id = cd.design_id) AS review_count
+    FROM CakeDesigns cd
+    JOIN Cakes c ON cd.cake_id = c.cake_id
+    CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+    WHERE cd.cake_id = @cake_id
+    ORDER BY cd.created_at DESC;
+END;
+GO
@@ -0,0 +1,218 @@
+-- =====================================================
+-- MIGRATION 004: DesignRatingStats
+-- Per-design rating aggregate over visible reviews, maintained by
+-- trg_MaintainDesignRatingStats; views, procedures and fn_GetDesignAvgRating
+-- read it instead of aggregating Reviews. Backfilled at the end.
+-- =====================================================
+
+IF OBJECT_ID('dbo.DesignRatingStats', 'U') IS NULL
+CREATE TABLE DesignRatingStats (
+    design_id       INT PRIMARY KEY,
+    rating_sum      INT NOT NULL DEFAULT 0,
+    rating_count    INT NOT NULL DEFAULT 0,
+    stars_1         INT NOT NULL DEFAULT 0,
+    stars_2         INT NOT NULL DEFAULT 0,
+    stars_3         INT NOT NULL DEFAULT 0,
+    stars_4         INT NOT NULL DEFAULT 0,
+    stars_5         INT NOT NULL DEFAULT 0,
+    -- Same scale as AVG(CAST(rating AS DECIMAL(3,2))); NULL while no reviews
+    avg_rating      AS CAST(CAST(rating_sum AS DECIMAL(12,6)) / NULLIF(rating_count, 0) AS DECIMAL(9,6)),
+    updated_at      DATETIME NOT NULL DEFAULT GETDATE(),
+    
+    CONSTRAINT FK_DesignRatingStats_CakeDesigns 
+        FOREIGN KEY (design_id) REFERENCES CakeDesigns(design_id)
+        ON DELETE CASCADE
+);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+               WHERE name = 'IX_DesignRatingStats_Rating' AND object_id = OBJECT_ID('dbo.DesignRatingStats'))
+    CREATE INDEX IX_DesignRatingStats_Rating ON DesignRatingStats(avg_rating DESC, rating_count DESC);
+GO
+
+CREATE OR ALTER TRIGGER trg_MaintainDesignRatingStats
+ON Reviews
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    WITH changes AS (
+        SELECT design_id, rating, 1 AS delta FROM inserted WHERE ISNULL(is_hidden, 0) = 0
+        UNION ALL
+        SELECT design_id, rating, -1 AS delta FROM deleted WHERE ISNULL(is_hidden, 0) = 0
+    ),
+    net AS (
+        SELECT 
+            design_id,
+            SUM(delta * rating) AS rating_sum,
+            SUM(delta) AS rating_count,
+            SUM(CASE WHEN rating = 1 THEN delta ELSE 0 END) AS stars_1,
+            SUM(CASE WHEN rating = 2 THEN delta ELSE 0 END) AS stars_2,
+            SUM(CASE WHEN rating = 3 THEN delta ELSE 0 END) AS stars_3,
+            SUM(CASE WHEN rating = 4 THEN delta ELSE 0 END) AS stars_4,
+            SUM(CASE WHEN rating = 5 THEN delta ELSE 0 END) AS stars_5
+        FROM changes
+        GROUP BY design_id
+    )
+    MERGE DesignRatingStats WITH (HOLDLOCK) AS rs
+    USING (
+        SELECT n.* FROM net n
+        WHERE (n.rating_count <> 0 OR n.rating_sum <> 0
+               OR n.stars_1 <> 0 OR n.stars_2 <> 0 OR n.stars_3 <> 0 OR n.stars_4 <> 0 OR n.stars_5 <> 0)
+            -- Skip designs removed by this statement's cascade (their stats row went with them)
+            AND EXISTS (SELECT 1 FROM CakeDesigns cd WHERE cd.design_id = n.design_id)
+    ) AS n
+    ON rs.design_id = n.design_id
+    WHEN MATCHED THEN UPDATE SET
+        rating_sum = rs.rating_sum + n.rating_sum,
+        rating_count = rs.rating_count + n.rating_count,
+        stars_1 = rs.stars_1 + n.stars_1,
+        stars_2 = rs.stars_2 + n.stars_2,
+        stars_3 = rs.stars_3 + n.stars_3,
+        stars_4 = rs.stars_4 + n.stars_4,
+        stars_5 = rs.stars_5 + n.stars_5,
+        updated_at = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (design_id, rating_sum, rating_count, stars_1, stars_2, stars_3, stars_4, stars_5)
+        VALUES (n.design_id, n.rating_sum, n.rating_count, n.stars_1, n.stars_2, n.stars_3, n.stars_4, n.stars_5);
+END;
+GO
+
+CREATE OR ALTER FUNCTION fn_GetDesignAvgRating(@design_id INT)
+RETURNS DECIMAL(3,2)
+AS
+BEGIN
+    DECLARE @avg_rating DECIMAL(3,2);
+    
+    -- One row lookup instead of aggregating the design's reviews
+    SELECT @avg_rating = avg_rating
+    FROM DesignRatingStats
+    WHERE design_id = @design_id;
+    
+    RETURN ISNULL(@avg_rating, 0);
+END;
+GO
+
+CREATE OR ALTER VIEW vw_DesignWithRatings AS
+SELECT 
+    cd.design_id,
+    cd.theme,
+    cd.color_palette,
+    cd.topper_type,
+    cd.complexity_level,
+    cd.image_url,
+    cd.featured,
+    cd.created_at,
+    c.cake_name,
+    c.flavor,
+    c.base_price,
+    p.calculated_price,
+    rs.avg_rating,
+    ISNULL(rs.rating_count, 0) AS review_count
+FROM CakeDesigns cd
+JOIN Cakes c ON cd.cake_id = c.cake_id
+CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+LEFT JOIN DesignRatingStats rs ON rs.design_id = cd.design_id;
+GO
+
+CREATE OR ALTER VIEW vw_TopRatedDesigns AS
+SELECT 
+    cd.design_id,
+    cd.theme,
+    c.cake_name,
+    c.flavor,
+    rs.avg_rating,
+    rs.rating_count AS review_count
+FROM CakeDesigns cd
+JOIN Cakes c ON cd.cake_id = c.cake_id
+JOIN DesignRatingStats rs ON rs.design_id = cd.design_id
+WHERE rs.rating_count > 0 AND rs.avg_rating >= 4;
+GO
+
+CREATE OR ALTER PROCEDURE sp_GetTopDesigns
+    @top_count INT = 10
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    SELECT TOP (@top_count)
+        cd.design_id,
+        cd.theme,
+        cd.color_palette,
+        cd.complexity_level,
+        c.cake_name,
+        c.flavor,
+        p.calculated_price AS total_price,
+        rs.avg_rating,
+        rs.rating_count AS review_count
+    FROM DesignRatingStats rs
+    JOIN CakeDesigns cd ON cd.design_id = rs.design_id
+    JOIN Cakes c ON cd.cake_id = c.cake_id
+    CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+    WHERE rs.rating_count > 0
+    ORDER BY rs.avg_rating DESC, rs.rating_count DESC;
+END;
+GO
+
+CREATE OR ALTER PROCEDURE sp_GetCakeDesigns
+    @cake_id INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    SELECT 
+        cd.design_id,
+        cd.theme,
+        cd.color_palette,
+        cd.topper_type,
+        cd.complexity_level,
+        cd.image_url,
+        cd.created_at,
+        p.calculated_price,
+        ISNULL(CAST(rs.avg_rating AS DECIMAL(3,2)), 0) AS avg_rating,
+        ISNULL(rs.rating_count, 0) AS review_count
+    FROM CakeDesigns cd
+    JOIN Cakes c ON cd.cake_id = c.cake_id
+    CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+    LEFT JOIN DesignRatingStats rs ON rs.design_id = cd.design_id
+    WHERE cd.cake_id = @cake_id
+    ORDER BY cd.created_at DESC;
+END;
+GO
+
+CREATE OR ALTER PROCEDURE sp_RebuildDesignRatingStats
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+    
+    DECLARE @nested BIT = CASE WHEN @@TRANCOUNT > 0 THEN 1 ELSE 0 END;
+    
+    -- Inside a caller's transaction (e.g. a migration) take a savepoint and
+    -- leave committing to the caller
+    IF @nested = 1
+        SAVE TRANSACTION RebuildDesignRatingStats;
+    ELSE
+        BEGIN TRANSACTION;
+    DELETE FROM DesignRatingStats WITH (TABLOCKX);
+    INSERT INTO DesignRatingStats (design_id, rating_sum, rating_count, stars_1, stars_2, stars_3, stars_4, stars_5)
+    SELECT 
+        design_id,
+        SUM(rating),
+        COUNT(*),
+        SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+    FROM Reviews
+    WHERE ISNULL(is_hidden, 0) = 0
+    GROUP BY design_id;
+    IF @nested = 0
+        COMMIT TRANSACTION;
+END;
+GO
+
+EXEC sp_RebuildDesignRatingStats;
+GO
@@ -0,0 +1,30 @@
+-- =====================================================
+-- MIGRATION 005: sp_GetDesignDetail
+-- Design detail page data (design + reviews) in one round trip.
+-- =====================================================
+
+CREATE OR ALTER PROCEDURE sp_GetDesignDetail
+    @design_id INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    SELECT 
+        dr.*,
+        c.frosting,
+        c.size
+    FROM vw_DesignWithRatings dr
+    JOIN CakeDesigns cd ON cd.design_id = dr.design_id
+    JOIN Cakes c ON c.cake_id = cd.cake_id
+    WHERE dr.design_id = @design_id;
+    
+    SELECT 
+        r.*,
+        cu.full_name AS customer_name,
+        cu.city
+    FROM Reviews r
+    JOIN Customers cu ON r.customer_id = cu.customer_id
+    WHERE r.design_id = @design_id AND r.is_hidden = 0
+    ORDER BY r.review_date DESC;
+END;
+GO
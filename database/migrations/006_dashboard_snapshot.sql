@@ -0,0 +1,148 @@
+-- =====================================================
+-- MIGRATION 006: Dashboard snapshot
+-- Precomputed dashboard figures; sp_GetDashboardStats reads them.
+-- Filled once here, then refreshed by the app.
+-- =====================================================
+
+IF OBJECT_ID('dbo.DashboardSnapshot', 'U') IS NULL
+CREATE TABLE DashboardSnapshot (
+    snapshot_id         TINYINT PRIMARY KEY CHECK (snapshot_id = 1),
+    total_cakes         INT NOT NULL,
+    total_designs       INT NOT NULL,
+    total_customers     INT NOT NULL,
+    total_reviews       INT NOT NULL,
+    overall_avg_rating  DECIMAL(9,6),
+    available_cakes     INT NOT NULL,
+    refreshed_at        DATETIME2(3) NOT NULL,   -- UTC
+    refresh_ms          INT NOT NULL
+);
+GO
+
+IF OBJECT_ID('dbo.DashboardSnapshotDistribution', 'U') IS NULL
+CREATE TABLE DashboardSnapshotDistribution (
+    dimension       NVARCHAR(20) NOT NULL,       -- 'complexity', 'rating', 'city'
+    sort_order      INT NOT NULL,
+    label           NVARCHAR(100) NOT NULL,
+    value           INT NOT NULL,
+    
+    CONSTRAINT PK_DashboardSnapshotDistribution PRIMARY KEY (dimension, sort_order)
+);
+GO
+
+CREATE OR ALTER PROCEDURE sp_GetDashboardStats
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF EXISTS (SELECT 1 FROM DashboardSnapshot WHERE snapshot_id = 1)
+        SELECT 
+            total_cakes,
+            total_designs,
+            total_customers,
+            total_reviews,
+            overall_avg_rating,
+            overall_avg_rating AS avg_rating,
+            available_cakes,
+            refreshed_at,
+            DATEDIFF(SECOND, refreshed_at, SYSUTCDATETIME()) AS age_seconds
+        FROM DashboardSnapshot
+        WHERE snapshot_id = 1;
+    ELSE
+        SELECT 
+            (SELECT COUNT(*) FROM Cakes) AS total_cakes,
+            (SELECT COUNT(*) FROM CakeDesigns) AS total_designs,
+            (SELECT COUNT(*) FROM Customers) AS total_customers,
+            (SELECT COUNT(*) FROM Reviews) AS total_reviews,
+            (SELECT AVG(CAST(rating AS DECIMAL(3,2))) FROM Reviews) AS overall_avg_rating,
+            (SELECT AVG(CAST(rating AS DECIMAL(3,2))) FROM Reviews) AS avg_rating,
+            (SELECT COUNT(*) FROM Cakes WHERE availability = 1) AS available_cakes,
+            CAST(NULL AS DATETIME2(3)) AS refreshed_at,
+            CAST(NULL AS INT) AS age_seconds;
+END;
+GO
+
+CREATE OR ALTER PROCEDURE sp_RefreshDashboardSnapshot
+    @min_age_seconds INT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+    
+    DECLARE @started DATETIME2(3) = SYSUTCDATETIME();
+    DECLARE @lock INT;
+    DECLARE @nested BIT = CASE WHEN @@TRANCOUNT > 0 THEN 1 ELSE 0 END;
+    
+    -- Inside a caller's transaction (e.g. a migration) work under a
+    -- savepoint: a plain ROLLBACK would undo the caller's work too
+    IF @nested = 1
+        SAVE TRANSACTION RefreshDashboardSnapshot;
+    ELSE
+        BEGIN TRANSACTION;
+    EXEC @lock = sp_getapplock @Resource = 'DashboardSnapshot', @LockMode = 'Exclusive',
+                               @LockOwner = 'Transaction', @LockTimeout = 0;
+    IF @lock < 0
+        OR EXISTS (SELECT 1 FROM DashboardSnapshot
+                   WHERE snapshot_id = 1
+                     AND refreshed_at > DATEADD(SECOND, -@min_age_seconds, SYSUTCDATETIME()))
+    BEGIN
+        IF @nested = 1
+            ROLLBACK TRANSACTION RefreshDashboardSnapshot;
+        ELSE
+            ROLLBACK TRANSACTION;
+        RETURN;
+    END
+    
+    DECLARE @total_cakes INT = (SELECT COUNT(*) FROM Cakes);
+    DECLARE @available_cakes INT = (SELECT COUNT(*) FROM Cakes WHERE availability = 1);
+    DECLARE @total_designs INT = (SELECT COUNT(*) FROM CakeDesigns);
+    DECLARE @total_customers INT = (SELECT COUNT(*) FROM Customers);
+    DECLARE @total_reviews INT, @avg_rating DECIMAL(9,6);
+    SELECT @total_reviews = COUNT(*), @avg_rating = AVG(CAST(rating AS DECIMAL(3,2))) FROM Reviews;
+    
+    DELETE FROM DashboardSnapshotDistribution;
+    
+    INSERT INTO DashboardSnapshotDistribution (dimension, sort_order, label, value)
+    SELECT 'complexity',
+        CASE complexity_level WHEN 'Simple' THEN 1 WHEN 'Moderate' THEN 2
+                              WHEN 'Complex' THEN 3 WHEN 'Expert' THEN 4 ELSE 5 END,
+        complexity_level, COUNT(*)
+    FROM CakeDesigns
+    GROUP BY complexity_level;
+    
+    INSERT INTO DashboardSnapshotDistribution (dimension, sort_order, label, value)
+    SELECT 'rating', rating, CAST(rating AS NVARCHAR(100)), COUNT(*)
+    FROM Reviews
+    GROUP BY rating;
+    
+    -- Top 6 cities by customer count
+    INSERT INTO DashboardSnapshotDistribution (dimension, sort_order, label, value)
+    SELECT TOP 6 'city', ROW_NUMBER() OVER (ORDER BY COUNT(*) DESC, city), city, COUNT(*)
+    FROM Customers
+    GROUP BY city
+    ORDER BY COUNT(*) DESC, city;
+    
+    MERGE DashboardSnapshot AS s
+    USING (SELECT 1 AS snapshot_id) AS k ON s.snapshot_id = k.snapshot_id
+    WHEN MATCHED THEN UPDATE SET
+        total_cakes = @total_cakes,
+        total_designs = @total_designs,
+        total_customers = @total_customers,
+        total_reviews = @total_reviews,
+        overall_avg_rating = @avg_rating,
+        available_cakes = @available_cakes,
+        refreshed_at = SYSUTCDATETIME(),
+        refresh_ms = DATEDIFF(MILLISECOND, @started, SYSUTCDATETIME())
+    WHEN NOT MATCHED THEN
+        INSERT (snapshot_id, total_cakes, total_designs, total_customers, total_reviews,
+                overall_avg_rating, available_cakes, refreshed_at, refresh_ms)
+        VALUES (1, @total_cakes, @total_designs, @total_customers, @total_reviews,
+                @avg_rating, @available_cakes, SYSUTCDATETIME(),
+                DATEDIFF(MILLISECOND, @started, SYSUTCDATETIME()));
+    
+    IF @nested = 0
+        COMMIT TRANSACTION;
+END;
+GO
+
+EXEC sp_RefreshDashboardSnapshot;
+GO
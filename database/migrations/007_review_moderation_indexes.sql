@@ -0,0 +1,26 @@
+-- =====================================================
+-- MIGRATION 007: Review moderation indexes
+-- Keyset pages of the admin review list seek on a filter column followed
+-- by review_date; IX_Reviews_DesignID_ReviewDate replaces IX_Reviews_DesignID.
+-- IX_Customers_FullName serves the customer typeahead.
+-- =====================================================
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Reviews_DesignID_ReviewDate' AND object_id = OBJECT_ID('dbo.Reviews'))
+    CREATE INDEX IX_Reviews_DesignID_ReviewDate ON Reviews(design_id, review_date);
+GO
+
+IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Reviews_DesignID' AND object_id = OBJECT_ID('dbo.Reviews'))
+    DROP INDEX IX_Reviews_DesignID ON Reviews;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Reviews_Rating_ReviewDate' AND object_id = OBJECT_ID('dbo.Reviews'))
+    CREATE INDEX IX_Reviews_Rating_ReviewDate ON Reviews(rating, review_date);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Reviews_Hidden_ReviewDate' AND object_id = OBJECT_ID('dbo.Reviews'))
+    CREATE INDEX IX_Reviews_Hidden_ReviewDate ON Reviews(review_date) WHERE is_hidden = 1;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Customers_FullName' AND object_id = OBJECT_ID('dbo.Customers'))
+    CREATE INDEX IX_Customers_FullName ON Customers(full_name);
+GO
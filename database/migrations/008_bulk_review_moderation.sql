@@ -0,0 +1,46 @@
+-- =====================================================
+-- MIGRATION 008: Bulk review moderation
+-- ReviewModerationJobs tracks bulk hide/unhide/delete runs;
+-- trg_LogReviewModeration writes HIDE, UNHIDE and DELETE rows to
+-- ReviewAuditLog for single and bulk moderation alike.
+-- =====================================================
+
+IF OBJECT_ID('dbo.ReviewModerationJobs', 'U') IS NULL
+CREATE TABLE ReviewModerationJobs (
+    job_id          INT IDENTITY(1,1) PRIMARY KEY,
+    action          NVARCHAR(10) NOT NULL,       -- 'hide', 'unhide', 'delete'
+    criteria        NVARCHAR(MAX) NOT NULL,      -- JSON: review IDs or list filters
+    status          NVARCHAR(10) NOT NULL DEFAULT 'running',  -- 'running', 'done', 'failed'
+    total           INT NOT NULL DEFAULT 0,      -- matching reviews when the job started
+    processed       INT NOT NULL DEFAULT 0,
+    chunks          INT NOT NULL DEFAULT 0,
+    error           NVARCHAR(4000),
+    started_at      DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME(),
+    finished_at     DATETIME2(3)
+);
+GO
+
+CREATE OR ALTER TRIGGER trg_LogReviewModeration
+ON Reviews
+AFTER UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF NOT EXISTS (SELECT 1 FROM inserted)
+    BEGIN
+        INSERT INTO ReviewAuditLog (review_id, customer_id, design_id, rating, action_type)
+        SELECT review_id, customer_id, design_id, rating, 'DELETE'
+        FROM deleted;
+        RETURN;
+    END
+    
+    IF UPDATE(is_hidden)
+        INSERT INTO ReviewAuditLog (review_id, customer_id, design_id, rating, action_type)
+        SELECT i.review_id, i.customer_id, i.design_id, i.rating,
+               CASE WHEN i.is_hidden = 1 THEN 'HIDE' ELSE 'UNHIDE' END
+        FROM inserted i
+        JOIN deleted d ON d.review_id = i.review_id
+        WHERE i.is_hidden <> d.is_hidden;
+END;
+GO
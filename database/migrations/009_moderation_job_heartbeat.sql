@@ -0,0 +1,11 @@
+-- =====================================================
+-- MIGRATION 009: Review moderation job heartbeat
+-- ReviewModerationJobs.updated_at advances with every committed chunk;
+-- a 'running' job whose heartbeat stops (its worker was restarted) is
+-- marked failed by the app.
+-- =====================================================
+
+IF COL_LENGTH('dbo.ReviewModerationJobs', 'updated_at') IS NULL
+    ALTER TABLE ReviewModerationJobs ADD updated_at DATETIME2(3) NOT NULL
+        CONSTRAINT DF_ReviewModerationJobs_updated_at DEFAULT SYSUTCDATETIME();
+GO
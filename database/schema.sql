@@ -55,6 +55,7 @@ CREATE TABLE CakeDesigns (
     topper_type     NVARCHAR(50),
     complexity_level NVARCHAR(20) NOT NULL CHECK (complexity_level IN ('Simple', 'Moderate', 'Complex', 'Expert')),
     image_url       NVARCHAR(255),
+    featured        BIT NOT NULL DEFAULT 0,
     created_at      DATETIME DEFAULT GETDATE(),
     
     CONSTRAINT FK_CakeDesigns_Cakes 
@@ -89,6 +90,7 @@ CREATE TABLE Reviews (
     rating          INT NOT NULL CHECK (rating >= 1 AND rating <= 5),
     review_text     NVARCHAR(500),
     review_date     DATETIME DEFAULT GETDATE(),
+    is_hidden       BIT NOT NULL DEFAULT 0,
     
     CONSTRAINT FK_Reviews_Customers 
         FOREIGN KEY (customer_id) REFERENCES Customers(customer_id)
@@ -99,6 +101,82 @@ CREATE TABLE Reviews (
 );
 GO
 
+-- =====================================================
+-- DESIGN RATING STATS
+-- Per-design rating aggregate over visible (not hidden) reviews, kept
+-- current by trg_MaintainDesignRatingStats so reads never scan Reviews.
+-- A design without a row here has no visible reviews.
+-- =====================================================
+CREATE TABLE DesignRatingStats (
+    design_id       INT PRIMARY KEY,
+    rating_sum      INT NOT NULL DEFAULT 0,
+    rating_count    INT NOT NULL DEFAULT 0,
+    stars_1         INT NOT NULL DEFAULT 0,
+    stars_2         INT NOT NULL DEFAULT 0,
+    stars_3         INT NOT NULL DEFAULT 0,
+    stars_4         INT NOT NULL DEFAULT 0,
+    stars_5         INT NOT NULL DEFAULT 0,
+    -- Same scale as AVG(CAST(rating AS DECIMAL(3,2))); NULL while no reviews
+    avg_rating      AS CAST(CAST(rating_sum AS DECIMAL(12,6)) / NULLIF(rating_count, 0) AS DECIMAL(9,6)),
+    updated_at      DATETIME NOT NULL DEFAULT GETDATE(),
+    
+    CONSTRAINT FK_DesignRatingStats_CakeDesigns 
+        FOREIGN KEY (design_id) REFERENCES CakeDesigns(design_id)
+        ON DELETE CASCADE
+);
+GO
+
+-- =====================================================
+-- DASHBOARD SNAPSHOT
+-- Precomputed admin dashboard figures, rebuilt by
+-- sp_RefreshDashboardSnapshot on a schedule and after writes.
+-- One stats row (snapshot_id = 1) plus the chart distributions.
+-- =====================================================
+CREATE TABLE DashboardSnapshot (
+    snapshot_id         TINYINT PRIMARY KEY CHECK (snapshot_id = 1),
+    total_cakes         INT NOT NULL,
+    total_designs       INT NOT NULL,
+    total_customers     INT NOT NULL,
+    total_reviews       INT NOT NULL,
+    overall_avg_rating  DECIMAL(9,6),
+    available_cakes     INT NOT NULL,
+    refreshed_at        DATETIME2(3) NOT NULL,   -- UTC
+    refresh_ms          INT NOT NULL
+);
+GO
+
+CREATE TABLE DashboardSnapshotDistribution (
+    dimension       NVARCHAR(20) NOT NULL,       -- 'complexity', 'rating', 'city'
+    sort_order      INT NOT NULL,
+    label           NVARCHAR(100) NOT NULL,
+    value           INT NOT NULL,
+    
+    CONSTRAINT PK_DashboardSnapshotDistribution PRIMARY KEY (dimension, sort_order)
+);
+GO
+
+-- =====================================================
+-- REVIEW MODERATION JOBS
+-- One row per bulk hide/unhide/delete request. The job runs in chunks,
+-- each its own transaction that also advances "processed", so progress
+-- always matches what is committed.
+-- =====================================================
+CREATE TABLE ReviewModerationJobs (
+    job_id          INT IDENTITY(1,1) PRIMARY KEY,
+    action          NVARCHAR(10) NOT NULL,       -- 'hide', 'unhide', 'delete'
+    criteria        NVARCHAR(MAX) NOT NULL,      -- JSON: review IDs or list filters
+    status          NVARCHAR(10) NOT NULL DEFAULT 'running',  -- 'running', 'done', 'failed'
+    total           INT NOT NULL DEFAULT 0,      -- matching reviews when the job started
+    processed       INT NOT NULL DEFAULT 0,
+    chunks          INT NOT NULL DEFAULT 0,
+    error           NVARCHAR(4000),
+    started_at      DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME(),
+    updated_at      DATETIME2(3) NOT NULL                 -- heartbeat: last committed chunk
+        CONSTRAINT DF_ReviewModerationJobs_updated_at DEFAULT SYSUTCDATETIME(),
+    finished_at     DATETIME2(3)
+);
+GO
+
 -- =====================================================
 -- ADMIN USERS TABLE (for GUI authentication)
 -- =====================================================
@@ -132,21 +210,54 @@ CREATE INDEX IX_CakeDesigns_CakeID ON CakeDesigns(cake_id);
 CREATE INDEX IX_CakeDesigns_Theme ON CakeDesigns(theme);
 CREATE INDEX IX_CakeDesigns_ComplexityLevel ON CakeDesigns(complexity_level);
 CREATE INDEX IX_CakeDesigns_CreatedAt ON CakeDesigns(created_at);
+-- Homepage order (featured first) and keyset paging
+CREATE INDEX IX_CakeDesigns_Featured ON CakeDesigns(featured DESC, design_id);
 
 -- Customers indexes
 CREATE INDEX IX_Customers_Email ON Customers(email);
 CREATE INDEX IX_Customers_City ON Customers(city);
 CREATE INDEX IX_Customers_CreatedAt ON Customers(created_at);
+-- Admin typeahead (name prefix search)
+CREATE INDEX IX_Customers_FullName ON Customers(full_name);
 
 -- Reviews indexes
 CREATE INDEX IX_Reviews_CustomerID ON Reviews(customer_id);
-CREATE INDEX IX_Reviews_DesignID ON Reviews(design_id);
 CREATE INDEX IX_Reviews_Rating ON Reviews(rating);
 CREATE INDEX IX_Reviews_ReviewDate ON Reviews(review_date);
+-- Moderation list: a filter column followed by the date sort key
+CREATE INDEX IX_Reviews_DesignID_ReviewDate ON Reviews(design_id, review_date);
+CREATE INDEX IX_Reviews_Rating_ReviewDate ON Reviews(rating, review_date);
+CREATE INDEX IX_Reviews_Hidden_ReviewDate ON Reviews(review_date) WHERE is_hidden = 1;
+
+-- DesignRatingStats indexes (top-rated ordering)
+CREATE INDEX IX_DesignRatingStats_Rating ON DesignRatingStats(avg_rating DESC, rating_count DESC);
 
 PRINT 'Indexes created successfully.';
 GO
 
+-- =====================================================
+-- PRICING
+-- Inline table-valued function, expanded into the calling query like a
+-- view, so it prices a whole result set in one pass (unlike a scalar UDF,
+-- which runs per row and keeps the plan serial). Defined before the views
+-- and procedures that CROSS APPLY it.
+-- =====================================================
+
+-- Design price: cake base price times the complexity multiplier
+CREATE FUNCTION fn_PriceForComplexity(@base_price DECIMAL(10,2), @complexity_level NVARCHAR(20))
+RETURNS TABLE
+AS
+RETURN
+    SELECT CAST(@base_price *
+        CASE @complexity_level
+            WHEN 'Simple' THEN 1.0
+            WHEN 'Moderate' THEN 1.25
+            WHEN 'Complex' THEN 1.5
+            WHEN 'Expert' THEN 2.0
+            ELSE 1.0
+        END AS DECIMAL(10,2)) AS calculated_price;
+GO
+
 -- =====================================================
 -- VIEWS
 -- Pre-defined queries for common data retrieval
@@ -177,17 +288,18 @@ SELECT
     cd.topper_type,
     cd.complexity_level,
     cd.image_url,
+    cd.featured,
+    cd.created_at,
     c.cake_name,
     c.flavor,
     c.base_price,
-    (SELECT AVG(CAST(r.rating AS DECIMAL(3,2))) 
-     FROM Reviews r 
-     WHERE r.design_id = cd.design_id) AS avg_rating,
-    (SELECT COUNT(*) 
-     FROM Reviews r 
-     WHERE r.design_id = cd.design_id) AS review_count
+    p.calculated_price,
+    rs.avg_rating,
+    ISNULL(rs.rating_count, 0) AS review_count
 FROM CakeDesigns cd
-JOIN Cakes c ON cd.cake_id = c.cake_id;
+JOIN Cakes c ON cd.cake_id = c.cake_id
+CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+LEFT JOIN DesignRatingStats rs ON rs.design_id = cd.design_id;
 GO
 
 -- View 3: Customer activity summary
@@ -212,13 +324,12 @@ SELECT
     cd.theme,
     c.cake_name,
     c.flavor,
-    AVG(CAST(r.rating AS DECIMAL(3,2))) AS avg_rating,
-    COUNT(r.review_id) AS review_count
+    rs.avg_rating,
+    rs.rating_count AS review_count
 FROM CakeDesigns cd
 JOIN Cakes c ON cd.cake_id = c.cake_id
-JOIN Reviews r ON cd.design_id = r.design_id
-GROUP BY cd.design_id, cd.theme, c.cake_name, c.flavor
-HAVING AVG(CAST(r.rating AS DECIMAL(3,2))) >= 4;
+JOIN DesignRatingStats rs ON rs.design_id = cd.design_id
+WHERE rs.rating_count > 0 AND rs.avg_rating >= 4;
 GO
 
 PRINT 'Views created successfully.';
@@ -309,6 +420,87 @@ BEGIN
 END;
 GO
 
+-- Trigger 5: Keep DesignRatingStats in step with visible reviews
+-- Applies the net change of each statement (rows in "inserted" minus rows
+-- in "deleted") per design, so inserts, rating edits, hide/unhide, moves
+-- between designs and deletes - single or bulk - all cost one MERGE.
+CREATE TRIGGER trg_MaintainDesignRatingStats
+ON Reviews
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    WITH changes AS (
+        SELECT design_id, rating, 1 AS delta FROM inserted WHERE ISNULL(is_hidden, 0) = 0
+        UNION ALL
+        SELECT design_id, rating, -1 AS delta FROM deleted WHERE ISNULL(is_hidden, 0) = 0
+    ),
+    net AS (
+        SELECT 
+            design_id,
+            SUM(delta * rating) AS rating_sum,
+            SUM(delta) AS rating_count,
+            SUM(CASE WHEN rating = 1 THEN delta ELSE 0 END) AS stars_1,
+            SUM(CASE WHEN rating = 2 THEN delta ELSE 0 END) AS stars_2,
+            SUM(CASE WHEN rating = 3 THEN delta ELSE 0 END) AS stars_3,
+            SUM(CASE WHEN rating = 4 THEN delta ELSE 0 END) AS stars_4,
+            SUM(CASE WHEN rating = 5 THEN delta ELSE 0 END) AS stars_5
+        FROM changes
+        GROUP BY design_id
+    )
+    MERGE DesignRatingStats WITH (HOLDLOCK) AS rs
+    USING (
+        SELECT n.* FROM net n
+        WHERE (n.rating_count <> 0 OR n.rating_sum <> 0
+               OR n.stars_1 <> 0 OR n.stars_2 <> 0 OR n.stars_3 <> 0 OR n.stars_4 <> 0 OR n.stars_5 <> 0)
+            -- Skip designs removed by this statement's cascade (their stats row went with them)
+            AND EXISTS (SELECT 1 FROM CakeDesigns cd WHERE cd.design_id = n.design_id)
+    ) AS n
+    ON rs.design_id = n.design_id
+    WHEN MATCHED THEN UPDATE SET
+        rating_sum = rs.rating_sum + n.rating_sum,
+        rating_count = rs.rating_count + n.rating_count,
+        stars_1 = rs.stars_1 + n.stars_1,
+        stars_2 = rs.stars_2 + n.stars_2,
+        stars_3 = rs.stars_3 + n.stars_3,
+        stars_4 = rs.stars_4 + n.stars_4,
+        stars_5 = rs.stars_5 + n.stars_5,
+        updated_at = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (design_id, rating_sum, rating_count, stars_1, stars_2, stars_3, stars_4, stars_5)
+        VALUES (n.design_id, n.rating_sum, n.rating_count, n.stars_1, n.stars_2, n.stars_3, n.stars_4, n.stars_5);
+END;
+GO
+
+-- Trigger 6: Audit moderation (hide, unhide, delete)
+-- Set-based, so a bulk statement logs all of its rows in one INSERT, in
+-- the same transaction as the change itself.
+CREATE TRIGGER trg_LogReviewModeration
+ON Reviews
+AFTER UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    IF NOT EXISTS (SELECT 1 FROM inserted)
+    BEGIN
+        INSERT INTO ReviewAuditLog (review_id, customer_id, design_id, rating, action_type)
+        SELECT review_id, customer_id, design_id, rating, 'DELETE'
+        FROM deleted;
+        RETURN;
+    END
+    
+    IF UPDATE(is_hidden)
+        INSERT INTO ReviewAuditLog (review_id, customer_id, design_id, rating, action_type)
+        SELECT i.review_id, i.customer_id, i.design_id, i.rating,
+               CASE WHEN i.is_hidden = 1 THEN 'HIDE' ELSE 'UNHIDE' END
+        FROM inserted i
+        JOIN deleted d ON d.review_id = i.review_id
+        WHERE i.is_hidden <> d.is_hidden;
+END;
+GO
+
 PRINT 'Triggers created successfully.';
 GO
 
@@ -318,6 +510,8 @@ GO
 -- =====================================================
 
 -- Function 1: Calculate total price for a design (base + complexity modifier)
+-- Kept for single lookups and as the reference for scripts/check_pricing_parity.py;
+-- queries over many designs use fn_PriceForComplexity instead
 CREATE FUNCTION fn_CalculateDesignPrice(@design_id INT)
 RETURNS DECIMAL(10,2)
 AS
@@ -347,8 +541,9 @@ AS
 BEGIN
     DECLARE @avg_rating DECIMAL(3,2);
     
-    SELECT @avg_rating = AVG(CAST(rating AS DECIMAL(3,2)))
-    FROM Reviews
+    -- One row lookup instead of aggregating the design's reviews
+    SELECT @avg_rating = avg_rating
+    FROM DesignRatingStats
     WHERE design_id = @design_id;
     
     RETURN ISNULL(@avg_rating, 0);
@@ -402,18 +597,37 @@ GO
 -- =====================================================
 
 -- Procedure 1: Get dashboard statistics
+-- Reads the precomputed DashboardSnapshot; counts live only until the
+-- first refresh has run. age_seconds tells the caller how stale it is.
 CREATE PROCEDURE sp_GetDashboardStats
 AS
 BEGIN
     SET NOCOUNT ON;
     
-    SELECT 
-        (SELECT COUNT(*) FROM Cakes) AS total_cakes,
-        (SELECT COUNT(*) FROM CakeDesigns) AS total_designs,
-        (SELECT COUNT(*) FROM Customers) AS total_customers,
-        (SELECT COUNT(*) FROM Reviews) AS total_reviews,
-        (SELECT AVG(CAST(rating AS DECIMAL(3,2))) FROM Reviews) AS overall_avg_rating,
-        (SELECT COUNT(*) FROM Cakes WHERE availability = 1) AS available_cakes;
+    IF EXISTS (SELECT 1 FROM DashboardSnapshot WHERE snapshot_id = 1)
+        SELECT 
+            total_cakes,
+            total_designs,
+            total_customers,
+            total_reviews,
+            overall_avg_rating,
+            overall_avg_rating AS avg_rating,
+            available_cakes,
+            refreshed_at,
+            DATEDIFF(SECOND, refreshed_at, SYSUTCDATETIME()) AS age_seconds
+        FROM DashboardSnapshot
+        WHERE snapshot_id = 1;
+    ELSE
+        SELECT 
+            (SELECT COUNT(*) FROM Cakes) AS total_cakes,
+            (SELECT COUNT(*) FROM CakeDesigns) AS total_designs,
+            (SELECT COUNT(*) FROM Customers) AS total_customers,
+            (SELECT COUNT(*) FROM Reviews) AS total_reviews,
+            (SELECT AVG(CAST(rating AS DECIMAL(3,2))) FROM Reviews) AS overall_avg_rating,
+            (SELECT AVG(CAST(rating AS DECIMAL(3,2))) FROM Reviews) AS avg_rating,
+            (SELECT COUNT(*) FROM Cakes WHERE availability = 1) AS available_cakes,
+            CAST(NULL AS DATETIME2(3)) AS refreshed_at,
+            CAST(NULL AS INT) AS age_seconds;
 END;
 GO
 
@@ -462,15 +676,15 @@ BEGIN
         cd.complexity_level,
         c.cake_name,
         c.flavor,
-        dbo.fn_CalculateDesignPrice(cd.design_id) AS total_price,
-        (SELECT AVG(CAST(r.rating AS DECIMAL(3,2))) 
-         FROM Reviews r WHERE r.design_id = cd.design_id) AS avg_rating,
-        (SELECT COUNT(*) 
-         FROM Reviews r WHERE r.design_id = cd.design_id) AS review_count
-    FROM CakeDesigns cd
+        p.calculated_price AS total_price,
+        rs.avg_rating,
+        rs.rating_count AS review_count
+    FROM DesignRatingStats rs
+    JOIN CakeDesigns cd ON cd.design_id = rs.design_id
     JOIN Cakes c ON cd.cake_id = c.cake_id
-    WHERE EXISTS (SELECT 1 FROM Reviews r WHERE r.design_id = cd.design_id)
-    ORDER BY avg_rating DESC, review_count DESC;
+    CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+    WHERE rs.rating_count > 0
+    ORDER BY rs.avg_rating DESC, rs.rating_count DESC;
 END;
 GO
 
@@ -513,15 +727,170 @@ BEGIN
         cd.complexity_level,
         cd.image_url,
         cd.created_at,
-        dbo.fn_CalculateDesignPrice(cd.design_id) AS calculated_price,
-        dbo.fn_GetDesignAvgRating(cd.design_id) AS avg_rating,
-        (SELECT COUNT(*) FROM Reviews WHERE design_id = cd.design_id) AS review_count
+        p.calculated_price,
+        ISNULL(CAST(rs.avg_rating AS DECIMAL(3,2)), 0) AS avg_rating,
+        ISNULL(rs.rating_count, 0) AS review_count
     FROM CakeDesigns cd
+    JOIN Cakes c ON cd.cake_id = c.cake_id
+    CROSS APPLY dbo.fn_PriceForComplexity(c.base_price, cd.complexity_level) p
+    LEFT JOIN DesignRatingStats rs ON rs.design_id = cd.design_id
     WHERE cd.cake_id = @cake_id
     ORDER BY cd.created_at DESC;
 END;
 GO
 
+-- Procedure 6: Everything the design detail page needs, in one round trip
+-- Result set 1: the design with price, ratings and cake attributes
+-- Result set 2: its visible reviews with customer info, newest first
+CREATE PROCEDURE sp_GetDesignDetail
+    @design_id INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    
+    SELECT 
+        dr.*,
+        c.frosting,
+        c.size
+    FROM vw_DesignWithRatings dr
+    JOIN CakeDesigns cd ON cd.design_id = dr.design_id
+    JOIN Cakes c ON c.cake_id = cd.cake_id
+    WHERE dr.design_id = @design_id;
+    
+    SELECT 
+        r.*,
+        cu.full_name AS customer_name,
+        cu.city
+    FROM Reviews r
+    JOIN Customers cu ON r.customer_id = cu.customer_id
+    WHERE r.design_id = @design_id AND r.is_hidden = 0
+    ORDER BY r.review_date DESC;
+END;
+GO
+
+-- Procedure 7: Rebuild the dashboard snapshot
+-- Skips the work when another session is already refreshing, or when the
+-- snapshot is younger than @min_age_seconds (so several app workers on the
+-- same schedule refresh it once).
+CREATE PROCEDURE sp_RefreshDashboardSnapshot
+    @min_age_seconds INT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+    
+    DECLARE @started DATETIME2(3) = SYSUTCDATETIME();
+    DECLARE @lock INT;
+    DECLARE @nested BIT = CASE WHEN @@TRANCOUNT > 0 THEN 1 ELSE 0 END;
+    
+    -- Inside a caller's transaction (e.g. a migration) work under a
+    -- savepoint: a plain ROLLBACK would undo the caller's work too
+    IF @nested = 1
+        SAVE TRANSACTION RefreshDashboardSnapshot;
+    ELSE
+        BEGIN TRANSACTION;
+    EXEC @lock = sp_getapplock @Resource = 'DashboardSnapshot', @LockMode = 'Exclusive',
+                               @LockOwner = 'Transaction', @LockTimeout = 0;
+    IF @lock < 0
+        OR EXISTS (SELECT 1 FROM DashboardSnapshot
+                   WHERE snapshot_id = 1
+                     AND refreshed_at > DATEADD(SECOND, -@min_age_seconds, SYSUTCDATETIME()))
+    BEGIN
+        IF @nested = 1
+            ROLLBACK TRANSACTION RefreshDashboardSnapshot;
+        ELSE
+            ROLLBACK TRANSACTION;
+        RETURN;
+    END
+    
+    DECLARE @total_cakes INT = (SELECT COUNT(*) FROM Cakes);
+    DECLARE @available_cakes INT = (SELECT COUNT(*) FROM Cakes WHERE availability = 1);
+    DECLARE @total_designs INT = (SELECT COUNT(*) FROM CakeDesigns);
+    DECLARE @total_customers INT = (SELECT COUNT(*) FROM Customers);
+    DECLARE @total_reviews INT, @avg_rating DECIMAL(9,6);
+    SELECT @total_reviews = COUNT(*), @avg_rating = AVG(CAST(rating AS DECIMAL(3,2))) FROM Reviews;
+    
+    DELETE FROM DashboardSnapshotDistribution;
+    
+    INSERT INTO DashboardSnapshotDistribution (dimension, sort_order, label, value)
+    SELECT 'complexity',
+        CASE complexity_level WHEN 'Simple' THEN 1 WHEN 'Moderate' THEN 2
+                              WHEN 'Complex' THEN 3 WHEN 'Expert' THEN 4 ELSE 5 END,
+        complexity_level, COUNT(*)
+    FROM CakeDesigns
+    GROUP BY complexity_level;
+    
+    INSERT INTO DashboardSnapshotDistribution (dimension, sort_order, label, value)
+    SELECT 'rating', rating, CAST(rating AS NVARCHAR(100)), COUNT(*)
+    FROM Reviews
+    GROUP BY rating;
+    
+    -- Top 6 cities by customer count
+    INSERT INTO DashboardSnapshotDistribution (dimension, sort_order, label, value)
+    SELECT TOP 6 'city', ROW_NUMBER() OVER (ORDER BY COUNT(*) DESC, city), city, COUNT(*)
+    FROM Customers
+    GROUP BY city
+    ORDER BY COUNT(*) DESC, city;
+    
+    MERGE DashboardSnapshot AS s
+    USING (SELECT 1 AS snapshot_id) AS k ON s.snapshot_id = k.snapshot_id
+    WHEN MATCHED THEN UPDATE SET
+        total_cakes = @total_cakes,
+        total_designs = @total_designs,
+        total_customers = @total_customers,
+        total_reviews = @total_reviews,
+        overall_avg_rating = @avg_rating,
+        available_cakes = @available_cakes,
+        refreshed_at = SYSUTCDATETIME(),
+        refresh_ms = DATEDIFF(MILLISECOND, @started, SYSUTCDATETIME())
+    WHEN NOT MATCHED THEN
+        INSERT (snapshot_id, total_cakes, total_designs, total_customers, total_reviews,
+                overall_avg_rating, available_cakes, refreshed_at, refresh_ms)
+        VALUES (1, @total_cakes, @total_designs, @total_customers, @total_reviews,
+                @avg_rating, @available_cakes, SYSUTCDATETIME(),
+                DATEDIFF(MILLISECOND, @started, SYSUTCDATETIME()));
+    
+    IF @nested = 0
+        COMMIT TRANSACTION;
+END;
+GO
+
+-- Procedure 8: Recompute DesignRatingStats from Reviews
+-- For backfilling an existing database or repairing drift; the trigger
+-- keeps the table current in normal operation.
+CREATE PROCEDURE sp_RebuildDesignRatingStats
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+    
+    DECLARE @nested BIT = CASE WHEN @@TRANCOUNT > 0 THEN 1 ELSE 0 END;
+    
+    -- Inside a caller's transaction (e.g. a migration) take a savepoint and
+    -- leave committing to the caller
+    IF @nested = 1
+        SAVE TRANSACTION RebuildDesignRatingStats;
+    ELSE
+        BEGIN TRANSACTION;
+    DELETE FROM DesignRatingStats WITH (TABLOCKX);
+    INSERT INTO DesignRatingStats (design_id, rating_sum, rating_count, stars_1, stars_2, stars_3, stars_4, stars_5)
+    SELECT 
+        design_id,
+        SUM(rating),
+        COUNT(*),
+        SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+        SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+    FROM Reviews
+    WHERE ISNULL(is_hidden, 0) = 0
+    GROUP BY design_id;
+    IF @nested = 0
+        COMMIT TRANSACTION;
+END;
+GO
+
 PRINT 'Stored Procedures created successfully.';
 GO
 
@@ -533,11 +902,11 @@ PRINT '========================================';
 PRINT 'CRUMBEAR DATABASE SCHEMA v2.0';
 PRINT '========================================';
 PRINT 'Tables: Cakes, CakeDesigns, Customers, Reviews';
-PRINT 'Supporting: AdminUsers, ReviewAuditLog';
+PRINT 'Supporting: AdminUsers, ReviewAuditLog, DesignRatingStats, DashboardSnapshot(+Distribution), ReviewModerationJobs';
 PRINT 'Views: 4 (vw_CakeWithDesignCount, vw_DesignWithRatings, vw_CustomerActivity, vw_TopRatedDesigns)';
-PRINT 'Triggers: 4';
-PRINT 'Functions: 4';
-PRINT 'Stored Procedures: 5';
+PRINT 'Triggers: 6';
+PRINT 'Functions: 5';
+PRINT 'Stored Procedures: 8';
 PRINT 'Indexes: 12';
 PRINT '========================================';
 GO
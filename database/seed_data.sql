@@ -13,8 +13,9 @@ GO
 -- =====================================================
 PRINT 'Clearing existing data...';
 
-DELETE FROM ReviewAuditLog;
 DELETE FROM Reviews;
+-- After Reviews: deleting reviews writes DELETE audit rows
+DELETE FROM ReviewAuditLog;
 DELETE FROM CakeDesigns;
 DELETE FROM Customers;
 DELETE FROM Cakes;
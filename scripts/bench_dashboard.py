@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: admin dashboard queries, sequential vs fan-out
+=========================================================
+Runs the admin dashboard's queries (app.dashboard_calls()) one after
+another, as the route used to, and concurrently through fan_out(). It then
+prints the median wall time of each next to the slowest single query,
+which is the floor for the concurrent run. The result cache is turned off
+so every run reaches the database.
+Run with: python scripts/bench_dashboard.py [--repeat 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from app import dashboard_calls
+from db_connection import configure_result_cache, fan_out, get_pool, POOL_CONFIG, FANOUT_WORKERS
+
+def run_sequential():
+    return {name: call() for name, call in dashboard_calls().items()}
+
+def run_fan_out():
+    return fan_out(dashboard_calls())
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard queries: sequential vs fan_out()')
+    parser.add_argument('--repeat', type=int, default=10, help='Measured runs per mode')
+    args = parser.parse_args()
+    configure_result_cache(None)
+
+    # Open enough connections up front so pool growth isn't measured
+    pool = get_pool()
+    entries = [pool.acquire() for _ in range(min(FANOUT_WORKERS, POOL_CONFIG['max_size']))]
+    for entry in entries:
+        pool.release(entry)
+
+    # Warm plans and caches, and check both modes return the same data
+    assert run_sequential() == run_fan_out()
+
+    per_query = {name: [] for name in dashboard_calls()}
+    sequential, concurrent = [], []
+    for _ in range(args.repeat):
+        for name, call in dashboard_calls().items():
+            per_query[name].append(timed(call))
+        sequential.append(timed(run_sequential))
+        concurrent.append(timed(run_fan_out))
+
+    print(f"\nDashboard queries, median of {args.repeat} runs ({FANOUT_WORKERS} fan-out workers)")
+    print("-" * 60)
+    for name, timings in per_query.items():
+        print(f"  {name:<24} {statistics.median(timings):8.1f} ms")
+    print("-" * 60)
+    seq_ms = statistics.median(sequential)
+    fan_ms = statistics.median(concurrent)
+    slowest = max(statistics.median(t) for t in per_query.values())
+    print(f"  {'sequential (sum)':<24} {seq_ms:8.1f} ms")
+    print(f"  {'fan_out()':<24} {fan_ms:8.1f} ms   {seq_ms / fan_ms:5.2f}x")
+    print(f"  {'slowest single query':<24} {slowest:8.1f} ms")
+    print("-" * 60)
+
+if __name__ == "__main__":
+    main()
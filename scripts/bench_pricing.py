@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: catalog query pricing
+================================
+Times the homepage catalog query with per-row scalar pricing
+(dbo.fn_CalculateDesignPrice, the old query) against the set-based price
+column of vw_DesignWithRatings (fn_PriceForComplexity).
+
+CakeDesigns is topped up to 1k, 10k and 100k rows inside one transaction
+that is rolled back at the end, so the database is left as it was.
+Run with: python scripts/bench_pricing.py [--sizes 1000 10000 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+# The 100k scalar-UDF run can take longer than the default statement timeout
+os.environ.setdefault('DB_QUERY_TIMEOUT', '0')
+
+from db_connection import get_db_connection
+
+# Old query: every column of the view except its price, plus the scalar UDF
+BEFORE_QUERY = """
+    SELECT
+        dr.design_id, dr.theme, dr.color_palette, dr.topper_type, dr.complexity_level,
+        dr.image_url, dr.featured, dr.created_at, dr.cake_name, dr.flavor, dr.base_price,
+        dr.avg_rating, dr.review_count,
+        dbo.fn_CalculateDesignPrice(dr.design_id) AS calculated_price
+    FROM vw_DesignWithRatings dr
+    ORDER BY dr.featured DESC, dr.design_id
+"""
+
+AFTER_QUERY = """
+    SELECT dr.*
+    FROM vw_DesignWithRatings dr
+    ORDER BY dr.featured DESC, dr.design_id
+"""
+
+# Copies existing designs (round-robin) until the table holds the target count
+TOP_UP_SQL = """
+    WITH numbers AS (
+        SELECT TOP (?) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS n
+        FROM sys.all_objects a CROSS JOIN sys.all_objects b
+    ),
+    source AS (
+        SELECT cake_id, theme, color_palette, topper_type, complexity_level, image_url,
+               ROW_NUMBER() OVER (ORDER BY design_id) AS rn,
+               COUNT(*) OVER () AS total
+        FROM CakeDesigns
+    )
+    INSERT INTO CakeDesigns (cake_id, theme, color_palette, topper_type, complexity_level, image_url)
+    SELECT s.cake_id, s.theme, s.color_palette, s.topper_type, s.complexity_level, s.image_url
+    FROM numbers n
+    JOIN source s ON s.rn = (n.n - 1) % s.total + 1
+"""
+
+def time_query(cursor, query, repeat):
+    """Median wall time (ms) to execute and fetch every row"""
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query)
+        rows = len(cursor.fetchall())
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scalar vs set-based design pricing')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Design counts to measure at')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query and size')
+    args = parser.parse_args()
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM CakeDesigns")
+            existing = cursor.fetchone()[0]
+            if existing == 0:
+                print("❌ CakeDesigns is empty; load seed data first")
+                return
+
+            print(f"\nCatalog query latency, median of {args.repeat} runs (execute + fetch)")
+            print("-" * 72)
+            print(f"  {'designs':>8}  {'scalar UDF':>12}  {'set-based':>12}  {'speedup':>8}")
+            print("-" * 72)
+            for size in sorted(args.sizes):
+                cursor.execute("SELECT COUNT(*) FROM CakeDesigns")
+                current = cursor.fetchone()[0]
+                if size > current:
+                    cursor.execute(TOP_UP_SQL, (size - current,))
+                elif size < current:
+                    print(f"  {size:>8}  skipped ({current} designs already)")
+                    continue
+
+                # Warm both plans before timing
+                time_query(cursor, BEFORE_QUERY, 1)
+                time_query(cursor, AFTER_QUERY, 1)
+                before_ms, before_rows = time_query(cursor, BEFORE_QUERY, args.repeat)
+                after_ms, after_rows = time_query(cursor, AFTER_QUERY, args.repeat)
+                assert before_rows == after_rows == size, (before_rows, after_rows, size)
+                print(f"  {size:>8}  {before_ms:>9.1f} ms  {after_ms:>9.1f} ms  "
+                      f"{before_ms / after_ms:>7.2f}x")
+            print("-" * 72)
+        finally:
+            # Leave the catalog exactly as it was
+            conn.rollback()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: row materialization
+===================================
+Compares the old execute_query path (dict(zip(...)) + serialize_row per row)
+with the per-column converters from make_row_materializer() on a synthetic
+result shaped like SELECT dr.*, calculated_price FROM vw_DesignWithRatings.
+No database is needed.
+Run with: python scripts/bench_row_materialization.py [--rows 1000] [--repeat 20]
+"""
+
+import argparse
+import random
+import sys
+import os
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from db_connection import serialize_row, materialize_rows
+
+# (name, type_code) pairs as pyodbc reports them in cursor.description
+DESIGN_COLUMNS = [
+    ('design_id', int),
+    ('theme', str),
+    ('color_palette', str),
+    ('topper_type', str),
+    ('complexity_level', str),
+    ('image_url', str),
+    ('featured', bool),
+    ('created_at', datetime),
+    ('cake_name', str),
+    ('flavor', str),
+    ('base_price', Decimal),
+    ('avg_rating', Decimal),
+    ('review_count', int),
+    ('calculated_price', Decimal),
+]
+
+class FakeCursor:
+    """Just enough of a pyodbc cursor for materialize_rows()"""
+    def __init__(self, columns):
+        self.description = [(name, type_code, None, None, None, None, True)
+                            for name, type_code in columns]
+
+def make_rows(count):
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(count):
+        rows.append((
+            i + 1,
+            f"Theme {i % 40}",
+            'Pink, White, Gold',
+            random.choice(['Candles', 'Berries', None]),
+            random.choice(['Simple', 'Moderate', 'Complex', 'Expert']),
+            f"https://images.unsplash.com/photo-{1000000 + i}?w=400",
+            i % 7 == 0,
+            start + timedelta(minutes=i),
+            f"Cake {i % 720}",
+            'Chocolate',
+            Decimal('1250.00'),
+            Decimal('4.333333') if i % 3 else None,
+            i % 5,
+            Decimal('1562.50'),
+        ))
+    return rows
+
+def old_path(cursor, rows):
+    columns = [column[0] for column in cursor.description]
+    results = []
+    for row in rows:
+        row_dict = dict(zip(columns, row))
+        results.append(serialize_row(row_dict))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark row materialization')
+    parser.add_argument('--rows', type=int, default=1000, help='Rows per result set')
+    parser.add_argument('--repeat', type=int, default=20, help='Result sets per measurement')
+    args = parser.parse_args()
+
+    cursor = FakeCursor(DESIGN_COLUMNS)
+    rows = make_rows(args.rows)
+
+    # Both paths must agree before timing means anything
+    assert old_path(cursor, rows) == materialize_rows(cursor, rows)
+
+    cases = [
+        ('serialize_row (old)', lambda: old_path(cursor, rows)),
+        ("materialize_rows 'dict'", lambda: materialize_rows(cursor, rows)),
+        ("materialize_rows 'tuple'", lambda: materialize_rows(cursor, rows, 'tuple')),
+        ("materialize_rows 'namedtuple'", lambda: materialize_rows(cursor, rows, 'namedtuple')),
+    ]
+
+    print(f"\n{args.rows} rows x {len(DESIGN_COLUMNS)} columns, best of 5 runs of {args.repeat}")
+    print("-" * 60)
+    baseline = None
+    for label, fn in cases:
+        best = min(timeit.repeat(fn, number=args.repeat, repeat=5)) / args.repeat
+        baseline = baseline or best
+        print(f"  {label:<30} {best * 1000:8.3f} ms   {baseline / best:5.2f}x")
+    print("-" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Pricing parity check
+====================
+Proves that the set-based pricing (fn_PriceForComplexity, used by
+vw_DesignWithRatings, sp_GetTopDesigns and sp_GetCakeDesigns) returns the
+same price as the scalar fn_CalculateDesignPrice for every design.
+
+Two passes:
+  1. Every existing design, compared through the view and the procedures.
+  2. Synthetic designs for each complexity level over base prices picked
+     to exercise rounding. They are inserted in a transaction that is
+     always rolled back.
+
+Exits with status 1 if any price differs.
+Run with: python scripts/check_pricing_parity.py
+"""
+
+import sys
+import os
+from decimal import Decimal
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from db_connection import execute_query, get_db_connection
+
+COMPLEXITY_LEVELS = ['Simple', 'Moderate', 'Complex', 'Expert']
+
+# Odd cents make the 1.25 / 1.5 multipliers round; the rest are range edges
+BASE_PRICES = ['0.00', '0.01', '0.03', '0.05', '0.99', '1.01', '199.99', '250.00',
+               '1234.57', '9999.99', '123456.78', '3999999.99']
+
+def check_existing_designs():
+    """Compare the view's price with the scalar UDF for every design"""
+    print("🔍 Existing designs (vw_DesignWithRatings)...")
+    rows = execute_query("""
+        SELECT dr.complexity_level,
+               COUNT(*) AS designs,
+               SUM(CASE WHEN dr.calculated_price = dbo.fn_CalculateDesignPrice(dr.design_id)
+                        THEN 0 ELSE 1 END) AS mismatches
+        FROM vw_DesignWithRatings dr
+        GROUP BY dr.complexity_level
+        ORDER BY dr.complexity_level
+    """)
+    failures = 0
+    for row in rows:
+        status = "✅" if row['mismatches'] == 0 else "❌"
+        print(f"  {status} {row['complexity_level']:<10} {row['designs']:>8} designs, "
+              f"{row['mismatches']} mismatches")
+        failures += row['mismatches']
+
+    if failures:
+        sample = execute_query("""
+            SELECT TOP 10 dr.design_id, dr.complexity_level, dr.base_price,
+                   dr.calculated_price, dbo.fn_CalculateDesignPrice(dr.design_id) AS scalar_price
+            FROM vw_DesignWithRatings dr
+            WHERE dr.calculated_price <> dbo.fn_CalculateDesignPrice(dr.design_id)
+        """)
+        for row in sample:
+            print(f"     design {row['design_id']} ({row['complexity_level']}, base {row['base_price']}): "
+                  f"view {row['calculated_price']} vs scalar {row['scalar_price']}")
+    return failures
+
+def check_procedures():
+    """Compare the prices returned by the procedures with the scalar UDF"""
+    print("🔍 Stored procedures...")
+    failures = 0
+    expected = {row['design_id']: row['price'] for row in execute_query(
+        "SELECT design_id, dbo.fn_CalculateDesignPrice(design_id) AS price FROM CakeDesigns"
+    )}
+
+    top = execute_query("EXEC sp_GetTopDesigns @top_count = ?", (1000,))
+    bad = [row for row in top if row['total_price'] != expected[row['design_id']]]
+    print(f"  {'✅' if not bad else '❌'} sp_GetTopDesigns   {len(top):>8} designs, {len(bad)} mismatches")
+    failures += len(bad)
+
+    cakes = execute_query("SELECT TOP 50 cake_id FROM Cakes ORDER BY cake_id")
+    checked = 0
+    bad = []
+    for cake in cakes:
+        designs = execute_query("EXEC sp_GetCakeDesigns @cake_id = ?", (cake['cake_id'],))
+        bad += [row for row in designs if row['calculated_price'] != expected[row['design_id']]]
+        checked += len(designs)
+    print(f"  {'✅' if not bad else '❌'} sp_GetCakeDesigns  {checked:>8} designs, {len(bad)} mismatches")
+    failures += len(bad)
+    return failures
+
+def check_synthetic_designs():
+    """Price one design per (complexity, base price) pair both ways, then roll back"""
+    print("🔍 Synthetic designs (rolled back)...")
+    failures = 0
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            design_ids = []
+            for base_price in BASE_PRICES:
+                cursor.execute(
+                    "INSERT INTO Cakes (cake_name, flavor, frosting, size, base_price) "
+                    "OUTPUT INSERTED.cake_id "
+                    "VALUES ('Parity Check', 'Vanilla', 'Buttercream', '6x3', ?)",
+                    (Decimal(base_price),)
+                )
+                cake_id = cursor.fetchone()[0]
+                for level in COMPLEXITY_LEVELS:
+                    cursor.execute(
+                        "INSERT INTO CakeDesigns (cake_id, theme, color_palette, complexity_level) "
+                        "OUTPUT INSERTED.design_id "
+                        "VALUES (?, 'Parity Check', 'White', ?)",
+                        (cake_id, level)
+                    )
+                    design_ids.append(cursor.fetchone()[0])
+
+            placeholders = ', '.join('?' * len(design_ids))
+            cursor.execute(f"""
+                SELECT dr.complexity_level, dr.base_price, dr.calculated_price,
+                       dbo.fn_CalculateDesignPrice(dr.design_id) AS scalar_price
+                FROM vw_DesignWithRatings dr
+                WHERE dr.design_id IN ({placeholders})
+                ORDER BY dr.complexity_level, dr.base_price
+            """, design_ids)
+            rows = cursor.fetchall()
+        finally:
+            conn.rollback()
+
+    for level in COMPLEXITY_LEVELS:
+        level_rows = [row for row in rows if row.complexity_level == level]
+        bad = [row for row in level_rows if row.calculated_price != row.scalar_price]
+        print(f"  {'✅' if not bad else '❌'} {level:<10} {len(level_rows):>8} prices, {len(bad)} mismatches")
+        for row in bad:
+            print(f"     base {row.base_price}: view {row.calculated_price} vs scalar {row.scalar_price}")
+        failures += len(bad)
+    if len(rows) != len(BASE_PRICES) * len(COMPLEXITY_LEVELS):
+        print(f"  ❌ expected {len(BASE_PRICES) * len(COMPLEXITY_LEVELS)} priced designs, got {len(rows)}")
+        failures += 1
+    return failures
+
+def main():
+    print("=" * 60)
+    print("Pricing parity: fn_PriceForComplexity vs fn_CalculateDesignPrice")
+    print("=" * 60)
+    failures = check_existing_designs()
+    failures += check_procedures()
+    failures += check_synthetic_designs()
+    print("=" * 60)
+    if failures:
+        print(f"❌ {failures} price mismatches")
+        sys.exit(1)
+    print("✅ All prices identical")
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,32 @@
 #!/usr/bin/env python3
 """
 Generate and load seed data directly into the database
+Run with: python scripts/generate_and_load_seed.py [--designs 1000] [--customers 1100] [--reviews 1100]
 """
 
+import argparse
 import random
 import sys
 import os
+import time
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
 
-import pyodbc
-from db_connection import DB_CONFIG
+from db_connection import execute_query, bulk_insert
 
-def get_connection():
-    conn_str = (
-        f"DRIVER={DB_CONFIG['driver']};"
-        f"SERVER={DB_CONFIG['server']};"
-        f"DATABASE=CrumbearDB;"
-        f"UID={DB_CONFIG['username']};"
-        f"PWD={DB_CONFIG['password']};"
-        f"TrustServerCertificate=yes;"
-        f"Encrypt=yes;"
-    )
-    return pyodbc.connect(conn_str, autocommit=True)
+BATCH_SIZE = 5000
 
-def load_cake_designs(conn):
-    """Generate and load 1000 cake designs"""
-    cursor = conn.cursor()
-    
+def count_rows(table):
+    return execute_query(f"SELECT COUNT(*) AS cnt FROM {table}")[0]['cnt']
+
+def reset_table(table):
+    execute_query(f"DELETE FROM {table}", fetch=False)
+    execute_query(f"DBCC CHECKIDENT ('{table}', RESEED, 0)", fetch=False)
+
+def load_cake_designs(count=1000):
+    """Generate and load cake designs (1000 by default)"""
     print("Loading CakeDesigns...")
-    cursor.execute("DELETE FROM CakeDesigns")
-    cursor.execute("DBCC CHECKIDENT ('CakeDesigns', RESEED, 0)")
+    started = time.perf_counter()
+    reset_table('CakeDesigns')
     
     themes = [
         'Cinnamoroll Dream', 'We Bare Bears', 'Hello Kitty', 'Totoro Magic', 'My Melody', 
@@ -55,29 +52,27 @@ def load_cake_designs(conn):
     
     complexities = ['Simple', 'Moderate', 'Complex', 'Expert']
     
-    for i in range(1000):
-        cake_id = random.randint(1, 720)
-        theme = f"{random.choice(themes)} {random.randint(1, 100)}"
-        color = random.choice(colors)
-        topper = random.choice(toppers)
-        complexity = random.choice(complexities)
-        image_url = f"https://images.unsplash.com/photo-{random.randint(1000000, 9999999)}?w=400"
-        
-        cursor.execute("""
-            INSERT INTO CakeDesigns (cake_id, theme, color_palette, topper_type, complexity_level, image_url)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (cake_id, theme, color, topper, complexity, image_url))
-    
-    cursor.execute("SELECT COUNT(*) FROM CakeDesigns")
-    print(f"  ✅ CakeDesigns: {cursor.fetchone()[0]} records")
+    def generate():
+        for i in range(count):
+            cake_id = random.randint(1, 720)
+            theme = f"{random.choice(themes)} {random.randint(1, 100)}"
+            color = random.choice(colors)
+            topper = random.choice(toppers)
+            complexity = random.choice(complexities)
+            image_url = f"https://images.unsplash.com/photo-{random.randint(1000000, 9999999)}?w=400"
+            yield (cake_id, theme, color, topper, complexity, image_url)
+    
+    bulk_insert('CakeDesigns',
+                ['cake_id', 'theme', 'color_palette', 'topper_type', 'complexity_level', 'image_url'],
+                generate(), batch_size=BATCH_SIZE)
+    
+    print(f"  ✅ CakeDesigns: {count_rows('CakeDesigns')} records ({time.perf_counter() - started:.1f}s)")
 
-def load_customers(conn):
-    """Generate and load 1100 customers"""
-    cursor = conn.cursor()
-    
+def load_customers(count=1100):
+    """Generate and load customers (1100 by default)"""
     print("Loading Customers...")
-    cursor.execute("DELETE FROM Customers")
-    cursor.execute("DBCC CHECKIDENT ('Customers', RESEED, 0)")
+    started = time.perf_counter()
+    reset_table('Customers')
     
     # Pet-like names (40%)
     pet_names = [
@@ -111,41 +106,39 @@ def load_customers(conn):
     ] * 15
     
     domains = ['gmail.com', 'yahoo.com', 'outlook.com']
-    used_emails = set()
-    
-    for i in range(1100):
-        # 40% pet names, 60% Filipino names
-        if random.random() < 0.4:
-            name = f"{random.choice(pet_names)} {random.choice(filipino_last)}"
-        else:
-            name = f"{random.choice(filipino_first)} {random.choice(filipino_last)}"
-        
-        # Generate unique email
-        base_email = name.lower().replace(' ', '.').replace("'", "")
-        email = f"{base_email}@{random.choice(domains)}"
-        counter = 1
-        while email in used_emails:
-            email = f"{base_email}{counter}@{random.choice(domains)}"
-            counter += 1
-        used_emails.add(email)
-        
-        city = random.choice(cities)
-        
-        cursor.execute("""
-            INSERT INTO Customers (full_name, email, city)
-            VALUES (?, ?, ?)
-        """, (name, email, city))
     
-    cursor.execute("SELECT COUNT(*) FROM Customers")
-    print(f"  ✅ Customers: {cursor.fetchone()[0]} records")
+    def generate():
+        used_emails = set()
+        for i in range(count):
+            # 40% pet names, 60% Filipino names
+            if random.random() < 0.4:
+                name = f"{random.choice(pet_names)} {random.choice(filipino_last)}"
+            else:
+                name = f"{random.choice(filipino_first)} {random.choice(filipino_last)}"
+            
+            # Generate unique email
+            base_email = name.lower().replace(' ', '.').replace("'", "")
+            email = f"{base_email}@{random.choice(domains)}"
+            counter = 1
+            while email in used_emails:
+                email = f"{base_email}{counter}@{random.choice(domains)}"
+                counter += 1
+            used_emails.add(email)
+            
+            city = random.choice(cities)
+            yield (name, email, city)
+    
+    # Staging keeps the email-validation trigger to one set-based run
+    bulk_insert('Customers', ['full_name', 'email', 'city'], generate(),
+                batch_size=BATCH_SIZE, use_staging=True)
+    
+    print(f"  ✅ Customers: {count_rows('Customers')} records ({time.perf_counter() - started:.1f}s)")
 
-def load_reviews(conn):
-    """Generate and load 1100 reviews"""
-    cursor = conn.cursor()
-    
+def load_reviews(count=1100, design_count=1000, customer_count=1100):
+    """Generate and load reviews (1100 by default)"""
     print("Loading Reviews...")
-    cursor.execute("DELETE FROM Reviews")
-    cursor.execute("DBCC CHECKIDENT ('Reviews', RESEED, 0)")
+    started = time.perf_counter()
+    reset_table('Reviews')
     
     # Good reviews (80%)
     good_reviews = [
@@ -190,71 +183,65 @@ def load_reviews(conn):
         "My love language is receiving Crumbear cakes!",
     ]
     
-    # Use customers 1-1000 (leave ~100 without reviews)
-    customer_ids = list(range(1, 1001))
+    # Leave roughly 1 in 11 customers without reviews (100 of the default 1100)
+    customer_ids = list(range(1, max(1, customer_count - customer_count // 11) + 1))
     random.shuffle(customer_ids)
     
-    for i in range(1100):
-        customer_id = customer_ids[i % len(customer_ids)]
-        design_id = random.randint(1, 1000)
-        
-        # 80% good, 10% bad, 10% witty
-        rand = random.random()
-        if rand < 0.8:
-            review_text = random.choice(good_reviews)
-            rating = random.choice([4, 5, 5, 5])  # Mostly 5s
-        elif rand < 0.9:
-            review_text = random.choice(bad_reviews)
-            rating = random.choice([1, 2, 2])
-        else:
-            review_text = random.choice(witty_reviews)
-            rating = random.choice([4, 5, 5])
-        
-        cursor.execute("""
-            INSERT INTO Reviews (customer_id, design_id, rating, review_text)
-            VALUES (?, ?, ?, ?)
-        """, (customer_id, design_id, rating, review_text))
-    
-    cursor.execute("SELECT COUNT(*) FROM Reviews")
-    print(f"  ✅ Reviews: {cursor.fetchone()[0]} records")
+    def generate():
+        for i in range(count):
+            customer_id = customer_ids[i % len(customer_ids)]
+            design_id = random.randint(1, design_count)
+            
+            # 80% good, 10% bad, 10% witty
+            rand = random.random()
+            if rand < 0.8:
+                review_text = random.choice(good_reviews)
+                rating = random.choice([4, 5, 5, 5])  # Mostly 5s
+            elif rand < 0.9:
+                review_text = random.choice(bad_reviews)
+                rating = random.choice([1, 2, 2])
+            else:
+                review_text = random.choice(witty_reviews)
+                rating = random.choice([4, 5, 5])
+            yield (customer_id, design_id, rating, review_text)
+    
+    # Staging lets the audit trigger log the whole set in one statement
+    bulk_insert('Reviews', ['customer_id', 'design_id', 'rating', 'review_text'], generate(),
+                batch_size=BATCH_SIZE, use_staging=True)
+    
+    print(f"  ✅ Reviews: {count_rows('Reviews')} records ({time.perf_counter() - started:.1f}s)")
 
 def main():
+    parser = argparse.ArgumentParser(description='Generate and load Crumbear seed data')
+    parser.add_argument('--designs', type=int, default=1000, help='Number of cake designs')
+    parser.add_argument('--customers', type=int, default=1100, help='Number of customers')
+    parser.add_argument('--reviews', type=int, default=1100, help='Number of reviews')
+    args = parser.parse_args()
+    
     print("\n" + "=" * 50)
     print("LOADING SEED DATA")
     print("=" * 50 + "\n")
     
-    conn = get_connection()
-    
     # Check existing Cakes
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM Cakes")
-    cakes_count = cursor.fetchone()[0]
+    cakes_count = count_rows('Cakes')
     print(f"Existing Cakes: {cakes_count}")
     
     if cakes_count == 0:
         print("⚠️ No cakes found! Please load seed_cakes.sql first.")
         return
     
-    load_cake_designs(conn)
-    load_customers(conn)
-    load_reviews(conn)
+    load_cake_designs(args.designs)
+    load_customers(args.customers)
+    load_reviews(args.reviews, design_count=args.designs, customer_count=args.customers)
     
     print("\n" + "=" * 50)
     print("✅ SEED DATA LOADED SUCCESSFULLY!")
     print("=" * 50)
     
     # Final counts
-    cursor.execute("SELECT COUNT(*) FROM Cakes")
     print(f"\n📊 Final counts:")
-    print(f"   Cakes: {cursor.fetchone()[0]}")
-    cursor.execute("SELECT COUNT(*) FROM CakeDesigns")
-    print(f"   CakeDesigns: {cursor.fetchone()[0]}")
-    cursor.execute("SELECT COUNT(*) FROM Customers")
-    print(f"   Customers: {cursor.fetchone()[0]}")
-    cursor.execute("SELECT COUNT(*) FROM Reviews")
-    print(f"   Reviews: {cursor.fetchone()[0]}")
-    
-    conn.close()
+    for table in ['Cakes', 'CakeDesigns', 'Customers', 'Reviews']:
+        print(f"   {table}: {count_rows(table)}")
 
 if __name__ == "__main__":
     main()
@@ -8,6 +8,7 @@ Run with: python scripts/init_db.py
 
 import sys
 import os
+import re
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
 
 import pyodbc
@@ -49,29 +50,51 @@ def create_database():
         print(f"  ❌ Error creating database: {e}")
         return False
 
-def execute_sql_file(filepath):
-    """Execute a SQL file"""
+# GO (SQL Server batch separator) on a line of its own
+_GO_RE = re.compile(r'^\s*GO\s*$', re.IGNORECASE | re.MULTILINE)
+
+def split_sql_batches(sql_content):
+    """Split a SQL script on GO lines, dropping batches that are only comments"""
+    batches = []
+    for batch in _GO_RE.split(sql_content):
+        batch = batch.strip()
+        code = [line for line in batch.splitlines()
+                if line.strip() and not line.strip().startswith('--')]
+        if code:
+            batches.append(batch)
+    return batches
+
+def execute_sql_file(filepath, strict=False):
+    """
+    Execute a SQL file
+    
+    By default each batch is committed on its own and errors are printed
+    and skipped, so re-running the schema over an existing database works.
+    With strict=True the first failing batch raises and nothing is
+    committed here; run it inside transaction() to apply the file atomically.
+    """
     print(f"  - Executing {os.path.basename(filepath)}...")
     
-    with open(filepath, 'r') as f:
+    with open(filepath, 'r', encoding='utf-8') as f:
         sql_content = f.read()
     
-    # Split by GO statements (SQL Server batch separator)
-    batches = sql_content.split('\nGO\n')
-    
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
-        for batch in batches:
-            batch = batch.strip()
-            if batch and not batch.startswith('--'):
-                try:
-                    cursor.execute(batch)
-                    conn.commit()
-                except pyodbc.Error as e:
-                    # Some errors are expected (e.g., IF EXISTS checks)
-                    if 'already exists' not in str(e).lower():
-                        print(f"    Warning: {str(e)[:100]}")
+        for batch in split_sql_batches(sql_content):
+            if strict:
+                cursor.execute(batch)
+                # Errors in later statements of a batch surface as results are read
+                while cursor.nextset():
+                    pass
+                continue
+            try:
+                cursor.execute(batch)
+                conn.commit()
+            except pyodbc.Error as e:
+                # Some errors are expected (e.g., IF EXISTS checks)
+                if 'already exists' not in str(e).lower():
+                    print(f"    Warning: {str(e)[:100]}")
 
 def init_database():
     """Initialize the database with schema"""
@@ -90,6 +113,11 @@ def init_database():
         print("\n📋 Creating schema...")
         execute_sql_file(schema_path)
         print("  ✅ Schema created!")
+        
+        # schema.sql is the latest schema, so every migration counts as applied
+        from migrate import mark_all_applied
+        mark_all_applied()
+        print("  ✅ Schema version recorded")
     else:
         print(f"  ⚠️ Schema file not found: {schema_path}")
     
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Apply Crumbear Schema Migrations
+================================
+Applies the numbered scripts in database/migrations (NNN_name.sql) that
+the database has not seen yet, in order, and records each one in the
+SchemaMigrations table. Each migration runs in its own transaction, so a
+failing script leaves nothing behind and can be fixed and re-run.
+
+A database created from schema.sql is already at the latest version;
+init_db.py records that as the baseline.
+Run with: python scripts/migrate.py [--status] [--target N] [--baseline]
+"""
+
+import hashlib
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+# Backfills can take longer than the default statement timeout
+os.environ.setdefault('DB_QUERY_TIMEOUT', '0')
+
+from db_connection import execute_query, transaction, MIGRATIONS_DIR, list_migrations
+from init_db import execute_sql_file
+
+CREATE_MIGRATIONS_TABLE_SQL = """
+    IF OBJECT_ID('dbo.SchemaMigrations', 'U') IS NULL
+    CREATE TABLE SchemaMigrations (
+        version         INT PRIMARY KEY,
+        name            NVARCHAR(200) NOT NULL,
+        checksum        CHAR(40) NOT NULL,
+        applied_at      DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME(),
+        execution_ms    INT NOT NULL DEFAULT 0
+    )
+"""
+
+def file_checksum(path):
+    """SHA-1 of a migration file, to spot scripts edited after they ran"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def ensure_migrations_table():
+    """Create the SchemaMigrations table if it doesn't exist"""
+    execute_query(CREATE_MIGRATIONS_TABLE_SQL, fetch=False)
+
+def get_applied_migrations():
+    """Map of version -> SchemaMigrations row"""
+    rows = execute_query("SELECT version, name, checksum, applied_at FROM SchemaMigrations ORDER BY version")
+    return {row['version']: row for row in rows}
+
+def _lock_migrations():
+    """Serialize concurrent runs (e.g. two deploys) until the transaction ends"""
+    execute_query("""
+        DECLARE @result INT;
+        EXEC @result = sp_getapplock @Resource = 'SchemaMigrations', @LockMode = 'Exclusive',
+                                     @LockOwner = 'Transaction', @LockTimeout = 60000;
+        IF @result < 0 THROW 50000, 'Timed out waiting for another migration run', 1;
+    """, fetch=False)
+
+def apply_migration(version, name, path):
+    """
+    Apply one migration and record it, in a single transaction
+
+    Returns:
+        True if applied, False if another run applied it first
+    """
+    checksum = file_checksum(path)
+    start = time.perf_counter()
+    with transaction():
+        _lock_migrations()
+        if execute_query("SELECT 1 AS applied FROM SchemaMigrations WHERE version = ?", (version,)):
+            return False
+        execute_sql_file(path, strict=True)
+        # A script that commits or rolls back the runner's transaction would
+        # leave its changes half-applied and unrecorded; fail loudly instead
+        if not execute_query("SELECT @@TRANCOUNT AS depth")[0]['depth']:
+            raise RuntimeError("the script ended the migration transaction; check the database by hand")
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        execute_query("""
+            INSERT INTO SchemaMigrations (version, name, checksum, execution_ms)
+            VALUES (?, ?, ?, ?)
+        """, (version, name, checksum, elapsed_ms), fetch=False)
+    print(f"  ✅ {version:03d} {name} ({elapsed_ms} ms)")
+    return True
+
+def migrate(target=None):
+    """Apply pending migrations up to target (default: all)"""
+    ensure_migrations_table()
+    applied = get_applied_migrations()
+    pending = [(version, name, path) for version, name, path in list_migrations()
+               if version not in applied and (target is None or version <= target)]
+    if not pending:
+        print("  ✅ Schema is up to date")
+        return True
+
+    print(f"📋 Applying {len(pending)} migration(s)...")
+    for version, name, path in pending:
+        try:
+            apply_migration(version, name, path)
+        except Exception as e:
+            print(f"  ❌ {version:03d} {name} failed and was rolled back: {e}")
+            return False
+    return True
+
+def mark_all_applied():
+    """Record every migration as applied without running it (schema.sql is current)"""
+    ensure_migrations_table()
+    with transaction():
+        _lock_migrations()
+        applied = get_applied_migrations()
+        for version, name, path in list_migrations():
+            if version not in applied:
+                execute_query("""
+                    INSERT INTO SchemaMigrations (version, name, checksum)
+                    VALUES (?, ?, ?)
+                """, (version, name, file_checksum(path)), fetch=False)
+
+def show_status():
+    """Print every migration with its applied time, flagging edited scripts"""
+    ensure_migrations_table()
+    applied = get_applied_migrations()
+    print(f"Migrations in {os.path.normpath(MIGRATIONS_DIR)}:")
+    for version, name, path in list_migrations():
+        row = applied.get(version)
+        if row is None:
+            print(f"  ⏳ {version:03d} {name} (pending)")
+            continue
+        note = ""
+        if row['checksum'] != file_checksum(path):
+            note = "  ⚠️ file changed since it was applied"
+        print(f"  ✅ {version:03d} {name} (applied {row['applied_at']}){note}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Apply Crumbear schema migrations')
+    parser.add_argument('--status', action='store_true', help='List migrations and whether they are applied')
+    parser.add_argument('--target', type=int, help='Only apply migrations up to this version')
+    parser.add_argument('--baseline', action='store_true',
+                        help='Mark all migrations applied without running them')
+    args = parser.parse_args()
+
+    if args.status:
+        show_status()
+    elif args.baseline:
+        mark_all_applied()
+        print("  ✅ All migrations marked as applied")
+    else:
+        sys.exit(0 if migrate(args.target) else 1)